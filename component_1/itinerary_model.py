@@ -1,4 +1,6 @@
+import json
 import os
+import sys
 from dataclasses import dataclass
 from typing import Any, Dict, List, Tuple
 import ast
@@ -15,28 +17,22 @@ from sklearn.metrics import (
     roc_auc_score,
 )
 import xgboost as xgb
-from tensorflow import keras
-from tensorflow.keras import layers
 
+# train_itinerary_model.py and predict_itinerary.py run from this directory
+# and import this module first; it puts the repo root on sys.path for their
+# ml_common imports.
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
 
+from ml_common.fusion_numpy import export_fusion_weights, load_fusion_model, weights_path_for
+from ml_common.tree_ensemble import compile_tree_model
+from ml_common.compiled_encoder import CompiledEncoder, load_encoders, save_encoders
+from ml_common.geo import GeoIndex, haversine_distance
+from ml_common.parallel_fit import fit_estimators
 
-# Utilities
-
-
-def haversine_distance(lat1, lon1, lat2, lon2):
 
-    R = 6371.0
-    lat1 = np.radians(lat1)
-    lon1 = np.radians(lon1)
-    lat2 = np.radians(lat2)
-    lon2 = np.radians(lon2)
-
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-
-    a = np.sin(dlat / 2.0) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2.0) ** 2
-    c = 2 * np.arcsin(np.sqrt(a))
-    return R * c
+# Utilities
 
 
 def parse_selected_list(s):
@@ -70,6 +66,50 @@ def parse_selected_list(s):
 
 
 
+def iter_csv_chunks(source, chunksize: int):
+    """DataFrame chunks of `chunksize` rows from a CSV path (read lazily) or an in-memory frame."""
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunksize):
+            yield source.iloc[start:start + chunksize]
+    else:
+        yield from pd.read_csv(source, chunksize=chunksize)
+
+
+def _first_in_row(values: np.ndarray) -> np.ndarray:
+    """Mask of each value's first occurrence within its row of a 2-D int array."""
+    n_rows, width = values.shape
+    flat = values.ravel()
+    row_of = np.repeat(np.arange(n_rows), width)
+    order = np.lexsort((np.arange(flat.size), flat, row_of))
+    first = np.ones(flat.size, dtype=bool)
+    first[order[1:]] = (flat[order[1:]] != flat[order[:-1]]) | (row_of[order[1:]] != row_of[order[:-1]])
+    return first.reshape(n_rows, width)
+
+
+class _PairBatchIter(xgb.DataIter):
+    # Feeds XGBoost one transformed pair batch at a time; XGBoost calls
+    # reset() between passes and every pass regenerates the batches.
+
+    def __init__(self, batches, transform):
+        self._batches = batches  # () -> iterator of (pairs, labels)
+        self._transform = transform
+        self._it = None
+        super().__init__()
+
+    def next(self, input_data):
+        if self._it is None:
+            self._it = self._batches()
+        batch = next(self._it, None)
+        if batch is None:
+            return 0
+        pairs, labels = batch
+        input_data(data=self._transform(pairs), label=labels)
+        return 1
+
+    def reset(self):
+        self._it = None
+
+
 # Main Itinerary Model
 
 
@@ -84,6 +124,9 @@ class ItineraryModel:
     categorical_cols: List[str] = None
     numeric_cols: List[str] = None
 
+    # compiled ColumnTransformers, saved with the bundle (encoders.json)
+    encoders: Dict[str, CompiledEncoder] = None
+
     # caches for plotting / diagnostics
     last_time_eval: Dict[str, np.ndarray] = None
     last_budget_eval: Dict[str, np.ndarray] = None
@@ -124,7 +167,7 @@ class ItineraryModel:
         )
         return preprocessor
 
-    def train_time_budget_models(self, df: pd.DataFrame) -> Dict[str, float]:
+    def train_time_budget_models(self, df: pd.DataFrame, workers: int = None, threads: int = None) -> Dict[str, float]:
 
         df = df.copy()
 
@@ -167,8 +210,15 @@ class ItineraryModel:
             steps=[("preprocess", preprocessor), ("model", budget_reg)]
         )
 
-        self.time_model.fit(X_train, y_time_train)
-        self.budget_model.fit(X_train, y_budget_train)
+        fitted = fit_estimators(
+            {
+                "time": (self.time_model, X_train, y_time_train),
+                "budget": (self.budget_model, X_train, y_budget_train),
+            },
+            workers=workers,
+            threads=threads,
+        )
+        self.time_model, self.budget_model = fitted["time"], fitted["budget"]
 
         # Evaluate
         y_time_pred = self.time_model.predict(X_val)
@@ -195,6 +245,64 @@ class ItineraryModel:
 
     # ATTRACTION RANKING + FUSION
 
+    # Itinerary columns copied onto every pair: (column, default when the frame lacks it)
+    PAIR_ITINERARY_COLUMNS = [
+        ("budget", 0.0),
+        ("available_days", 1.0),
+        ("num_travelers", 1.0),
+        ("distance_preference", 50.0),
+        ("activity_type", "general"),
+        ("season", "any"),
+    ]
+
+    # Catalog columns: (pair column, catalog column, default when the catalog lacks it)
+    PAIR_ATTRACTION_COLUMNS = [
+        ("attraction_category", "category", "general"),
+        ("attraction_avg_cost", "avg_cost", 0.0),
+        ("attraction_avg_duration", "avg_duration_hours", 2.0),
+        ("attraction_outdoor", "outdoor", True),
+        ("attraction_popularity_score", "popularity_score", 0.0),
+        ("attraction_best_season", "best_season", "any"),
+        ("attraction_accessibility", "accessibility", "medium"),
+        ("attraction_tourist_density", "tourist_density", 0.0),
+        ("attraction_safety_rating", "safety_rating", 3.0),
+    ]
+
+    # Rows of uniform draws per RNG call when sampling negatives
+    NEGATIVE_SAMPLING_CHUNK = 65536
+
+    ATTRACTION_NUMERIC_COLS = [
+        "budget",
+        "available_days",
+        "num_travelers",
+        "distance_preference",
+        "attraction_avg_cost",
+        "attraction_avg_duration",
+        "attraction_outdoor",
+        "attraction_popularity_score",
+        "attraction_tourist_density",
+        "attraction_safety_rating",
+        "distance_km",
+    ]
+    ATTRACTION_CATEGORICAL_COLS = [
+        "activity_type",
+        "season",
+        "attraction_category",
+        "attraction_best_season",
+        "attraction_accessibility",
+    ]
+
+    # Incremental updates (update_from_new_rows)
+    INCREMENTAL_BOOST_ROUNDS = 50     # trees appended to each XGBoost model
+    FINE_TUNE_LEARNING_RATE = 1e-4    # fusion network, 10x below the from-scratch rate
+    FINE_TUNE_EPOCHS = 20
+
+    # Streaming training (train_attraction_model_streaming)
+    STREAM_CHUNK_ITINERARIES = 20000  # itineraries read per CSV chunk
+    STREAM_SAMPLE_PAIRS = 200000      # uniform pair sample for medians / encoder fit
+    STREAM_VAL_FRACTION = 0.2         # itineraries held out for validation
+    FUSION_BLOCK_ROWS = 65536         # fusion rows read (and shuffled) per block
+
     def _build_attraction_training_pairs(
         self,
         itinerary_df: pd.DataFrame,
@@ -203,90 +311,160 @@ class ItineraryModel:
         negative_per_positive: int = 5,
         random_state: int = 42,
     ) -> Tuple[pd.DataFrame, np.ndarray]:
-
+        """(pairs, labels): each selected attraction as a positive, followed by its sampled negatives.
+
+        Negatives for a positive are negative_per_positive distinct catalog
+        rows outside that itinerary's selection (all of them if there are no
+        more than that), drawn uniformly and emitted in catalog order (see
+        _sample_negatives). Pair features are gathered from column arrays
+        with fancy indexing.
+        """
         rng = np.random.RandomState(random_state)
-        rows = []
-        labels = []
 
         if attraction_id_col not in attractions_df.columns:
             attraction_id_col = "attraction_id" if "attraction_id" in attractions_df.columns else "name"
 
-        all_ids = attractions_df[attraction_id_col].astype(str).tolist()
-
-        for _, it in itinerary_df.iterrows():
-            selected_set = set(parse_selected_list(it.get("selected_attractions", "")))
-            if not selected_set:
-                continue
-
-            # positive attractions for this itinerary
-            pos_mask = attractions_df[attraction_id_col].astype(str).isin(selected_set)
-            pos_attractions = attractions_df[pos_mask]
-            neg_attractions = attractions_df[~pos_mask]
-
-            if len(pos_attractions) == 0 or len(neg_attractions) == 0:
+        # Selected ids -> catalog rows, once (a catalog id can repeat)
+        catalog_ids = attractions_df[attraction_id_col].astype(str).to_numpy()
+        rows_by_id = {}
+        for row, att_id in enumerate(catalog_ids):
+            rows_by_id.setdefault(att_id, []).append(row)
+
+        selected = itinerary_df["selected_attractions"] if "selected_attractions" in itinerary_df.columns \
+            else pd.Series([""] * len(itinerary_df))
+        n_catalog = len(attractions_df)
+        pos_it, pos_att = [], []
+        for it_row, value in enumerate(selected):
+            rows = sorted({row for att_id in set(parse_selected_list(value)) for row in rows_by_id.get(att_id, ())})
+            if not rows or len(rows) == n_catalog:
                 continue
-
-            neg_ids_list = neg_attractions[attraction_id_col].astype(str).tolist()
-
-            for _, pos_att in pos_attractions.iterrows():
-                pos_id = str(pos_att[attraction_id_col])
-
-                # positive sample
-                rows.append(self._build_single_pair_row(it, pos_att))
-                labels.append(1)
-
-                # negative samples
-                if len(neg_ids_list) <= negative_per_positive:
-                    sampled_neg = neg_attractions
-                else:
-                    sampled_ids = rng.choice(neg_ids_list, size=negative_per_positive, replace=False)
-                    sampled_neg = neg_attractions[
-                        neg_attractions[attraction_id_col].astype(str).isin(sampled_ids)
-                    ]
-
-                for _, neg_att in sampled_neg.iterrows():
-                    rows.append(self._build_single_pair_row(it, neg_att))
-                    labels.append(0)
-
-        train_df = pd.DataFrame(rows)
-        labels = np.array(labels, dtype=int)
-        return train_df, labels
-
-    def _build_single_pair_row(self, it: pd.Series, att: pd.Series) -> Dict[str, Any]:
-
-        base = {
-            "budget": it.get("budget", 0.0),
-            "available_days": it.get("available_days", 1.0),
-            "num_travelers": it.get("num_travelers", 1.0),
-            "distance_preference": it.get("distance_preference", 50.0),
-            "activity_type": it.get("activity_type", "general"),
-            "season": it.get("season", "any"),
-        }
-
-        base["attraction_id"] = str(att.get("attraction_id", att.get("name", "")))
-        base["attraction_category"] = att.get("category", "general")
-        base["attraction_avg_cost"] = att.get("avg_cost", 0.0)
-        base["attraction_avg_duration"] = att.get("avg_duration_hours", 2.0)
-        base["attraction_outdoor"] = 1.0 if bool(att.get("outdoor", True)) else 0.0
-        base["attraction_popularity_score"] = att.get("popularity_score", 0.0)
-        base["attraction_best_season"] = att.get("best_season", "any")
-        base["attraction_accessibility"] = att.get("accessibility", "medium")
-        base["attraction_tourist_density"] = att.get("tourist_density", 0.0)
-        base["attraction_safety_rating"] = att.get("safety_rating", 3.0)
-
-        start_lat = it.get("start_latitude", np.nan)
-        start_lon = it.get("start_longitude", np.nan)
-        lat = att.get("latitude", np.nan)
-        lon = att.get("longitude", np.nan)
-
-        if not np.isnan(start_lat) and not np.isnan(start_lon) and not np.isnan(lat) and not np.isnan(lon):
-            base["distance_km"] = haversine_distance(start_lat, start_lon, lat, lon)
-        else:
-            base["distance_km"] = np.nan
-
-        return base
+            pos_it.extend([it_row] * len(rows))
+            pos_att.extend(rows)
+        pos_it = np.asarray(pos_it, dtype=int)
+        pos_att = np.asarray(pos_att, dtype=int)
+
+        neg_owner, neg_att = self._sample_negatives(rng, pos_it, pos_att, n_catalog, negative_per_positive)
+
+        # Layout: [positive, its negatives in catalog order] per positive
+        n_neg = np.bincount(neg_owner, minlength=len(pos_att))
+        group_size = 1 + n_neg
+        group_start = np.cumsum(group_size) - group_size
+        total = int(group_size.sum())
+        att_idx = np.empty(total, dtype=int)
+        labels = np.zeros(total, dtype=int)
+        att_idx[group_start] = pos_att
+        labels[group_start] = 1
+        rank = np.arange(len(neg_owner)) - (np.cumsum(n_neg) - n_neg)[neg_owner]
+        att_idx[group_start[neg_owner] + 1 + rank] = neg_att
+        it_idx = np.repeat(pos_it, group_size)
+
+        return self._pair_frame(itinerary_df, attractions_df, it_idx, att_idx), labels
+
+    def _sample_negatives(self, rng, pos_it, pos_att, n_catalog: int, k: int):
+        """(owner, catalog row) of each positive's negatives, sorted by owner then catalog row.
+
+        pos_it / pos_att hold one entry per positive, grouped by itinerary
+        with each itinerary's rows ascending. Every positive gets k distinct
+        uniform rows outside its itinerary's selection, or the whole pool if
+        it is no larger than k.
+
+        Sampling draws k + slack candidate indices per positive and keeps the
+        first k distinct allowed ones; only rows left short are redrawn, so
+        work and memory stay O(positives * k) however large the catalog is.
+        Itineraries that selected more than half the catalog (where blind
+        draws would mostly miss) or leave no more than k rows take k uniform
+        keys over their allowed rows instead, which costs no more than their
+        selection does.
+        """
+        n_pos = len(pos_att)
+        if n_pos == 0 or k <= 0:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+
+        # Selection membership as sorted (itinerary, row) keys
+        it_compact = np.unique(pos_it, return_inverse=True)[1].ravel()
+        selected_keys = it_compact.astype(np.int64) * n_catalog + pos_att
+        n_selected = np.bincount(it_compact)[it_compact]
+
+        def is_selected(owners, rows):
+            keys = it_compact[owners, None].astype(np.int64) * n_catalog + rows
+            at = np.minimum(np.searchsorted(selected_keys, keys), len(selected_keys) - 1)
+            return selected_keys[at] == keys
+
+        # Pools no larger than k are taken whole, so they can't go through the draws either
+        dense = (2 * n_selected > n_catalog) | (n_catalog - n_selected <= k)
+        owners, negatives = [], []
+
+        # Sparse path: k + slack draws per positive, redraw the short rows
+        width = 2 * k
+        for start in range(0, n_pos, self.NEGATIVE_SAMPLING_CHUNK):
+            rows = np.arange(start, min(start + self.NEGATIVE_SAMPLING_CHUNK, n_pos))
+            rows = rows[~dense[rows]]
+            cand = rng.randint(n_catalog, size=(len(rows), width))
+            while len(rows):
+                keep = ~is_selected(rows, cand) & _first_in_row(cand)
+                keep &= np.cumsum(keep, axis=1) <= k
+                done = keep.sum(axis=1) == k
+                owners.append(np.repeat(rows[done], k))
+                negatives.append(cand[done][keep[done]])
+                # Short rows: accepted candidates first, fresh draws after them
+                order = np.argsort(~keep[~done], axis=1, kind="stable")
+                rows, cand, n_kept = rows[~done], np.take_along_axis(cand[~done], order, axis=1), keep[~done].sum(axis=1)
+                fresh = np.arange(width)[None, :] >= n_kept[:, None]
+                cand[fresh] = rng.randint(n_catalog, size=int(fresh.sum()))
+
+        # Dense path: uniform keys over the allowed rows
+        dense_rows = np.flatnonzero(dense)
+        per_block = max(1, self.NEGATIVE_SAMPLING_CHUNK * 2 * k // n_catalog)
+        for start in range(0, len(dense_rows), per_block):
+            rows = dense_rows[start:start + per_block]
+            allowed = ~is_selected(rows, np.arange(n_catalog)[None, :])
+            keys = np.where(allowed, rng.random_sample(allowed.shape), np.inf)
+            take = min(k, n_catalog)
+            picked = np.argpartition(keys, take - 1, axis=1)[:, :take]
+            chosen = np.zeros_like(allowed)
+            np.put_along_axis(chosen, picked, True, axis=1)
+            chosen &= allowed
+            owner_idx, catalog_rows = np.nonzero(chosen)
+            owners.append(rows[owner_idx])
+            negatives.append(catalog_rows)
+
+        owners, negatives = np.concatenate(owners), np.concatenate(negatives)
+        order = np.lexsort((negatives, owners))
+        return owners[order], negatives[order]
+
+    def _pair_frame(self, itinerary_df, attractions_df, it_idx, att_idx) -> pd.DataFrame:
+        """Pair feature frame for (itinerary row, catalog row) index arrays."""
+        def column(df, col, default, idx):
+            if col not in df.columns:
+                return np.full(len(idx), default, dtype=object if isinstance(default, str) else None)
+            return df[col].to_numpy()[idx]
+
+        pairs = {col: column(itinerary_df, col, default, it_idx) for col, default in self.PAIR_ITINERARY_COLUMNS}
+
+        id_col = "attraction_id" if "attraction_id" in attractions_df.columns else "name"
+        pairs["attraction_id"] = (
+            attractions_df[id_col].astype(str).to_numpy()[att_idx] if id_col in attractions_df.columns
+            else np.full(len(att_idx), "", dtype=object)
+        )
+        for pair_col, col, default in self.PAIR_ATTRACTION_COLUMNS:
+            pairs[pair_col] = column(attractions_df, col, default, att_idx)
+        # Missing flags count as outdoor, like bool(NaN)
+        outdoor = pairs["attraction_outdoor"]
+        pairs["attraction_outdoor"] = np.where(pd.isna(outdoor), True, outdoor).astype(bool).astype(float)
+
+        # NaN wherever either end has no coordinates
+        pairs["distance_km"] = haversine_distance(
+            column(itinerary_df, "start_latitude", np.nan, it_idx).astype(float),
+            column(itinerary_df, "start_longitude", np.nan, it_idx).astype(float),
+            column(attractions_df, "latitude", np.nan, att_idx).astype(float),
+            column(attractions_df, "longitude", np.nan, att_idx).astype(float),
+        )
+        return pd.DataFrame(pairs)
 
     def _build_fusion_model(self, input_dim: int):
+        from tensorflow import keras
+        from tensorflow.keras import layers
+
         inputs = layers.Input(shape=(input_dim,), name="fusion_features")
 
         x = layers.Dense(8, activation="relu")(inputs)
@@ -304,6 +482,60 @@ class ItineraryModel:
         )
         self.fusion_model = model
 
+    def _build_attraction_preprocessor(self, categories="auto"):
+        preprocessor = ColumnTransformer(
+            transformers=[
+                ("cat", OneHotEncoder(handle_unknown="ignore", categories=categories), self.ATTRACTION_CATEGORICAL_COLS),
+                ("num", "passthrough", self.ATTRACTION_NUMERIC_COLS),
+            ]
+        )
+        return preprocessor
+
+    def _build_attraction_classifier(self, **params):
+        params = {
+            "n_estimators": 300,
+            "max_depth": 6,
+            "learning_rate": 0.05,
+            "subsample": 0.8,
+            "colsample_bytree": 0.8,
+            "objective": "binary:logistic",
+            "eval_metric": "auc",
+            "random_state": 42,
+            **params,
+        }
+        return xgb.XGBClassifier(**params)
+
+    @staticmethod
+    def _fusion_features(df_pairs: pd.DataFrame, base_proba: np.ndarray) -> np.ndarray:
+        budget = df_pairs["budget"].values
+        days = np.maximum(df_pairs["available_days"].values, 1.0)
+        dist_pref = np.maximum(df_pairs["distance_preference"].values, 1.0)
+        avg_cost = df_pairs["attraction_avg_cost"].values
+        avg_dur = df_pairs["attraction_avg_duration"].values
+        dist_km = df_pairs["distance_km"].fillna(df_pairs["distance_km"].median()).values
+
+        daily_budget = budget / days
+        cost_ratio = avg_cost / np.maximum(daily_budget, 1.0)
+
+        max_hours = days * 8.0
+        duration_ratio = avg_dur / np.maximum(max_hours, 1.0)
+
+        distance_ratio = dist_km / dist_pref
+
+        cost_ratio = np.clip(cost_ratio, 0.0, 5.0)
+        duration_ratio = np.clip(duration_ratio, 0.0, 5.0)
+        distance_ratio = np.clip(distance_ratio, 0.0, 5.0)
+
+        features = np.column_stack(
+            [
+                base_proba,
+                cost_ratio,
+                duration_ratio,
+                distance_ratio,
+            ]
+        )
+        return features
+
     def train_attraction_model(
         self,
         itinerary_df: pd.DataFrame,
@@ -322,46 +554,11 @@ class ItineraryModel:
         if len(pairs_df) == 0:
             raise ValueError("No training pairs generated. Check selected_attractions and attraction_id mapping.")
 
-        numeric_cols = [
-            "budget",
-            "available_days",
-            "num_travelers",
-            "distance_preference",
-            "attraction_avg_cost",
-            "attraction_avg_duration",
-            "attraction_outdoor",
-            "attraction_popularity_score",
-            "attraction_tourist_density",
-            "attraction_safety_rating",
-            "distance_km",
-        ]
-        cat_cols = [
-            "activity_type",
-            "season",
-            "attraction_category",
-            "attraction_best_season",
-            "attraction_accessibility",
-        ]
-
+        numeric_cols = self.ATTRACTION_NUMERIC_COLS
         pairs_df[numeric_cols] = pairs_df[numeric_cols].fillna(pairs_df[numeric_cols].median())
 
-        preprocessor = ColumnTransformer(
-            transformers=[
-                ("cat", OneHotEncoder(handle_unknown="ignore"), cat_cols),
-                ("num", "passthrough", numeric_cols),
-            ]
-        )
-
-        clf = xgb.XGBClassifier(
-            n_estimators=300,
-            max_depth=6,
-            learning_rate=0.05,
-            subsample=0.8,
-            colsample_bytree=0.8,
-            objective="binary:logistic",
-            eval_metric="auc",
-            random_state=42,
-        )
+        preprocessor = self._build_attraction_preprocessor()
+        clf = self._build_attraction_classifier()
 
         X_train, X_val, y_train, y_val = train_test_split(
             pairs_df, labels, test_size=0.2, random_state=42, stratify=labels
@@ -380,41 +577,13 @@ class ItineraryModel:
         # Build fusion training features
         y_train_proba_base = self.attraction_model.predict_proba(X_train)[:, 1]
 
-        def build_fusion_features(df_pairs: pd.DataFrame, base_proba: np.ndarray) -> np.ndarray:
-            budget = df_pairs["budget"].values
-            days = np.maximum(df_pairs["available_days"].values, 1.0)
-            dist_pref = np.maximum(df_pairs["distance_preference"].values, 1.0)
-            avg_cost = df_pairs["attraction_avg_cost"].values
-            avg_dur = df_pairs["attraction_avg_duration"].values
-            dist_km = df_pairs["distance_km"].fillna(df_pairs["distance_km"].median()).values
-
-            daily_budget = budget / days
-            cost_ratio = avg_cost / np.maximum(daily_budget, 1.0)
-
-            max_hours = days * 8.0
-            duration_ratio = avg_dur / np.maximum(max_hours, 1.0)
-
-            distance_ratio = dist_km / dist_pref
-
-            cost_ratio = np.clip(cost_ratio, 0.0, 5.0)
-            duration_ratio = np.clip(duration_ratio, 0.0, 5.0)
-            distance_ratio = np.clip(distance_ratio, 0.0, 5.0)
-
-            features = np.column_stack(
-                [
-                    base_proba,
-                    cost_ratio,
-                    duration_ratio,
-                    distance_ratio,
-                ]
-            )
-            return features
-
-        X_fusion_train = build_fusion_features(X_train, y_train_proba_base)
-        X_fusion_val = build_fusion_features(X_val, y_val_proba_base)
+        X_fusion_train = self._fusion_features(X_train, y_train_proba_base)
+        X_fusion_val = self._fusion_features(X_val, y_val_proba_base)
 
         self._build_fusion_model(input_dim=X_fusion_train.shape[1])
 
+        from tensorflow import keras
+
         callbacks = [
             keras.callbacks.EarlyStopping(
                 monitor="val_loss", patience=10, restore_best_weights=True
@@ -453,6 +622,353 @@ class ItineraryModel:
 
         return metrics
 
+    # STREAMING TRAINING
+
+    def _iter_attraction_pairs(
+        self,
+        itinerary_source,
+        attractions_df: pd.DataFrame,
+        split: str,
+        negative_per_positive: int = 5,
+        chunksize: int = None,
+        random_state: int = 42,
+    ):
+        """Yield (pairs, labels) per itinerary chunk for split "train" or "val".
+
+        Itineraries (not pairs) are assigned to the validation split, so an
+        itinerary's positives and negatives never straddle it. Every pass
+        with the same arguments yields the same batches.
+        """
+        for i, chunk in enumerate(iter_csv_chunks(itinerary_source, chunksize or self.STREAM_CHUNK_ITINERARIES)):
+            is_val = np.random.RandomState(random_state + i).rand(len(chunk)) < self.STREAM_VAL_FRACTION
+            part = chunk[is_val if split == "val" else ~is_val]
+            pairs, labels = self._build_attraction_training_pairs(
+                part,
+                attractions_df,
+                attraction_id_col="attraction_id",
+                negative_per_positive=negative_per_positive,
+                random_state=random_state + i,
+            )
+            if len(pairs):
+                yield pairs, labels
+
+    def _scan_attraction_pairs(self, batches, random_state: int = 42):
+        """One pass over pair batches: categories, pair count and a uniform sample of pairs.
+
+        The sample keeps the STREAM_SAMPLE_PAIRS pairs with the smallest
+        uniform keys seen so far, so it stays bounded however many pairs
+        stream past.
+        """
+        rng = np.random.RandomState(random_state)
+        categories = {col: set() for col in self.ATTRACTION_CATEGORICAL_COLS}
+        sample, keys = None, np.empty(0)
+        n_pairs = 0
+        for pairs, _ in batches:
+            n_pairs += len(pairs)
+            for col in self.ATTRACTION_CATEGORICAL_COLS:
+                categories[col].update(pairs[col].dropna().unique())
+            sample = pairs if sample is None else pd.concat([sample, pairs], ignore_index=True)
+            keys = np.concatenate([keys, rng.random_sample(len(pairs))])
+            if len(keys) > self.STREAM_SAMPLE_PAIRS:
+                keep = np.sort(np.argpartition(keys, self.STREAM_SAMPLE_PAIRS - 1)[: self.STREAM_SAMPLE_PAIRS])
+                sample, keys = sample.iloc[keep].reset_index(drop=True), keys[keep]
+        if sample is None:
+            raise ValueError("No training pairs generated. Check selected_attractions and attraction_id mapping.")
+        # Same order OneHotEncoder(categories="auto") would learn
+        categories = [sorted(categories[col]) for col in self.ATTRACTION_CATEGORICAL_COLS]
+        return categories, n_pairs, sample
+
+    def _fusion_dataset(self, X, y, batch_size: int, shuffle: bool, random_state: int = 42):
+        """tf.data pipeline over (possibly memory-mapped) fusion arrays, read one block at a time.
+
+        Shuffling permutes the block order and the rows within each block,
+        with a fresh permutation every epoch.
+        """
+        import tensorflow as tf
+
+        block = self.FUSION_BLOCK_ROWS
+        epochs = [0]
+
+        def batches():
+            rng = np.random.RandomState(random_state + epochs[0])
+            epochs[0] += 1
+            starts = np.arange(0, len(X), block)
+            for start in (rng.permutation(starts) if shuffle else starts):
+                xb = np.asarray(X[start:start + block], dtype=np.float32)
+                yb = np.asarray(y[start:start + block], dtype=np.float32)
+                if shuffle:
+                    order = rng.permutation(len(xb))
+                    xb, yb = xb[order], yb[order]
+                for i in range(0, len(xb), batch_size):
+                    yield xb[i:i + batch_size], yb[i:i + batch_size]
+
+        dataset = tf.data.Dataset.from_generator(
+            batches,
+            output_signature=(
+                tf.TensorSpec(shape=(None, X.shape[1]), dtype=tf.float32),
+                tf.TensorSpec(shape=(None,), dtype=tf.float32),
+            ),
+        )
+        return dataset.prefetch(tf.data.AUTOTUNE)
+
+    def train_attraction_model_streaming(
+        self,
+        itinerary_source,
+        attractions_df: pd.DataFrame,
+        negative_per_positive: int = 5,
+        chunksize: int = None,
+        work_dir: str = None,
+    ) -> Dict[str, float]:
+        """train_attraction_model without materializing the pair table.
+
+        itinerary_source is a CSV path (read in chunks of `chunksize`
+        itineraries) or a DataFrame. Pair batches are regenerated from it on
+        every pass: one scan for the encoder categories and a bounded sample
+        for the median fill, XGBoost reads them through a DataIter into
+        QuantileDMatrix (histogram-compressed, so tree_method="hist"), and the
+        fusion features are written to memory-mapped files under work_dir
+        (default: a temporary directory) that Keras reads via tf.data.
+
+        Peak memory is one chunk of pairs plus the quantized matrices and
+        4 bytes per pair for labels and base scores. The validation split is
+        by itinerary (STREAM_VAL_FRACTION) rather than a stratified split of
+        pairs, and medians come from the sample, so metrics are close to but
+        not identical with train_attraction_model on the same data.
+        """
+        import tempfile
+
+        from tensorflow import keras
+
+        def batches(split):
+            return lambda: self._iter_attraction_pairs(
+                itinerary_source, attractions_df, split, negative_per_positive, chunksize
+            )
+
+        numeric_cols = self.ATTRACTION_NUMERIC_COLS
+        categories, n_train, sample = self._scan_attraction_pairs(batches("train")())
+        medians = sample[numeric_cols].median()
+
+        def filled(pairs):
+            pairs[numeric_cols] = pairs[numeric_cols].fillna(medians)
+            return pairs
+
+        preprocessor = self._build_attraction_preprocessor(categories=categories)
+        preprocessor.fit(filled(sample))
+
+        def transform(pairs):
+            return preprocessor.transform(filled(pairs))
+
+        dtrain = xgb.QuantileDMatrix(_PairBatchIter(batches("train"), transform))
+        dval = xgb.QuantileDMatrix(_PairBatchIter(batches("val"), transform), ref=dtrain)
+
+        clf = self._build_attraction_classifier(tree_method="hist")
+        params = {k: v for k, v in clf.get_xgb_params().items() if v is not None}
+        booster = xgb.train(params, dtrain, num_boost_round=clf.n_estimators)
+
+        # Hand the booster to the classifier the way XGBClassifier.load_model expects it
+        booster.set_attr(scikit_learn=json.dumps({
+            "_estimator_type": "classifier",
+            "n_classes_": 2,
+            "classes_": [0, 1],
+            "n_features_in_": dtrain.num_col(),
+        }))
+        clf.load_model(bytearray(booster.save_raw("json")))
+        self.attraction_model = Pipeline(steps=[("preprocess", preprocessor), ("model", clf)])
+
+        y_train, y_val = dtrain.get_label(), dval.get_label()
+        y_train_proba_base, y_val_proba_base = booster.predict(dtrain), booster.predict(dval)
+        base_auc = roc_auc_score(y_val, y_val_proba_base)
+        del dtrain, dval, booster
+
+        with tempfile.TemporaryDirectory(dir=work_dir) as tmp:
+            fusion = {}
+            for split, base_proba in (("train", y_train_proba_base), ("val", y_val_proba_base)):
+                X = np.lib.format.open_memmap(
+                    os.path.join(tmp, f"fusion_{split}.npy"), mode="w+", dtype=np.float32, shape=(len(base_proba), 4)
+                )
+                start = 0
+                for pairs, _ in batches(split)():
+                    stop = start + len(pairs)
+                    X[start:stop] = self._fusion_features(filled(pairs), base_proba[start:stop])
+                    start = stop
+                X.flush()
+                fusion[split] = X
+
+            self._build_fusion_model(input_dim=fusion["train"].shape[1])
+
+            callbacks = [
+                keras.callbacks.EarlyStopping(
+                    monitor="val_loss", patience=10, restore_best_weights=True
+                )
+            ]
+
+            history = self.fusion_model.fit(
+                self._fusion_dataset(fusion["train"], y_train, batch_size=64, shuffle=True),
+                validation_data=self._fusion_dataset(fusion["val"], y_val, batch_size=1024, shuffle=False),
+                epochs=80,
+                callbacks=callbacks,
+                verbose=1,
+            )
+
+            y_val_proba_fusion = self.fusion_model.predict(
+                self._fusion_dataset(fusion["val"], y_val, batch_size=1024, shuffle=False), verbose=0
+            ).ravel()
+            del fusion, X
+        fusion_auc = roc_auc_score(y_val, y_val_proba_fusion)
+
+        y_val = y_val.astype(int)
+        self.last_attraction_eval = {
+            "y_val": y_val,
+            "y_val_proba_base": y_val_proba_base,
+        }
+        self.last_fusion_eval = {
+            "y_val": y_val,
+            "y_val_proba_fusion": y_val_proba_fusion,
+            "history": history.history,
+        }
+
+        metrics = {
+            "attraction_auc_base": float(base_auc),
+            "attraction_auc_fusion": float(fusion_auc),
+            "positive_rate": float((y_train.sum() + y_val.sum()) / (len(y_train) + len(y_val))),
+            "training_pairs": int(n_train),
+        }
+
+        return metrics
+
+    # INCREMENTAL UPDATE
+
+    def load_fusion_for_training(self, models_dir: str):
+        """Replace the (possibly NumPy) fusion model with the trainable Keras one from the bundle."""
+        from tensorflow import keras
+
+        self.fusion_model = keras.models.load_model(os.path.join(models_dir, "fusion_model.h5"), compile=False)
+        return self.fusion_model
+
+    @staticmethod
+    def _continue_boosting(pipeline: Pipeline, X: pd.DataFrame, y: np.ndarray, rounds: int) -> Pipeline:
+        """A copy of a fitted Pipeline whose XGBoost model has `rounds` more trees fitted on (X, y).
+
+        The preprocessor stays as fitted: categories unseen in the original
+        data keep being ignored.
+        """
+        model = pipeline.named_steps["model"]
+        continued = type(model)(**{**model.get_params(), "n_estimators": rounds})
+        continued.fit(pipeline.named_steps["preprocess"].transform(X), y, xgb_model=model.get_booster())
+        return Pipeline(steps=[("preprocess", pipeline.named_steps["preprocess"]), ("model", continued)])
+
+    def _attraction_eval(self, pairs: pd.DataFrame, labels: np.ndarray) -> Dict[str, float]:
+        base_proba = self.attraction_model.predict_proba(pairs)[:, 1]
+        fusion_proba = self.fusion_model.predict(self._fusion_features(pairs, base_proba), verbose=0).ravel()
+        return {
+            "attraction_auc_base": float(roc_auc_score(labels, base_proba)),
+            "attraction_auc_fusion": float(roc_auc_score(labels, fusion_proba)),
+        }
+
+    def _time_budget_eval(self, X: pd.DataFrame, y_time: np.ndarray, y_budget: np.ndarray) -> Dict[str, float]:
+        y_time_pred = self.time_model.predict(X)
+        y_budget_pred = self.budget_model.predict(X)
+        return {
+            "time_mae": float(mean_absolute_error(y_time, y_time_pred)),
+            "time_r2": float(r2_score(y_time, y_time_pred)),
+            "budget_mae": float(mean_absolute_error(y_budget, y_budget_pred)),
+            "budget_r2": float(r2_score(y_budget, y_budget_pred)),
+        }
+
+    def update_from_new_rows(
+        self,
+        new_df: pd.DataFrame,
+        attractions_df: pd.DataFrame,
+        negative_per_positive: int = 5,
+        boost_rounds: int = None,
+        fine_tune_epochs: int = None,
+        test_size: float = 0.2,
+        random_state: int = 42,
+    ) -> Dict[str, Dict[str, float]]:
+        """Warm-start the loaded models on new itineraries only.
+
+        Each XGBoost model (time, budget, attraction) continues boosting from
+        its booster with boost_rounds more trees fitted on the new rows, and
+        the fusion network (load it with load_fusion_for_training) is
+        fine-tuned from its weights at FINE_TUNE_LEARNING_RATE.
+
+        A share (test_size) of the new itineraries is held out and every
+        metric is reported on it before and after the update:
+        {metric: {"before": ..., "after": ...}}. Hold-out pairs are filled
+        with the training pairs' medians, as at inference time.
+        """
+        from tensorflow import keras
+
+        boost_rounds = boost_rounds or self.INCREMENTAL_BOOST_ROUNDS
+        fine_tune_epochs = fine_tune_epochs or self.FINE_TUNE_EPOCHS
+
+        new_df = new_df.dropna(subset=["total_time_hours", "total_budget"]).reset_index(drop=True)
+        train_df, val_df = train_test_split(new_df, test_size=test_size, random_state=random_state)
+        if len(val_df) < 2:
+            raise ValueError(f"Hold-out has {len(val_df)} itinerary, need at least 2: raise test_size or pass more rows")
+
+        def pairs_for(df):
+            pairs, labels = self._build_attraction_training_pairs(
+                df,
+                attractions_df,
+                attraction_id_col="attraction_id",
+                negative_per_positive=negative_per_positive,
+                random_state=random_state,
+            )
+            if len(pairs) == 0:
+                raise ValueError("No training pairs generated from the new rows. Check selected_attractions.")
+            return pairs, labels
+
+        pairs_train, labels_train = pairs_for(train_df)
+        pairs_val, labels_val = pairs_for(val_df)
+        numeric_cols = self.ATTRACTION_NUMERIC_COLS
+        medians = pairs_train[numeric_cols].median()
+        pairs_train[numeric_cols] = pairs_train[numeric_cols].fillna(medians)
+        pairs_val[numeric_cols] = pairs_val[numeric_cols].fillna(medians)
+        if len(np.unique(labels_val)) < 2:
+            # roc_auc_score is undefined on a single class
+            raise ValueError("Hold-out pairs are all one class: raise test_size or pass more rows with selected_attractions")
+        X_train, X_val = train_df[self.base_feature_cols], val_df[self.base_feature_cols]
+
+        before = {
+            **self._time_budget_eval(X_val, val_df["total_time_hours"].values, val_df["total_budget"].values),
+            **self._attraction_eval(pairs_val, labels_val),
+        }
+
+        self.time_model = self._continue_boosting(
+            self.time_model, X_train, train_df["total_time_hours"].values, boost_rounds
+        )
+        self.budget_model = self._continue_boosting(
+            self.budget_model, X_train, train_df["total_budget"].values, boost_rounds
+        )
+        self.attraction_model = self._continue_boosting(self.attraction_model, pairs_train, labels_train, boost_rounds)
+
+        # Fusion inputs come from the updated base model
+        X_fusion_train = self._fusion_features(pairs_train, self.attraction_model.predict_proba(pairs_train)[:, 1])
+        X_fusion_val = self._fusion_features(pairs_val, self.attraction_model.predict_proba(pairs_val)[:, 1])
+
+        self.fusion_model.compile(
+            optimizer=keras.optimizers.Adam(learning_rate=self.FINE_TUNE_LEARNING_RATE),
+            loss="binary_crossentropy",
+            metrics=["accuracy", keras.metrics.AUC(name="auc")],
+        )
+        self.fusion_model.fit(
+            X_fusion_train,
+            labels_train,
+            validation_data=(X_fusion_val, labels_val),
+            epochs=fine_tune_epochs,
+            batch_size=64,
+            callbacks=[keras.callbacks.EarlyStopping(monitor="val_loss", patience=3, restore_best_weights=True)],
+            verbose=1,
+        )
+
+        after = {
+            **self._time_budget_eval(X_val, val_df["total_time_hours"].values, val_df["total_budget"].values),
+            **self._attraction_eval(pairs_val, labels_val),
+        }
+
+        return {name: {"before": before[name], "after": after[name]} for name in before}
+
     # PREDICTION
 
     def predict_time_and_budget(self, user: Dict[str, Any]) -> Dict[str, float]:
@@ -478,11 +994,20 @@ class ItineraryModel:
         self,
         user: Dict[str, Any],
         attractions_df: pd.DataFrame,
+        geo_index: GeoIndex = None,
     ) -> pd.DataFrame:
 
+        if geo_index is None:
+            geo_index = GeoIndex.from_frame(attractions_df)
+
+        # NaN wherever the user or the attraction has no coordinates
+        distances = geo_index.distances(
+            user.get("start_latitude", np.nan), user.get("start_longitude", np.nan)
+        )
+
         rows = []
 
-        for _, att in attractions_df.iterrows():
+        for i, (_, att) in enumerate(attractions_df.iterrows()):
             base = {
                 "budget": user.get("budget", 100000.0),
                 "available_days": user.get("available_days", 3.0),
@@ -500,18 +1025,9 @@ class ItineraryModel:
                 "attraction_accessibility": att.get("accessibility", "medium"),
                 "attraction_tourist_density": att.get("tourist_density", 0.0),
                 "attraction_safety_rating": att.get("safety_rating", 3.0),
+                "distance_km": distances[i],
             }
 
-            start_lat = user.get("start_latitude", np.nan)
-            start_lon = user.get("start_longitude", np.nan)
-            lat = att.get("latitude", np.nan)
-            lon = att.get("longitude", np.nan)
-
-            if not np.isnan(start_lat) and not np.isnan(start_lon) and not np.isnan(lat) and not np.isnan(lon):
-                base["distance_km"] = haversine_distance(start_lat, start_lon, lat, lon)
-            else:
-                base["distance_km"] = np.nan
-
             rows.append(base)
 
         pairs_df = pd.DataFrame(rows)
@@ -568,15 +1084,39 @@ class ItineraryModel:
         joblib.dump(self.time_model, os.path.join(models_dir, "time_model.pkl"))
         joblib.dump(self.budget_model, os.path.join(models_dir, "budget_model.pkl"))
         joblib.dump(self.attraction_model, os.path.join(models_dir, "attraction_model.pkl"))
+        save_encoders(
+            {
+                name: CompiledEncoder.from_column_transformer(model.named_steps["preprocess"])
+                for name, model in (
+                    ("time_model", self.time_model),
+                    ("budget_model", self.budget_model),
+                    ("attraction_model", self.attraction_model),
+                )
+            },
+            models_dir,
+        )
         if self.fusion_model is not None:
-            self.fusion_model.save(os.path.join(models_dir, "fusion_model.h5"))
+            fusion_path = os.path.join(models_dir, "fusion_model.h5")
+            self.fusion_model.save(fusion_path)
+            export_fusion_weights(self.fusion_model, weights_path_for(fusion_path))
 
     def load(self, models_dir: str):
         self.time_model = joblib.load(os.path.join(models_dir, "time_model.pkl"))
         self.budget_model = joblib.load(os.path.join(models_dir, "budget_model.pkl"))
         self.attraction_model = joblib.load(os.path.join(models_dir, "attraction_model.pkl"))
+        self.encoders = load_encoders(models_dir)
         fusion_path = os.path.join(models_dir, "fusion_model.h5")
-        if os.path.exists(fusion_path):
-            self.fusion_model = keras.models.load_model(fusion_path)
+        if os.path.exists(fusion_path) or os.path.exists(weights_path_for(fusion_path)):
+            self.fusion_model = load_fusion_model(fusion_path)
         else:
             self.fusion_model = None
+
+    def compile_for_inference(self):
+        # Swaps each pipeline for its compiled encoder feeding the flattened
+        # XGBoost evaluator (parity-checked). Inference only: retrain or
+        # reload before saving.
+        encoders = self.encoders or {}
+        self.time_model = compile_tree_model(self.time_model, preprocess=encoders.get("time_model"))
+        self.budget_model = compile_tree_model(self.budget_model, preprocess=encoders.get("budget_model"))
+        self.attraction_model = compile_tree_model(self.attraction_model, preprocess=encoders.get("attraction_model"))
+        return self
@@ -5,7 +5,10 @@ from typing import Dict, Any
 import numpy as np
 import pandas as pd
 
-from itinerary_model import ItineraryModel, haversine_distance
+from itinerary_model import ItineraryModel
+from ml_common.dataset_cache import read_dataset
+from ml_common.geo import GeoIndex
+from ml_common.hotel_index import HotelIndex, top_k
 
 ROOT = os.path.join("..")
 DATA_DIR = os.path.join(ROOT, "datasets")
@@ -19,8 +22,8 @@ INPUT_JSON_PATH = os.path.join("sample_input_itinerary.json")
 
 
 def load_catalogs():
-    attractions = pd.read_csv(ATTRACTIONS_PATH)
-    hotels = pd.read_csv(HOTELS_PATH)
+    attractions = read_dataset(ATTRACTIONS_PATH)
+    hotels = read_dataset(HOTELS_PATH)
     return attractions, hotels
 
 
@@ -28,8 +31,11 @@ def score_hotels(
     user: Dict[str, Any],
     hotels_df: pd.DataFrame,
     selected_attractions: pd.DataFrame,
+    hotel_index: HotelIndex = None,
 ) -> pd.DataFrame:
-    df = hotels_df.copy()
+    """Top user["max_hotels"] hotels, best first (one vectorized pass over the hotel index)."""
+    if hotel_index is None:
+        hotel_index = HotelIndex.from_frame(hotels_df)
 
     days = user.get("available_days", 3)
     total_budget = user.get("budget", 150000.0)
@@ -42,44 +48,22 @@ def score_hotels(
         center_lat = user.get("start_latitude", np.nan)
         center_lon = user.get("start_longitude", np.nan)
 
-    scores = []
-    for _, h in df.iterrows():
-        rating = h.get("rating", 4.0)
-        nightly_rate = h.get("nightly_rate", h.get("price_per_night", 10000.0))
+    dist = hotel_index.distances(center_lat, center_lon, default_km=10.0)
+    nightly_rate = hotel_index.nightly_rate
 
-        lat = h.get("latitude", np.nan)
-        lon = h.get("longitude", np.nan)
+    score = np.select([nightly_rate <= nightly_max, nightly_rate <= nightly_max * 1.2], [0.5, 0.2], -0.2)
+    score += 0.15 * (hotel_index.rating - 3.0)
+    score += np.select([dist < 2, dist < 5, dist < 15], [0.4, 0.2, 0.0], -0.2)
 
-        if not np.isnan(center_lat) and not np.isnan(center_lon) and not np.isnan(lat) and not np.isnan(lon):
-            dist = haversine_distance(center_lat, center_lon, lat, lon)
-        else:
-            dist = 10.0
-
-        score = 0.0
-
-        if nightly_rate <= nightly_max:
-            score += 0.5
-        elif nightly_rate <= nightly_max * 1.2:
-            score += 0.2
-        else:
-            score -= 0.2
-
-        score += 0.15 * (rating - 3.0)
-
-        if dist < 2:
-            score += 0.4
-        elif dist < 5:
-            score += 0.2
-        elif dist < 15:
-            score += 0.0
-        else:
-            score -= 0.2
-
-        scores.append(score)
-
-    df["score"] = scores
-    df = df.sort_values(by="score", ascending=False)
-    return df
+    # Optional filters: all required amenities, any of the room types, price cap, [min, max] price range
+    candidates = hotel_index.candidates(
+        amenities=user.get("required_amenities"),
+        room_types=user.get("room_types"),
+        max_price=user.get("max_nightly_rate"),
+        price_range=user.get("price_range"),
+    )
+    rows = top_k(score, user.get("max_hotels", 5), candidates)
+    return hotels_df.iloc[rows].assign(score=score[rows])
 
 
 def apply_contextual_adjustments(
@@ -137,25 +121,20 @@ def main():
 
     model = ItineraryModel()
     model.load(MODELS_DIR)
+    model.compile_for_inference()
 
     attractions_df, hotels_df = load_catalogs()
+    attraction_index = GeoIndex.from_frame(attractions_df)
+    hotel_index = HotelIndex.from_frame(hotels_df)
 
     tb = model.predict_time_and_budget(user)
 
-    scored_attractions = model.score_attractions_for_user(user, attractions_df)
+    scored_attractions = model.score_attractions_for_user(user, attractions_df, geo_index=attraction_index)
 
     if "start_latitude" in user and "start_longitude" in user:
-        start_lat = user["start_latitude"]
-        start_lon = user["start_longitude"]
-        dists = []
-        for _, row in scored_attractions.iterrows():
-            lat = row.get("latitude", np.nan)
-            lon = row.get("longitude", np.nan)
-            if not np.isnan(start_lat) and not np.isnan(start_lon) and not np.isnan(lat) and not np.isnan(lon):
-                dists.append(haversine_distance(start_lat, start_lon, lat, lon))
-            else:
-                dists.append(np.nan)
-        scored_attractions["distance_km"] = dists
+        scored_attractions["distance_km"] = attraction_index.distances(
+            user["start_latitude"], user["start_longitude"]
+        )
 
     base_scores = scored_attractions["score"].values
     adjusted_scores = apply_contextual_adjustments(scored_attractions, base_scores, context)
@@ -194,8 +173,7 @@ def main():
 
     selected_attractions_df = pd.DataFrame(filtered_attractions)
 
-    hotel_candidates = score_hotels(user, hotels_df, selected_attractions_df)
-    top_hotels = hotel_candidates.head(user.get("max_hotels", 5))
+    top_hotels = score_hotels(user, hotels_df, selected_attractions_df, hotel_index=hotel_index)
 
     result = {
         "estimated_total_time_hours": tb["estimated_total_time_hours"],
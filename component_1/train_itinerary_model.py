@@ -1,15 +1,18 @@
+import argparse
 import os
-import pandas as pd
+import time
 import matplotlib.pyplot as plt
 from sklearn.metrics import roc_curve, auc
 
 from itinerary_model import ItineraryModel
+from ml_common.dataset_cache import read_dataset
 
 
 ROOT = os.path.join("..")
 DATA_DIR = os.path.join(ROOT, "datasets")
 MODELS_DIR = os.path.join(ROOT, "models", "component1")
 METRICS_DIR = os.path.join(MODELS_DIR, "metrics")
+VERSIONS_DIR = os.path.join(MODELS_DIR, "versions")
 
 ITINERARY_PATH = os.path.join(DATA_DIR, "itinerary_training_data_v2.csv")
 ATTRACTIONS_PATH = os.path.join(DATA_DIR, "tourist_attractions.csv")
@@ -128,24 +131,100 @@ def plot_fusion_training_curves(model: ItineraryModel):
     plt.close()
 
 
+def update_incrementally(new_rows_path: str, base_dir: str, test_size: float = 0.2):
+    """Warm-start the bundle in base_dir on new itinerary rows; writes VERSIONS_DIR/<UTC timestamp>."""
+    print("Loading new itinerary rows:", new_rows_path)
+    new_df = read_dataset(new_rows_path)
+    att_df = read_dataset(ATTRACTIONS_PATH)
+    print(f"  New itineraries: {len(new_df)}")
+
+    model = ItineraryModel()
+    model.load(base_dir)
+    model.load_fusion_for_training(base_dir)
+    print("Base bundle:", base_dir)
+
+    print("\nContinuing boosting and fine-tuning the fusion network on the new rows...")
+    metrics = model.update_from_new_rows(new_df, att_df, negative_per_positive=5, test_size=test_size)
+
+    version = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+    out_dir = os.path.join(VERSIONS_DIR, version)
+    model.save(out_dir)
+    print("Updated bundle saved to:", out_dir)
+
+    metrics_path = os.path.join(out_dir, "update_metrics.txt")
+    with open(metrics_path, "w") as f:
+        f.write("=" * 70 + "\n")
+        f.write("COMPONENT 1: INCREMENTAL UPDATE (WARM START)\n")
+        f.write("=" * 70 + "\n\n")
+        f.write(f"Version: {version}\n")
+        f.write(f"Base bundle: {base_dir}\n")
+        f.write(f"New itineraries: {len(new_df)} ({test_size:.0%} held out for the metrics below)\n")
+        f.write(f"Trees added per XGBoost model: {model.INCREMENTAL_BOOST_ROUNDS}\n")
+        f.write(f"Fusion fine-tune learning rate: {model.FINE_TUNE_LEARNING_RATE}\n\n")
+        f.write(f"{'':<41} {'before':>12} {'after':>12}\n")
+        f.write("-" * 70 + "\n")
+        for name, values in metrics.items():
+            f.write(f"{name:.<41} {values['before']:>12.4f} {values['after']:>12.4f}\n")
+    print("Metrics written to:", metrics_path)
+    with open(metrics_path) as f:
+        print("\n" + f.read())
+
+
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="generate attraction training pairs lazily from the itinerary CSV instead of in memory",
+    )
+    parser.add_argument("--chunksize", type=int, default=None, help="itineraries per CSV chunk in --stream mode")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="processes for the time & budget regressors (1 = sequential)"
+    )
+    parser.add_argument(
+        "--threads", type=int, default=None, help="threads per time / budget regressor (default: cores / 2)"
+    )
+    parser.add_argument(
+        "--incremental",
+        metavar="NEW_ROWS_CSV",
+        help="warm-start the --base bundle on these new itinerary rows instead of retraining from scratch",
+    )
+    parser.add_argument("--base", default=MODELS_DIR, help="bundle to start from in --incremental mode")
+    parser.add_argument(
+        "--test-size", type=float, default=0.2, help="share of the new rows held out for the --incremental metrics"
+    )
+    args = parser.parse_args()
+
+    if args.incremental:
+        update_incrementally(args.incremental, args.base, test_size=args.test_size)
+        return
+
     os.makedirs(MODELS_DIR, exist_ok=True)
     os.makedirs(METRICS_DIR, exist_ok=True)
 
+    model = ItineraryModel()
+
     print("Loading datasets...")
-    it_df = pd.read_csv(ITINERARY_PATH)
-    att_df = pd.read_csv(ATTRACTIONS_PATH)
+    if args.stream:
+        # Time & budget models only need the itinerary-level columns
+        it_df = read_dataset(ITINERARY_PATH, columns=model.base_feature_cols + ["total_time_hours", "total_budget"])
+    else:
+        it_df = read_dataset(ITINERARY_PATH)
+    att_df = read_dataset(ATTRACTIONS_PATH)
     print(f"  Itineraries: {len(it_df)}")
     print(f"  Attractions: {len(att_df)}")
 
-    model = ItineraryModel()
-
     print("\nTraining time & budget models...")
-    tb_metrics = model.train_time_budget_models(it_df)
+    tb_metrics = model.train_time_budget_models(it_df, workers=args.workers, threads=args.threads)
     print("Time/Budget metrics:", tb_metrics)
 
     print("\nTraining attraction ranking + fusion model with negative sampling...")
-    att_metrics = model.train_attraction_model(it_df, att_df, negative_per_positive=5)
+    if args.stream:
+        att_metrics = model.train_attraction_model_streaming(
+            ITINERARY_PATH, att_df, negative_per_positive=5, chunksize=args.chunksize
+        )
+    else:
+        att_metrics = model.train_attraction_model(it_df, att_df, negative_per_positive=5)
     print("Attraction metrics:", att_metrics)
 
     print("\nSaving models...")
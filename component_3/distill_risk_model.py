@@ -0,0 +1,158 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from risk_model import DEFAULT_CONDITIONS, RiskStackingModel, RiskStudentModel, add_time_features
+from ml_common.dataset_cache import read_dataset
+
+
+DATA_PATH = os.path.join("..", "datasets", "realtime_conditions_training.csv")
+MODELS_DIR = os.path.join("..", "flask", "models", "component3")
+MODEL_PREFIX = os.path.join(MODELS_DIR, "risk_model")
+METRICS_DIR = os.path.join("..", "models", "component3", "metrics")
+
+# Non-negative inputs (everything except temperature) are clipped at 0 after jitter
+NON_NEGATIVE = [col for col in DEFAULT_CONDITIONS if col != "temperature"]
+
+
+def transfer_set(df: pd.DataFrame, n_synthetic: int, random_state: int = 42) -> pd.DataFrame:
+    """Real rows plus synthetic ones for the teacher to label.
+
+    Teacher labels cost nothing, so the student also trains on synthetic
+    rows at random hours of the week: half drawn from each column's
+    empirical distribution (with a little jitter), half uniform over the
+    column's observed range, which covers the extreme combinations the 2k
+    real rows miss.
+    """
+    rng = np.random.RandomState(random_state)
+    synthetic = {}
+    uniform = rng.rand(n_synthetic) < 0.5
+    for col in DEFAULT_CONDITIONS:
+        values = df[col].to_numpy(dtype=float)
+        draws = rng.choice(values, size=n_synthetic) + rng.normal(0.0, 0.05 * (values.std() or 1.0), n_synthetic)
+        draws = np.where(uniform, rng.uniform(values.min(), values.max(), n_synthetic), draws)
+        synthetic[col] = np.maximum(draws, 0.0) if col in NON_NEGATIVE else draws
+    synthetic["hour_of_day"] = rng.randint(0, 24, n_synthetic)
+    synthetic["day_of_week"] = rng.randint(0, 7, n_synthetic)
+
+    real = df[list(DEFAULT_CONDITIONS) + ["hour_of_day", "day_of_week"]]
+    return pd.concat([real, pd.DataFrame(synthetic)], ignore_index=True)
+
+
+def raw_features(df: pd.DataFrame) -> np.ndarray:
+    return np.column_stack([
+        df[list(DEFAULT_CONDITIONS)].to_numpy(dtype=float),
+        df["hour_of_day"].to_numpy(dtype=float) / 23.0,
+        df["day_of_week"].to_numpy(dtype=float) / 6.0,
+    ])
+
+
+def teacher_outputs(teacher: RiskStackingModel, df: pd.DataFrame):
+    base = teacher.predict_base_risks(df)
+    return teacher.predict_from_base(base, df["hour_of_day"].to_numpy() / 23.0, df["day_of_week"].to_numpy() / 6.0)
+
+
+def artifact_bytes(paths):
+    return sum(os.path.getsize(p) for p in paths if os.path.exists(p))
+
+
+def latency_ms(fn, repeats: int):
+    fn()  # warm
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1e3)
+    return float(np.percentile(times, 50)), float(np.percentile(times, 99))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--prefix", default=MODEL_PREFIX, help="teacher artifacts prefix; the student is saved next to them")
+    parser.add_argument("--synthetic", type=int, default=60000)
+    parser.add_argument("--epochs", type=int, default=150)
+    args = parser.parse_args()
+
+    os.makedirs(METRICS_DIR, exist_ok=True)
+
+    print("Loading dataset:", DATA_PATH)
+    df = add_time_features(read_dataset(DATA_PATH))
+    train_df, val_df = train_test_split(df, test_size=0.2, random_state=42)
+
+    teacher = RiskStackingModel()
+    teacher.load_models(args.prefix)
+    teacher.compile_for_inference()
+
+    print(f"Labelling transfer set ({len(train_df)} real + {args.synthetic} synthetic rows) with the teacher...")
+    transfer = transfer_set(train_df, args.synthetic)
+    targets = teacher_outputs(teacher, transfer)
+
+    student = RiskStudentModel()
+    print("Training student model...")
+    student.train(raw_features(transfer), targets, teacher.label_encoder, epochs=args.epochs)
+    student.save_models(args.prefix)
+    print("Student saved to:", f"{args.prefix}_student.h5")
+
+    # Reload the exported NumPy weights: that's what the service runs
+    student = RiskStudentModel()
+    student.load_models(args.prefix)
+
+    X_val = raw_features(val_df)
+    t_risk, t_probs, t_sev = teacher_outputs(teacher, val_df)
+    s_risk, s_probs, s_sev = student.predict_arrays(X_val)
+    t_cat = teacher.label_encoder.inverse_transform(np.argmax(t_probs, axis=1))
+    s_cat = teacher.label_encoder.inverse_transform(np.argmax(s_probs, axis=1))
+
+    y_risk, y_cat, y_sev = val_df["risk_score"].to_numpy(), val_df["risk_category"].to_numpy(), val_df["severity_level"].to_numpy()
+    fidelity = {
+        "risk_score MAE vs teacher": np.mean(np.abs(s_risk - t_risk)),
+        "risk_score max abs err vs teacher": np.max(np.abs(s_risk - t_risk)),
+        "risk_category agreement with teacher": np.mean(s_cat == t_cat),
+        "severity MAE vs teacher": np.mean(np.abs(s_sev - t_sev)),
+    }
+    accuracy = [
+        ("risk_score MAE (labels)", np.mean(np.abs(t_risk - y_risk)), np.mean(np.abs(s_risk - y_risk))),
+        ("risk_category accuracy (labels)", np.mean(t_cat == y_cat), np.mean(s_cat == y_cat)),
+        ("severity MAE (labels)", np.mean(np.abs(t_sev - y_sev)), np.mean(np.abs(s_sev - y_sev))),
+    ]
+
+    teacher_files = [f"{args.prefix}_{part}.pkl" for part in ("weather", "traffic", "incident", "label_encoder")]
+    teacher_files.append(f"{args.prefix}_fusion.npz")
+    student_files = [f"{args.prefix}_student.npz", f"{args.prefix}_label_encoder.pkl"]
+    sizes = (artifact_bytes(teacher_files), artifact_bytes(student_files))
+
+    one, batch = val_df.iloc[:1], val_df.iloc[np.arange(1000) % len(val_df)]
+    X_one, X_batch = raw_features(one), raw_features(batch)
+    latency = [
+        ("1 row p50 / p99 (ms)", latency_ms(lambda: teacher_outputs(teacher, one), 300),
+         latency_ms(lambda: student.predict_arrays(X_one), 300)),
+        ("1000 rows p50 / p99 (ms)", latency_ms(lambda: teacher_outputs(teacher, batch), 30),
+         latency_ms(lambda: student.predict_arrays(X_batch), 30)),
+    ]
+
+    lines = ["=" * 70, "COMPONENT 3: DISTILLED RISK STUDENT vs STACKING TEACHER", "=" * 70, ""]
+    lines += [f"Validation rows: {len(val_df)} (held out from the transfer set)", ""]
+    lines += ["Fidelity to the teacher:", "-" * 70]
+    lines += [f"{name:.<45} {value:.4f}" for name, value in fidelity.items()]
+    lines += ["", f"{'':<45} {'teacher':>10} {'student':>10}", "-" * 70]
+    lines += [f"{name:.<45} {t:>10.4f} {s:>10.4f}" for name, t, s in accuracy]
+    lines += [f"{'artifacts (KB)':.<45} {sizes[0] / 1024:>10.1f} {sizes[1] / 1024:>10.1f}"]
+    lines += [f"{'model invocations per prediction':.<45} {4:>10} {1:>10}"]
+    lines += [
+        f"{name:.<45} {f'{t[0]:.3f}/{t[1]:.3f}':>10} {f'{s[0]:.3f}/{s[1]:.3f}':>10}" for name, t, s in latency
+    ]
+
+    report = "\n".join(lines)
+    print("\n" + report)
+    metrics_path = os.path.join(METRICS_DIR, "distillation_metrics.txt")
+    with open(metrics_path, "w") as f:
+        f.write(report + "\n")
+    print("\nMetrics written to:", metrics_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -47,12 +47,15 @@ def main():
 
     model = RiskStackingModel()
     model.load_models(MODEL_PREFIX)
+    model.compile_for_inference()
+
+    rows = [build_default_row(loc) for loc in locations]
+    preds = model.predict_frame(pd.DataFrame(rows))
+    classes = list(model.label_encoder.classes_)
 
     results = []
 
-    for loc in locations:
-        row = build_default_row(loc)
-        pred = model.predict_for_row(row)
+    for loc, row, (_, pred) in zip(locations, rows, preds.iterrows()):
 
         risk_factors = []
 
@@ -77,12 +80,12 @@ def main():
             "name": loc.get("name", "Unknown"),
             "latitude": loc.get("latitude"),
             "longitude": loc.get("longitude"),
-            "risk_score": pred["risk_score"],
+            "risk_score": float(pred["risk_score"]),
             "risk_category": pred["risk_category"],
-            "severity_level": pred["severity_level"],
+            "severity_level": float(pred["severity_level"]),
             "risk_factors": risk_factors,
             "recommendations": recommendations,
-            "category_probabilities": pred["category_probabilities"],
+            "category_probabilities": {cls: float(pred[f"prob_{cls}"]) for cls in classes},
         }
 
         results.append(result_item)
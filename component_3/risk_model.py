@@ -1,3 +1,5 @@
+import os
+import sys
 import numpy as np
 import pandas as pd
 import joblib
@@ -10,9 +12,32 @@ from sklearn.metrics import mean_absolute_error, r2_score
 from sklearn.preprocessing import LabelEncoder
 
 import xgboost as xgb
-from tensorflow import keras
-from tensorflow.keras import layers
-from tensorflow.keras.utils import to_categorical
+
+# The only path setup for the train / distill / predict scripts next to it:
+# they import this module before anything from ml_common.
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from ml_common.fusion_numpy import export_fusion_weights, load_fusion_model, weights_path_for
+from ml_common.parallel_fit import fit_estimators
+from ml_common.tree_ensemble import compile_tree_model
+from ml_common.time_features import stack_time_features
+
+# Fallback per condition column when a location doesn't report it (same
+# defaults as the request parsers in predict_risk.py and the Flask blueprint)
+DEFAULT_CONDITIONS = {
+    "temperature": 28.0,
+    "rainfall_mm": 0.0,
+    "wind_speed": 5.0,
+    "humidity": 75.0,
+    "visibility_km": 10.0,
+    "traffic_congestion_level": 3.0,
+    "average_speed": 40.0,
+    "traffic_volume": 100.0,
+    "num_recent_accidents": 0.0,
+    "num_recent_incidents": 0.0,
+}
 
 
 def add_time_features(df: pd.DataFrame) -> pd.DataFrame:
@@ -56,6 +81,9 @@ class RiskStackingModel:
             ]
 
     def _build_fusion_model(self, input_dim: int, num_classes: int):
+        from tensorflow import keras
+        from tensorflow.keras import layers
+
         inputs = layers.Input(shape=(input_dim,), name="stack_features")
 
         x = layers.Dense(16, activation="relu")(inputs)
@@ -93,7 +121,43 @@ class RiskStackingModel:
 
         self.fusion_model = model
 
-    def train(self, df: pd.DataFrame, test_size: float = 0.2, random_state: int = 42):
+    def base_learners(self, random_state: int = 42) -> Dict[str, Any]:
+        """Unfitted weather / traffic / incident base learners."""
+        return {
+            "weather": xgb.XGBRegressor(
+                n_estimators=200,
+                max_depth=5,
+                learning_rate=0.05,
+                subsample=0.8,
+                colsample_bytree=0.8,
+                objective="reg:squarederror",
+                random_state=random_state,
+            ),
+            "traffic": RandomForestRegressor(
+                n_estimators=200,
+                max_depth=6,
+                random_state=random_state,
+                n_jobs=-1,
+            ),
+            "incident": xgb.XGBRegressor(
+                n_estimators=150,
+                max_depth=4,
+                learning_rate=0.05,
+                subsample=0.8,
+                colsample_bytree=0.8,
+                objective="reg:squarederror",
+                random_state=random_state,
+            ),
+        }
+
+    def train(
+        self,
+        df: pd.DataFrame,
+        test_size: float = 0.2,
+        random_state: int = 42,
+        workers: int = None,
+        threads: int = None,
+    ):
         df = add_time_features(df)
 
         feature_cols_base = (
@@ -133,36 +197,21 @@ class RiskStackingModel:
             Xt_val = df_val[self.feature_cols_traffic]
             Xi_val = df_val[self.feature_cols_incident]
 
-        self.weather_model = xgb.XGBRegressor(
-            n_estimators=200,
-            max_depth=5,
-            learning_rate=0.05,
-            subsample=0.8,
-            colsample_bytree=0.8,
-            objective="reg:squarederror",
-            random_state=random_state,
-        )
-
-        self.traffic_model = RandomForestRegressor(
-            n_estimators=200,
-            max_depth=6,
-            random_state=random_state,
-            n_jobs=-1,
-        )
+        learners = self.base_learners(random_state)
 
-        self.incident_model = xgb.XGBRegressor(
-            n_estimators=150,
-            max_depth=4,
-            learning_rate=0.05,
-            subsample=0.8,
-            colsample_bytree=0.8,
-            objective="reg:squarederror",
-            random_state=random_state,
+        # Independent given the split: fitted side by side (see ml_common.parallel_fit)
+        fitted = fit_estimators(
+            {
+                "weather": (learners["weather"], Xw_train, y_risk_train),
+                "traffic": (learners["traffic"], Xt_train, y_risk_train),
+                "incident": (learners["incident"], Xi_train, y_risk_train),
+            },
+            workers=workers,
+            threads=threads,
         )
-
-        self.weather_model.fit(Xw_train, y_risk_train)
-        self.traffic_model.fit(Xt_train, y_risk_train)
-        self.incident_model.fit(Xi_train, y_risk_train)
+        self.weather_model = fitted["weather"]
+        self.traffic_model = fitted["traffic"]
+        self.incident_model = fitted["incident"]
 
         weather_risk_train = self.weather_model.predict(Xw_train)
         traffic_risk_train = self.traffic_model.predict(Xt_train)
@@ -200,6 +249,8 @@ class RiskStackingModel:
         num_classes = len(self.label_encoder.classes_)
         self._build_fusion_model(input_dim=X_stack_train.shape[1], num_classes=num_classes)
 
+        from tensorflow import keras
+
         callbacks_list = [
             keras.callbacks.EarlyStopping(
                 monitor="val_loss", patience=10, restore_best_weights=True
@@ -283,6 +334,75 @@ class RiskStackingModel:
             },
         }
 
+    def _frame_features(self, df: pd.DataFrame, cols: List[str]) -> np.ndarray:
+        # Missing columns default to 0.0, like row.get(col, 0.0)
+        return np.column_stack([
+            df[col].to_numpy(dtype=float) if col in df.columns else np.zeros(len(df))
+            for col in cols
+        ])
+
+    def predict_base_risks(self, df: pd.DataFrame) -> np.ndarray:
+        """(n, 3) weather / traffic / incident risks: one call per base learner.
+
+        Each learner only sees the distinct rows of its own inputs, so e.g. an
+        hourly series with unchanged conditions costs one evaluation.
+        """
+        def predict_unique(model, cols):
+            X = self._frame_features(df, cols)
+            unique, inverse = np.unique(X, axis=0, return_inverse=True)
+            if len(unique) == len(X):
+                return np.asarray(model.predict(X), dtype=float)
+            return np.asarray(model.predict(unique), dtype=float)[inverse.ravel()]
+
+        return np.column_stack([
+            predict_unique(self.weather_model, self.feature_cols_weather),
+            predict_unique(self.traffic_model, self.feature_cols_traffic),
+            predict_unique(self.incident_model, self.feature_cols_incident),
+        ])
+
+    def predict_from_base(self, base: np.ndarray, hour_norm, day_norm):
+        """Fusion outputs (risk_score, category probabilities, severity) for precomputed base risks.
+
+        hour_norm / day_norm broadcast against the rows of base, so one set of
+        base risks can be fused for many time buckets without rerunning the
+        base learners.
+        """
+        hour_norm = np.broadcast_to(np.asarray(hour_norm, dtype=float), (len(base),))
+        day_norm = np.broadcast_to(np.asarray(day_norm, dtype=float), (len(base),))
+        X_stack = np.column_stack([base, hour_norm, day_norm])
+        risk_score, cat_probs, severity = self.fusion_model.predict(X_stack, verbose=0)
+        return np.asarray(risk_score).ravel(), np.asarray(cat_probs), np.asarray(severity).ravel()
+
+    def predict_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Score every row at once: one call per base learner and one fusion call.
+
+        Returns one row per input row with risk_score, risk_category,
+        severity_level, the three base-learner risks and a prob_<class>
+        column per risk category.
+        """
+        base = self.predict_base_risks(df)
+        weather_risk, traffic_risk, incident_risk = base.T
+
+        timestamps = df["timestamp"] if "timestamp" in df.columns else [None] * len(df)
+        hour, day = stack_time_features(timestamps)
+
+        risk_score, cat_probs, severity = self.predict_from_base(base, hour, day)
+
+        out = pd.DataFrame(
+            {
+                "risk_score": risk_score.astype(float),
+                "risk_category": self.label_encoder.inverse_transform(np.argmax(cat_probs, axis=1)),
+                "severity_level": severity.astype(float),
+                "weather_risk": weather_risk,
+                "traffic_risk": traffic_risk,
+                "incident_risk": incident_risk,
+            },
+            index=df.index,
+        )
+        for i, cls in enumerate(self.label_encoder.classes_):
+            out[f"prob_{cls}"] = np.asarray(cat_probs[:, i], dtype=float)
+        return out
+
     def save_models(self, path_prefix: str):
         if self.weather_model is None or self.fusion_model is None:
             raise ValueError("Models are not trained yet.")
@@ -293,6 +413,7 @@ class RiskStackingModel:
         joblib.dump(self.label_encoder, f"{path_prefix}_label_encoder.pkl")
 
         self.fusion_model.save(f"{path_prefix}_fusion.h5")
+        export_fusion_weights(self.fusion_model, weights_path_for(f"{path_prefix}_fusion.h5"))
 
     def load_models(self, path_prefix: str):
         self.weather_model = joblib.load(f"{path_prefix}_weather.pkl")
@@ -300,5 +421,142 @@ class RiskStackingModel:
         self.incident_model = joblib.load(f"{path_prefix}_incident.pkl")
         self.label_encoder = joblib.load(f"{path_prefix}_label_encoder.pkl")
 
-        self._build_fusion_model(input_dim=5, num_classes=len(self.label_encoder.classes_))
-        self.fusion_model = keras.models.load_model(f"{path_prefix}_fusion.h5")
+        self.fusion_model = load_fusion_model(f"{path_prefix}_fusion.h5")
+
+    def compile_for_inference(self):
+        # Swaps the base learners for flattened array evaluators (parity-checked).
+        # Inference only: retrain or reload before saving.
+        self.weather_model = compile_tree_model(self.weather_model)
+        self.traffic_model = compile_tree_model(self.traffic_model)
+        self.incident_model = compile_tree_model(self.incident_model)
+        return self
+
+
+@dataclass
+class RiskStudentModel:
+    """One compact net distilled from RiskStackingModel (see distill_risk_model.py).
+
+    Reads the 10 raw condition columns plus (hour / 23, day / 6) and has the
+    same three heads as the fusion net. Input standardization is folded into
+    the first layer's weights, so the exported NumPy weights take raw inputs.
+    """
+    model: Any = None
+    label_encoder: Any = None
+    feature_cols: List[str] = None
+
+    def __post_init__(self):
+        if self.feature_cols is None:
+            self.feature_cols = list(DEFAULT_CONDITIONS)
+
+    def _build_model(self, input_dim: int, num_classes: int, hidden: Tuple[int, ...] = (32, 16)):
+        from tensorflow import keras
+        from tensorflow.keras import layers
+
+        inputs = layers.Input(shape=(input_dim,), name="raw_features")
+        x = inputs
+        for units in hidden:
+            x = layers.Dense(units, activation="relu")(x)
+
+        risk_score = layers.Dense(1, activation="sigmoid", name="risk_score")(x)
+        risk_category = layers.Dense(num_classes, activation="softmax", name="risk_category")(x)
+        severity_level = layers.Dense(1, activation="relu", name="severity_level")(x)
+
+        model = keras.Model(
+            inputs=inputs,
+            outputs=[risk_score, risk_category, severity_level],
+            name="risk_student_model",
+        )
+        model.compile(
+            optimizer=keras.optimizers.Adam(learning_rate=0.003),
+            loss={
+                "risk_score": "mse",
+                # Soft targets: the teacher's full category distribution
+                "risk_category": "categorical_crossentropy",
+                "severity_level": "mse",
+            },
+            loss_weights={
+                "risk_score": 10.0,
+                "risk_category": 1.0,
+                "severity_level": 0.5,
+            },
+        )
+        self.model = model
+
+    def train(self, X: np.ndarray, teacher_outputs, label_encoder, epochs: int = 150, batch_size: int = 256,
+              validation_split: float = 0.1, random_state: int = 42):
+        """Fit on raw features X (n, 12) against the teacher's (risk_score, category probs, severity)."""
+        from tensorflow import keras
+        import tensorflow as tf
+
+        tf.random.set_seed(random_state)
+        self.label_encoder = label_encoder
+        risk, probs, severity = teacher_outputs
+
+        mean = X.mean(axis=0)
+        scale = np.where(X.std(axis=0) > 0, X.std(axis=0), 1.0)
+        self._build_model(input_dim=X.shape[1], num_classes=probs.shape[1])
+
+        history = self.model.fit(
+            (X - mean) / scale,
+            {"risk_score": risk, "risk_category": probs, "severity_level": severity},
+            validation_split=validation_split,
+            epochs=epochs,
+            batch_size=batch_size,
+            callbacks=[keras.callbacks.EarlyStopping(monitor="val_loss", patience=15, restore_best_weights=True)],
+            verbose=2,
+        )
+
+        # Fold (x - mean) / scale into the first Dense layer: W' = W / scale, b' = b - (mean / scale) @ W
+        first = next(layer for layer in self.model.layers if type(layer).__name__ == "Dense")
+        kernel, bias = first.get_weights()
+        first.set_weights([kernel / scale[:, None], bias - (mean / scale) @ kernel])
+        return history
+
+    def features(self, df: pd.DataFrame, hour_norm=None, day_norm=None) -> np.ndarray:
+        """(n, 12) raw student inputs; time from df['timestamp'] unless hour_norm / day_norm are given."""
+        if hour_norm is None or day_norm is None:
+            timestamps = df["timestamp"] if "timestamp" in df.columns else [None] * len(df)
+            hour_norm, day_norm = stack_time_features(timestamps)
+        conditions = np.column_stack([
+            df[col].to_numpy(dtype=float) if col in df.columns else np.full(len(df), DEFAULT_CONDITIONS[col])
+            for col in self.feature_cols
+        ])
+        return np.column_stack([
+            conditions,
+            np.broadcast_to(np.asarray(hour_norm, dtype=float), (len(df),)),
+            np.broadcast_to(np.asarray(day_norm, dtype=float), (len(df),)),
+        ])
+
+    def predict_arrays(self, X: np.ndarray):
+        """(risk_score, category probabilities, severity) for raw feature rows."""
+        risk_score, cat_probs, severity = self.model.predict(X, verbose=0)
+        return np.asarray(risk_score).ravel(), np.asarray(cat_probs), np.asarray(severity).ravel()
+
+    def predict_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Same columns as RiskStackingModel.predict_frame, minus the base-learner risks."""
+        risk_score, cat_probs, severity = self.predict_arrays(self.features(df))
+        out = pd.DataFrame(
+            {
+                "risk_score": risk_score.astype(float),
+                "risk_category": self.label_encoder.inverse_transform(np.argmax(cat_probs, axis=1)),
+                "severity_level": severity.astype(float),
+            },
+            index=df.index,
+        )
+        for i, cls in enumerate(self.label_encoder.classes_):
+            out[f"prob_{cls}"] = np.asarray(cat_probs[:, i], dtype=float)
+        return out
+
+    def save_models(self, path_prefix: str):
+        if self.model is None:
+            raise ValueError("Student model is not trained yet.")
+        self.model.save(f"{path_prefix}_student.h5")
+        export_fusion_weights(self.model, weights_path_for(f"{path_prefix}_student.h5"))
+
+    def load_models(self, path_prefix: str):
+        self.label_encoder = joblib.load(f"{path_prefix}_label_encoder.pkl")
+        self.model = load_fusion_model(f"{path_prefix}_student.h5")
+
+    @staticmethod
+    def exists(path_prefix: str) -> bool:
+        return os.path.exists(weights_path_for(f"{path_prefix}_student.h5"))
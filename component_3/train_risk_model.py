@@ -1,34 +1,51 @@
+import argparse
 import os
-import pandas as pd
 import matplotlib.pyplot as plt
 
 from risk_model import RiskStackingModel, add_time_features
+from ml_common.dataset_cache import read_dataset
+from ml_common.risk_prior import RiskPrior
 
 
 DATA_PATH = os.path.join("..", "datasets", "realtime_conditions_training.csv")
+EVENTS_PATH = os.path.join("..", "datasets", "risk_events_historical.csv")
 MODELS_DIR = os.path.join("..", "models", "component3")
 METRICS_DIR = os.path.join(MODELS_DIR, "metrics")
 MODEL_PREFIX = os.path.join(MODELS_DIR, "risk_model")
+PRIOR_PREFIX = os.path.join(MODELS_DIR, "risk_prior")
 
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=None, help="processes for the base learners (1 = sequential)")
+    parser.add_argument(
+        "--threads", type=int, default=None, help="threads per base learner (default: cores / base learners)"
+    )
+    args = parser.parse_args()
+
     os.makedirs(MODELS_DIR, exist_ok=True)
     os.makedirs(METRICS_DIR, exist_ok=True)
 
     print("Loading dataset:", DATA_PATH)
-    df = pd.read_csv(DATA_PATH)
+    df = read_dataset(DATA_PATH)
     print(f"Total records: {len(df)}")
 
     df = add_time_features(df)
 
     model = RiskStackingModel()
     print("Training stacking ensemble model...")
-    history, base_metrics = model.train(df)
+    history, base_metrics = model.train(df, workers=args.workers, threads=args.threads)
 
     print("\nSaving models...")
     model.save_models(MODEL_PREFIX)
     print("Models saved to:", MODEL_PREFIX)
 
+    if os.path.exists(EVENTS_PATH):
+        print("Building hour-of-week historical prior cube...")
+        prior = RiskPrior.build(read_dataset(EVENTS_PATH), df)
+        prior.save(PRIOR_PREFIX)
+        print(f"Prior cube {prior.meta['shape']} saved to:", PRIOR_PREFIX)
+
     metrics_path = os.path.join(METRICS_DIR, "training_metrics.txt")
     print("Writing metrics to:", metrics_path)
 
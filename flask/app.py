@@ -1,10 +1,25 @@
-from flask import Flask
+import os
+import sys
+
+# The blueprints import the shared ml_common package from the repo root and
+# the risk model classes from component_3; this is the server's only path setup.
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT_DIR, os.path.join(ROOT_DIR, "component_3")):
+    if path not in sys.path:
+        sys.path.append(path)
+
+from flask import Flask, Response, jsonify
 from inference.component1 import component1_bp
 from inference.component3 import component3_bp
+from inference.model_manager import MODELS
+from ml_common.metrics import CONTENT_TYPE, REGISTRY
 
 def create_app():
     app = Flask(__name__)
 
+    # Models load and warm up on background threads; /ready flips once they're done
+    MODELS.start()
+
     # Register Blueprints
     app.register_blueprint(component1_bp, url_prefix="/api/itinerary")
     app.register_blueprint(component3_bp, url_prefix="/api/risk")
@@ -13,6 +28,20 @@ def create_app():
     def index():
         return {"message": "CeylonMate ML Backend is running"}
 
+    @app.route("/health")
+    def health():
+        # Liveness: the process is up, whatever state the models are in
+        return {"status": "ok", "components": MODELS.status()}
+
+    @app.route("/ready")
+    def ready():
+        body = {"ready": MODELS.ready, "components": MODELS.status()}
+        return jsonify(body), 200 if MODELS.ready else 503
+
+    @app.route("/metrics")
+    def metrics():
+        return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
     return app
 
 
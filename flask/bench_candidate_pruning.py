@@ -0,0 +1,82 @@
+import sys
+import time
+
+import numpy as np
+
+from inference import component1 as c1
+from ml_common.dataset_cache import read_dataset
+
+
+# Full scan vs radius-pruned candidates on real user preferences.
+# Run from flask/: python bench_candidate_pruning.py [n_users] [radius_multiplier ...]
+
+DATA_PATH = "../datasets/itinerary_training_data_v2.csv"
+USER_COLUMNS = [
+    "budget", "available_days", "distance_preference", "num_travelers",
+    "activity_type", "season", "start_latitude", "start_longitude",
+]
+TOP_K = 10
+
+
+def load_users(n_users):
+    df = read_dataset(DATA_PATH, columns=USER_COLUMNS).drop_duplicates().head(n_users)
+    return df.to_dict(orient="records")
+
+
+def timed(users):
+    latencies, results = [], []
+    for user in users:
+        start = time.perf_counter()
+        results.append(c1.recommend_for_users([user])[0])
+        latencies.append((time.perf_counter() - start) * 1e3)
+    return np.array(latencies), results
+
+
+def top_k_rows(user, k):
+    idx = c1.candidate_indices(user)
+    feat = c1.build_candidate_columns(user, idx)
+    base_prob = c1.xgb_model.predict_proba(feat)[:, 1]
+    scores = c1.fusion_model.predict(c1.build_fusion_features(feat, base_prob), verbose=0).ravel()
+    return set(idx[np.argsort(-scores, kind="stable")[:k]])
+
+
+def overlap(a, b):
+    return len(a & b) / max(len(a), 1)
+
+
+def main():
+    n_users = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    multipliers = [float(m) for m in sys.argv[2:]] or [1.0, c1.PRUNE_RADIUS_MULTIPLIER, 3.0]
+
+    c1.load_models()
+    users = load_users(n_users)
+    n = len(c1.attractions_df)
+    print(f"{len(users)} users, {n} attractions, top-k={TOP_K}")
+
+    full_ms, full_results = timed(users)
+    full_top = [top_k_rows(u, TOP_K) for u in users]
+    print(f"full scan        p50={np.percentile(full_ms, 50):6.2f} ms  p99={np.percentile(full_ms, 99):6.2f} ms")
+
+    for mult in multipliers:
+        pruned_users = [dict(u, prune_candidates=True, prune_radius_multiplier=mult) for u in users]
+        sizes = [len(c1.candidate_indices(u)) for u in pruned_users]
+
+        pruned_ms, pruned_results = timed(pruned_users)
+        top_overlap = [overlap(full_top[i], top_k_rows(u, TOP_K)) for i, u in enumerate(pruned_users)]
+        selected_overlap = [
+            overlap(
+                {a["name"] for a in full["selected_attractions"]},
+                {a["name"] for a in pruned["selected_attractions"]},
+            )
+            for full, pruned in zip(full_results, pruned_results)
+        ]
+
+        print(
+            f"radius x{mult:<4}  p50={np.percentile(pruned_ms, 50):6.2f} ms  p99={np.percentile(pruned_ms, 99):6.2f} ms  "
+            f"candidates={np.mean(sizes):5.1f}/{n}  top-{TOP_K} overlap={np.mean(top_overlap):.3f}  "
+            f"selection overlap={np.mean(selected_overlap):.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
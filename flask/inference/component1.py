@@ -2,44 +2,88 @@ import os
 import numpy as np
 import pandas as pd
 import joblib
-import tensorflow as tf
 from flask import Blueprint, request, jsonify
 
+from ml_common.fusion_numpy import load_fusion_model
+from ml_common.tree_ensemble import compile_tree_model
+from ml_common.compiled_encoder import load_encoders
+from ml_common.dataset_cache import read_dataset
+from ml_common.geo import GeoIndex
+from ml_common.hotel_index import HotelIndex, top_k
+from ml_common.metrics import stage_timer
+from inference.model_manager import MODELS
+from inference import component3 as risk_service
+
 component1_bp = Blueprint("component1", __name__)
 
 # Paths
 
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))  # /flask
 MODEL_DIR = os.path.join(BASE_DIR, "models", "component1")
-
 ATTRACTIONS_PATH = os.path.join(MODEL_DIR, "tourist_attractions.csv")
 HOTELS_PATH = os.path.join(MODEL_DIR, "hotels.csv")
 
-# Load models and catalogs
+# Models and catalogs — filled in by load_models() on the model manager's
+# background thread; routes answer 503 until it (and the warm-up) finish.
 
-time_model = joblib.load(os.path.join(MODEL_DIR, "time_model.pkl"))
-budget_model = joblib.load(os.path.join(MODEL_DIR, "budget_model.pkl"))
-xgb_model = joblib.load(os.path.join(MODEL_DIR, "attraction_model.pkl"))
-fusion_model = tf.keras.models.load_model(os.path.join(MODEL_DIR, "fusion_model.h5"))
+COMPONENT = "itinerary"
 
-attractions_df = pd.read_csv(ATTRACTIONS_PATH)
-hotels_df = pd.read_csv(HOTELS_PATH)
+encoders = {}
+time_model = budget_model = xgb_model = fusion_model = None
+attractions_df = hotels_df = None
+attraction_index = hotel_index = None
+attraction_features = None
+popular_idx = None
 
 
-# Helper: Hotel Scoring (same as local inference)
+def load_pipeline(name):
+    pipeline = joblib.load(os.path.join(MODEL_DIR, f"{name}.pkl"))
+    return compile_tree_model(pipeline, preprocess=encoders.get(name))
 
-def haversine_distance(lat1, lon1, lat2, lon2):
-    R = 6371.0
-    lat1, lon1, lat2, lon2 = map(np.radians, [lat1, lon1, lat2, lon2])
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
-    return R * (2 * np.arcsin(np.sqrt(a)))
 
+def load_models():
+    global encoders, time_model, budget_model, xgb_model, fusion_model
+    global attractions_df, hotels_df, attraction_index, hotel_index, attraction_features, popular_idx
+
+    # Pipelines run as compiled encoder -> flattened XGBoost evaluator (parity-checked on load)
+    encoders = load_encoders(MODEL_DIR)
+    time_model = load_pipeline("time_model")
+    budget_model = load_pipeline("budget_model")
+    xgb_model = load_pipeline("attraction_model")
+    fusion_model = load_fusion_model(os.path.join(MODEL_DIR, "fusion_model.h5"))
+
+    attractions_df = read_dataset(ATTRACTIONS_PATH)
+    hotels_df = read_dataset(HOTELS_PATH)
+
+    # Spatial indexes, built once per catalog load
+    attraction_index = GeoIndex.from_frame(attractions_df)
+    hotel_index = HotelIndex.from_frame(hotels_df)
+
+    attraction_features = build_attraction_features(attractions_df)
+    popular_idx = np.argsort(-attraction_features["attraction_popularity_score"], kind="stable")[:PRUNE_FALLBACK_SIZE]
 
-def score_hotels(user, selected_attractions):
-    df = hotels_df.copy()
 
+WARMUP_USER = {
+    "budget": 150000,
+    "available_days": 3,
+    "distance_preference": 80,
+    "num_travelers": 2,
+    "activity_type": "beach",
+    "season": 2,
+    "start_latitude": 6.9271,
+    "start_longitude": 79.8612,
+}
+
+
+def warm_up():
+    # One synthetic request through every stage (encoders, trees, fusion, selection, hotels)
+    recommend_for_users([WARMUP_USER, dict(WARMUP_USER, prune_candidates=True)])
+
+
+# Helper: Hotel Scoring (same as local inference)
+
+def score_hotels(user, selected_attractions):
+    """Top hotels for the itinerary (one vectorized pass over the hotel index)."""
     days = user.get("available_days", 3)
     total_budget = user.get("budget", 150000.0)
     nightly_max = total_budget / max(days, 1)
@@ -51,108 +95,151 @@ def score_hotels(user, selected_attractions):
         center_lat = user.get("start_latitude", np.nan)
         center_lon = user.get("start_longitude", np.nan)
 
-    scores = []
-    for _, h in df.iterrows():
-        rating = h.get("rating", 4.0)
-        rate = h.get("nightly_rate", h.get("price_per_night", 10000.0))
+    dist = hotel_index.distances(center_lat, center_lon, default_km=10.0)
 
-        lat = h.get("latitude", np.nan)
-        lon = h.get("longitude", np.nan)
+    score = 0.15 * (hotel_index.rating - 3.0)
+    score += np.where(hotel_index.nightly_rate <= nightly_max, 0.5, -0.2)
+    score += np.select([dist < 2, dist < 5], [0.4, 0.2], -0.2)
 
-        if not np.isnan(center_lat) and not np.isnan(lat):
-            dist = haversine_distance(center_lat, center_lon, lat, lon)
-        else:
-            dist = 10.0
-
-        score = 0.15 * (rating - 3.0)
-        score += 0.5 if rate <= nightly_max else -0.2
-        score += 0.4 if dist < 2 else (0.2 if dist < 5 else -0.2)
-
-        scores.append(score)
-
-    df["score"] = scores
-    return df.sort_values(by="score", ascending=False)
+    # Optional filters: all required amenities, any of the room types, price cap, [min, max] price range
+    candidates = hotel_index.candidates(
+        amenities=user.get("required_amenities"),
+        room_types=user.get("room_types"),
+        max_price=user.get("max_nightly_rate"),
+        price_range=user.get("price_range"),
+    )
+    rows = top_k(score, user.get("max_hotels", 5), candidates)
+    return hotels_df.iloc[rows].assign(score=score[rows])
 
 
 # ROUTE: Predict time + budget
 
 @component1_bp.route("/predict_time_budget", methods=["POST"])
+@MODELS.requires(COMPONENT)
 def predict_time_budget():
     user = request.json or {}
 
-    X = pd.DataFrame([user])
-    time_pred = float(time_model.predict(X)[0])
-    budget_pred = float(budget_model.predict(X)[0])
+    with stage_timer(COMPONENT, "time_budget_predict"):
+        time_pred = float(time_model.predict([user])[0])
+        budget_pred = float(budget_model.predict([user])[0])
 
-    return jsonify({
-        "estimated_total_time_hours": time_pred,
-        "estimated_total_budget": budget_pred
-    })
+    with stage_timer(COMPONENT, "serialize"):
+        return jsonify({
+            "estimated_total_time_hours": time_pred,
+            "estimated_total_budget": budget_pred
+        })
 
 
-# ROUTE: Full Recommendation (Attractions + Hotels)
+# Attraction feature block (built once at startup)
 
-@component1_bp.route("/recommend", methods=["POST"])
-def recommend_itinerary():
-    user = request.json or {}
+ATTRACTION_CATEGORICAL_FEATURES = [
+    ("attraction_category", "category", "general"),
+    ("attraction_best_season", "best_season", "any"),
+    ("attraction_accessibility", "accessibility", "medium"),
+]
 
-    #  Predict total time & budget
-    X = pd.DataFrame([user])
-    total_time = float(time_model.predict(X)[0])
-    total_budget = float(budget_model.predict(X)[0])
+ATTRACTION_NUMERIC_FEATURES = [
+    ("attraction_avg_cost", "avg_cost", 0.0),
+    ("attraction_avg_duration", "avg_duration_hours", 2.0),
+    ("attraction_popularity_score", "popularity_score", 3.0),
+    ("attraction_tourist_density", "tourist_density", 3.0),
+    ("attraction_safety_rating", "safety_rating", 3.0),
+]
 
-    #  Score attractions using both models (base + fusion)
-    rows = []
-    for _, att in attractions_df.iterrows():
-        row = {
-            "budget": user["budget"],
-            "available_days": user["available_days"],
-            "num_travelers": user["num_travelers"],
-            "distance_preference": user["distance_preference"],
-            "activity_type": user.get("activity_type", "general"),
-            "season": user.get("season", "any"),
-
-            "attraction_category": att.get("category", "general"),
-            "attraction_best_season": att.get("best_season", "any"),
-            "attraction_accessibility": att.get("accessibility", "medium"),
-            "attraction_outdoor": 1.0 if bool(att.get("outdoor", True)) else 0.0,
-
-            "attraction_avg_cost": att.get("avg_cost", 0.0),
-            "attraction_avg_duration": att.get("avg_duration_hours", 2.0),
-            "attraction_popularity_score": att.get("popularity_score", 3.0),
-            "attraction_tourist_density": att.get("tourist_density", 3.0),
-            "attraction_safety_rating": att.get("safety_rating", 3.0),
-        }
-
-        # distance_km feature (if possible)
-        start_lat = user.get("start_latitude", np.nan)
-        start_lon = user.get("start_longitude", np.nan)
-        lat = att.get("latitude", np.nan)
-        lon = att.get("longitude", np.nan)
-
-        if not np.isnan(start_lat) and not np.isnan(lat):
-            row["distance_km"] = haversine_distance(start_lat, start_lon, lat, lon)
-        else:
-            row["distance_km"] = np.nan
-
-        rows.append(row)
-
-    feat_df = pd.DataFrame(rows)
 
-    # Fill any NaN distance so XGBoost works
-    feat_df["distance_km"] = feat_df["distance_km"].fillna(feat_df["distance_km"].median())
+def _catalog_column(df, col, default, dtype=None):
+    if col in df.columns:
+        return df[col].to_numpy(dtype=dtype)
+    return np.full(len(df), default, dtype=dtype if dtype is not None else object)
 
-    # MUST include attr_category columns before model call
-    base_prob = xgb_model.predict_proba(feat_df)[:, 1]
 
-    # Fusion scoring
+def build_attraction_features(df):
+    """Column-oriented attraction features; these never change between requests."""
+    features = {}
+
+    for feat, col, default in ATTRACTION_CATEGORICAL_FEATURES:
+        features[feat] = _catalog_column(df, col, default)
+
+    if "outdoor" in df.columns:
+        features["attraction_outdoor"] = df["outdoor"].astype(bool).to_numpy(dtype=float)
+    else:
+        features["attraction_outdoor"] = np.ones(len(df))
+
+    for feat, col, default in ATTRACTION_NUMERIC_FEATURES:
+        features[feat] = _catalog_column(df, col, default, dtype=float)
+    return features
 
-    budget = feat_df["budget"].values
-    days = np.maximum(feat_df["available_days"].values, 1.0)
-    dist_pref = np.maximum(feat_df["distance_preference"].values, 1.0)
-    avg_cost = feat_df["attraction_avg_cost"].values
-    avg_dur = feat_df["attraction_avg_duration"].values
-    dist_km = feat_df["distance_km"].values
+
+# Candidate pruning (optional, per request via "prune_candidates"): only
+# attractions within PRUNE_RADIUS_MULTIPLIER x distance_preference of the
+# start point, plus the PRUNE_FALLBACK_SIZE most popular ones, are scored.
+
+PRUNE_CANDIDATES_DEFAULT = os.environ.get("PRUNE_CANDIDATES", "0") == "1"
+PRUNE_RADIUS_MULTIPLIER = float(os.environ.get("PRUNE_RADIUS_MULTIPLIER", "1.5"))
+PRUNE_FALLBACK_SIZE = int(os.environ.get("PRUNE_FALLBACK_SIZE", "10"))
+
+
+def candidate_indices(user):
+    """Catalog rows that go through the models for this user."""
+    all_idx = np.arange(len(attractions_df))
+    if not user.get("prune_candidates", PRUNE_CANDIDATES_DEFAULT):
+        return all_idx
+
+    start_lat = user.get("start_latitude", np.nan)
+    start_lon = user.get("start_longitude", np.nan)
+    if start_lat is None or start_lon is None or np.isnan(start_lat) or np.isnan(start_lon):
+        return all_idx
+
+    multiplier = user.get("prune_radius_multiplier", PRUNE_RADIUS_MULTIPLIER)
+    radius_km = multiplier * max(user["distance_preference"], 1.0)
+    nearby, _ = attraction_index.within(start_lat, start_lon, radius_km)
+    return np.union1d(nearby, popular_idx)
+
+
+def build_candidate_columns(user, idx):
+    """Broadcast one user's fields against the precomputed attraction block (rows idx)."""
+    n = len(idx)
+
+    start_lat = user.get("start_latitude", np.nan)
+    start_lon = user.get("start_longitude", np.nan)
+
+    # NaN for every attraction when the user gave no start point
+    distance_km = attraction_index.distances(start_lat, start_lon, idx)
+
+    # Fill any NaN distance so XGBoost works
+    missing = np.isnan(distance_km)
+    if missing.any() and not missing.all():
+        distance_km = np.where(missing, np.median(distance_km[~missing]), distance_km)
+
+    columns = {
+        "budget": np.full(n, user["budget"], dtype=float),
+        "available_days": np.full(n, user["available_days"], dtype=float),
+        "num_travelers": np.full(n, user["num_travelers"], dtype=float),
+        "distance_preference": np.full(n, user["distance_preference"], dtype=float),
+        "activity_type": np.full(n, user.get("activity_type", "general"), dtype=object),
+        "season": np.full(n, user.get("season", "any"), dtype=object),
+    }
+    for feat, _, _ in ATTRACTION_CATEGORICAL_FEATURES:
+        columns[feat] = attraction_features[feat][idx]
+    columns["attraction_outdoor"] = attraction_features["attraction_outdoor"][idx]
+    for feat, _, _ in ATTRACTION_NUMERIC_FEATURES:
+        columns[feat] = attraction_features[feat][idx]
+    columns["distance_km"] = distance_km
+
+    return columns
+
+
+def stack_candidate_columns(per_user):
+    return {col: np.concatenate([c[col] for c in per_user]) for col in per_user[0]}
+
+
+def build_fusion_features(feat, base_prob):
+    budget = feat["budget"]
+    days = np.maximum(feat["available_days"], 1.0)
+    dist_pref = np.maximum(feat["distance_preference"], 1.0)
+    avg_cost = feat["attraction_avg_cost"]
+    avg_dur = feat["attraction_avg_duration"]
+    dist_km = feat["distance_km"]
 
     # Derived ratios — just like training
     daily_budget = budget / days
@@ -166,46 +253,224 @@ def recommend_itinerary():
     distance_ratio = np.clip(distance_ratio, 0.0, 5.0)
 
     # Must be shape: (N, 4)
-    X_fusion = np.column_stack([
+    return np.column_stack([
         base_prob,
         cost_ratio,
         duration_ratio,
         distance_ratio,
     ])
 
-    fusion_prob = fusion_model.predict(X_fusion, verbose=0).ravel()
 
-    scored = attractions_df.copy()
-    scored["score"] = fusion_prob
-    scored = scored.sort_values(by="score", ascending=False)
+def select_attractions(candidate_idx, scores, total_time, total_budget, max_attractions):
+    """Greedy pick in score order under the time + budget limits; returns positions into candidate_idx."""
+    costs = _catalog_column(attractions_df, "avg_cost", total_budget / max_attractions, dtype=float)
+    hours = _catalog_column(attractions_df, "avg_duration_hours", 3.0, dtype=float)
 
-    # Select attractions under time + budget
-    max_attractions = user.get("max_attractions", 8)
     selected = []
     time_acc = 0
     budget_acc = 0
 
-    for _, att in scored.iterrows():
-        cost = att.get("avg_cost", total_budget / max_attractions)
-        hours = att.get("avg_duration_hours", 3.0)
+    for pos in np.argsort(-scores, kind="stable"):
+        cost = costs[candidate_idx[pos]]
+        duration = hours[candidate_idx[pos]]
 
-        if budget_acc + cost <= total_budget and time_acc + hours <= total_time:
-            selected.append(att)
-            time_acc += hours
+        if budget_acc + cost <= total_budget and time_acc + duration <= total_time:
+            selected.append(pos)
+            time_acc += duration
             budget_acc += cost
 
         if len(selected) >= max_attractions:
             break
 
-    selected_df = pd.DataFrame(selected)
+    return np.array(selected, dtype=int)
+
+
+# Risk-aware selection: the risk component's precomputed / stored conditions,
+# looked up in-process for every candidate before the greedy selection
+
+RISK_COMPONENT = risk_service.COMPONENT
+RISK_WEIGHT_DEFAULT = float(os.environ.get("ITINERARY_RISK_WEIGHT", "0.5"))
+
+
+def wants_risk(user):
+    return bool(user.get("risk_aware")) or user.get("max_risk") is not None
+
+
+def validate_user(user):
+    """Raise ValueError for request options that can't be parsed (before any model runs)."""
+    for key in ("max_risk", "risk_weight", "max_nightly_rate"):
+        if user.get(key) is not None:
+            try:
+                float(user[key])
+            except (TypeError, ValueError):
+                raise ValueError(f"'{key}' must be numeric, got {user[key]!r}") from None
+    if user.get("visit_time") is not None:
+        try:
+            visit = pd.Timestamp(user["visit_time"])
+        except (TypeError, ValueError):
+            visit = pd.NaT
+        if pd.isna(visit):
+            raise ValueError(f"'visit_time' is not a valid timestamp: {user['visit_time']!r}")
+    price_range = user.get("price_range")
+    if price_range is not None:
+        try:
+            valid = len([float(v) for v in price_range]) == 2
+        except (TypeError, ValueError):
+            valid = False
+        if not valid:
+            raise ValueError(f"'price_range' must be [min, max], got {price_range!r}")
+
+
+def candidate_risk(users, candidates, offsets):
+    """(risk_score, risk_category) per stacked candidate row; NaN / None for users that didn't ask for risk.
+
+    Each user's candidates are scored at their visit_time (default now, with
+    live incident counts), all users in one call to the risk component.
+    """
+    risk = np.full(offsets[-1], np.nan)
+    categories = np.full(offsets[-1], None, dtype=object)
+    rows = [k for k, user in enumerate(users) if wants_risk(user)]
+    if not rows:
+        return risk, categories
+
+    now = pd.Timestamp.utcnow().tz_localize(None)
+    positions, days, hours, live = [], [], [], []
+    for k in rows:
+        visit_time = users[k].get("visit_time")
+        visit = now if visit_time is None else pd.Timestamp(visit_time)
+        positions.append(np.arange(offsets[k], offsets[k + 1]))
+        days.append(np.full(len(candidates[k]), visit.dayofweek))
+        hours.append(np.full(len(candidates[k]), visit.hour))
+        live.append(np.full(len(candidates[k]), visit_time is None))
+
+    positions = np.concatenate(positions)
+    idx = np.concatenate([candidates[k] for k in rows])
+    risk[positions], categories[positions] = risk_service.risk_for_points(
+        attraction_index.lat[idx], attraction_index.lon[idx], np.concatenate(days), np.concatenate(hours),
+        live=np.concatenate(live),
+    )
+    return risk, categories
+
+
+def recommend_for_users(users):
+    """Score and select for N users with one call per model over the stacked candidates."""
+
+    #  Predict total time & budget
+    with stage_timer(COMPONENT, "time_budget_predict"):
+        total_time = time_model.predict(users).astype(float)
+        total_budget = budget_model.predict(users).astype(float)
+
+    #  Score attractions using both models (base + fusion)
+    with stage_timer(COMPONENT, "features"):
+        candidates = [candidate_indices(user) for user in users]
+        offsets = np.cumsum([0] + [len(idx) for idx in candidates])
+        feat = stack_candidate_columns([build_candidate_columns(user, idx) for user, idx in zip(users, candidates)])
+
+    # Compiled encoder writes the one-hot + numeric matrix the booster expects
+    with stage_timer(COMPONENT, "base_predict"):
+        base_prob = xgb_model.predict_proba(feat)[:, 1]
+
+    # Fusion scoring
+    with stage_timer(COMPONENT, "fusion_predict"):
+        X_fusion = build_fusion_features(feat, base_prob)
+        fusion_prob = fusion_model.predict(X_fusion, verbose=0).ravel()
+
+    with stage_timer(COMPONENT, "risk_lookup"):
+        risk, risk_category = candidate_risk(users, candidates, offsets)
+
+    # Each stage is timed once per request, across all of its users
+    selected = []
+    with stage_timer(COMPONENT, "selection"):
+        for k, user in enumerate(users):
+            # Select attractions under time + budget
+            max_attractions = user.get("max_attractions", 8)
+            idx = candidates[k]
+            scores = fusion_prob[offsets[k]:offsets[k + 1]]
+
+            if wants_risk(user):
+                # Rank on score minus weighted risk; drop candidates above max_risk first
+                user_risk = risk[offsets[k]:offsets[k + 1]]
+                weight = user.get("risk_weight")
+                ranking = scores - float(RISK_WEIGHT_DEFAULT if weight is None else weight) * user_risk
+                keep = np.arange(len(idx))
+                if user.get("max_risk") is not None:
+                    keep = np.flatnonzero(user_risk <= float(user["max_risk"]))
+                selected_pos = keep[
+                    select_attractions(idx[keep], ranking[keep], total_time[k], total_budget[k], max_attractions)
+                ]
+                selected_df = attractions_df.iloc[idx[selected_pos]].assign(
+                    score=scores[selected_pos],
+                    risk_score=user_risk[selected_pos],
+                    risk_category=risk_category[offsets[k]:offsets[k + 1]][selected_pos],
+                )
+            else:
+                selected_pos = select_attractions(idx, scores, total_time[k], total_budget[k], max_attractions)
+                selected_df = attractions_df.iloc[idx[selected_pos]].assign(score=scores[selected_pos])
+            selected.append(selected_df)
 
     #  Recommend hotels
-    hotel_candidates = score_hotels(user, selected_df)
-    top_hotels = hotel_candidates.head(user.get("max_hotels", 5))
-
-    return jsonify({
-        "estimated_total_time_hours": total_time,
-        "estimated_total_budget": total_budget,
-        "selected_attractions": selected_df.to_dict(orient="records"),
-        "recommended_hotels": top_hotels.to_dict(orient="records")
-    })
+    with stage_timer(COMPONENT, "hotel_scoring"):
+        hotels = [score_hotels(user, selected_df) for user, selected_df in zip(users, selected)]
+
+    # Plain records; the routes time jsonify itself as "serialize"
+    with stage_timer(COMPONENT, "to_records"):
+        return [
+            {
+                "estimated_total_time_hours": float(total_time[k]),
+                "estimated_total_budget": float(total_budget[k]),
+                "selected_attractions": selected_df.to_dict(orient="records"),
+                "recommended_hotels": top_hotels.to_dict(orient="records")
+            }
+            for k, (selected_df, top_hotels) in enumerate(zip(selected, hotels))
+        ]
+
+
+# ROUTE: Full Recommendation (Attractions + Hotels)
+
+@component1_bp.route("/recommend", methods=["POST"])
+@MODELS.requires(COMPONENT)
+def recommend_itinerary():
+    user = request.json or {}
+    try:
+        if not isinstance(user, dict):
+            raise ValueError("Expected a user preference object")
+        validate_user(user)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    unavailable = MODELS.unavailable(RISK_COMPONENT) if wants_risk(user) else None
+    if unavailable is not None:
+        return unavailable
+    result = recommend_for_users([user])[0]
+
+    with stage_timer(COMPONENT, "serialize"):
+        return jsonify(result)
+
+
+# ROUTE: Batch Recommendation (one itinerary per user preference object)
+
+@component1_bp.route("/recommend_batch", methods=["POST"])
+@MODELS.requires(COMPONENT)
+def recommend_itinerary_batch():
+    data = request.json or {}
+    users = data.get("users", []) if isinstance(data, dict) else data
+
+    if not isinstance(users, list) or not all(isinstance(u, dict) for u in users):
+        return jsonify({"error": "Expected a list of user preference objects under 'users'"}), 400
+    if not users:
+        return jsonify({"results": []})
+    for k, user in enumerate(users):
+        try:
+            validate_user(user)
+        except ValueError as e:
+            return jsonify({"error": f"users[{k}]: {e}", "index": k}), 400
+    unavailable = MODELS.unavailable(RISK_COMPONENT) if any(wants_risk(u) for u in users) else None
+    if unavailable is not None:
+        return unavailable
+
+    results = recommend_for_users(users)
+
+    with stage_timer(COMPONENT, "serialize"):
+        return jsonify({"results": results})
+
+
+MODELS.register(COMPONENT, load_models, warm_up)
@@ -1,87 +1,883 @@
 import os
-import joblib
 import numpy as np
 import pandas as pd
-import tensorflow as tf
 from flask import Blueprint, request, jsonify
 from datetime import datetime
 
+from ml_common.dataset_cache import read_dataset
+from ml_common.event_index import EventIndex
+from ml_common.geo import densify_path, haversine_distance
+from ml_common.incident_stream import IncidentWindow
+from ml_common.metrics import stage_timer
+from ml_common.risk_prior import RiskPrior
+from ml_common.risk_tiles import RiskTileCache
+from ml_common.time_features import hour_and_weekday
+from risk_model import DEFAULT_CONDITIONS, RiskStackingModel, RiskStudentModel
+from inference.model_manager import MODELS
+
 component3_bp = Blueprint("component3", __name__)
 
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 MODEL_DIR = os.path.join(BASE_DIR, "models", "component3")
 MODEL_PREFIX = os.path.join(MODEL_DIR, "risk_model")
+ROOT_DIR = os.path.dirname(BASE_DIR)
 
-# Load base models
-weather_model = joblib.load(f"{MODEL_PREFIX}_weather.pkl")
-traffic_model = joblib.load(f"{MODEL_PREFIX}_traffic.pkl")
-incident_model = joblib.load(f"{MODEL_PREFIX}_incident.pkl")
-label_encoder = joblib.load(f"{MODEL_PREFIX}_label_encoder.pkl")
+CONDITIONS_PATH = os.environ.get(
+    "RISK_CONDITIONS_PATH", os.path.join(ROOT_DIR, "datasets", "realtime_conditions_training.csv")
+)
+EVENTS_PATH = os.environ.get(
+    "RISK_EVENTS_PATH", os.path.join(ROOT_DIR, "datasets", "risk_events_historical.csv")
+)
+PRIOR_PATH = os.environ.get("RISK_PRIOR_PATH", os.path.join(MODEL_DIR, "risk_prior"))
+# "stack" runs the full base-learner + fusion stack; "fast" the distilled
+# student (if exported). Requests can pick per call with "mode".
+SERVING_MODE = os.environ.get("RISK_SERVING_MODE", "stack")
+STREAM_WINDOW_HOURS = float(os.environ.get("RISK_STREAM_WINDOW_HOURS", "24"))
+STREAM_BUCKET_MINUTES = float(os.environ.get("RISK_STREAM_BUCKET_MINUTES", "15"))
+STREAM_CLOCK = os.environ.get("RISK_STREAM_CLOCK", "wall")  # "event" when replaying history
 
-# Load fusion model — NO BUILD REQUIRED
-fusion_model = tf.keras.models.load_model(f"{MODEL_PREFIX}_fusion.h5")
+COMPONENT = "risk"
 
-@component3_bp.route("/predict", methods=["POST"])
-def predict_risk():
-    data = request.json
+# Filled in by load_models() on the model manager's background thread
+risk_model = None
+student_model = None
+weather_model = traffic_model = incident_model = label_encoder = fusion_model = None
+tile_cache = None
+event_index = None
+incident_stream = None
+risk_prior = None
+
+
+def load_models():
+    global risk_model, weather_model, traffic_model, incident_model, label_encoder, fusion_model, tile_cache
+    global event_index, incident_stream, risk_prior, student_model
+
+    # Base models flattened into array evaluators (parity-checked on load);
+    # fusion model from the exported NumPy weights, no TensorFlow needed
+    risk_model = RiskStackingModel()
+    risk_model.load_models(MODEL_PREFIX)
+    risk_model.compile_for_inference()
+
+    weather_model = risk_model.weather_model
+    traffic_model = risk_model.traffic_model
+    incident_model = risk_model.incident_model
+    label_encoder = risk_model.label_encoder
+    fusion_model = risk_model.fusion_model
+
+    # Distilled single-model predictor for mode=fast (distill_risk_model.py)
+    if RiskStudentModel.exists(MODEL_PREFIX):
+        student_model = RiskStudentModel()
+        student_model.load_models(MODEL_PREFIX)
+
+    # Risk tiles for every hour-of-week bucket, seeded with the latest known conditions per cell.
+    # Also the conditions store: feeds write through POST /conditions, location-only reads are lookups.
+    # The training conditions only seed the tiles; a cell counts as observed once a feed posts it.
+    tile_cache = RiskTileCache(risk_model, defaults=DEFAULT_CONDITIONS)
+    tile_cache.recompute()
+    if os.path.exists(CONDITIONS_PATH):
+        tile_cache.update(read_dataset(CONDITIONS_PATH), observed=False)
+
+    # Historical events, for filling num_recent_accidents / num_recent_incidents server-side
+    if os.path.exists(EVENTS_PATH):
+        event_index = EventIndex.from_frame(read_dataset(EVENTS_PATH))
+
+    # Hour-of-week historical priors, memory-mapped. Built offline by the
+    # training pipeline (or python -m ml_common.risk_prior); without the
+    # artifact the count fallback and GET /prior are off.
+    if RiskPrior.exists(PRIOR_PATH):
+        risk_prior = RiskPrior.load(PRIOR_PATH)
 
-    timestamp = pd.to_datetime(
-        data.get("timestamp", datetime.utcnow().isoformat())
+    # Live sliding-window counts, fed by POST /incidents
+    clock = IncidentWindow.wall_clock if STREAM_CLOCK == "wall" else None
+    incident_stream = IncidentWindow(
+        grid=tile_cache.grid, window_hours=STREAM_WINDOW_HOURS, bucket_minutes=STREAM_BUCKET_MINUTES,
+        radius_km=EVENT_RADIUS_KM, clock=clock,
     )
-    hour = timestamp.hour / 23.0
-    day = timestamp.dayofweek / 6.0
-
-    weather = np.array([[
-        data.get("temperature", data.get("temp", 28.0)),
-        data.get("rainfall_mm", data.get("rain", 0.0)),
-        data.get("wind_speed", data.get("wind", 5.0)),
-        data.get("humidity", 75.0),
-        data.get("visibility_km", 10.0),
-    ]])
-
-    traffic = np.array([[
-        data.get("traffic_congestion_level", data.get("congestion", 3.0)),
-        data.get("average_speed", data.get("speed", 40.0)),
-        data.get("traffic_volume", data.get("volume", 100.0)),
-    ]])
-
-    incident = np.array([[
-        data.get("num_recent_accidents", data.get("accidents", 0.0)),
-        data.get("num_recent_incidents", data.get("events", 0.0)),
-    ]])
-
-    w = float(weather_model.predict(weather)[0])
-    t = float(traffic_model.predict(traffic)[0])
-    i = float(incident_model.predict(incident)[0])
-
-    fusion_input = np.array([[w, t, i, hour, day]])
-    preds = fusion_model.predict(fusion_input, verbose=0)
-
-    risk_score = float(preds[0][0][0])
-    cat_probs = preds[1][0]
-    severity = float(preds[2][0][0])
-
-    cat_idx = int(np.argmax(cat_probs))
-    risk_category = label_encoder.inverse_transform([cat_idx])[0]
-
-    label_map = {
-        "safe": "LOW",
-        "medium": "MEDIUM",
-        "low": "HIGH"
+
+
+def warm_up():
+    weather_model.predict(np.array([[28.0, 0.0, 5.0, 75.0, 10.0]]))
+    traffic_model.predict(np.array([[3.0, 40.0, 100.0]]))
+    incident_model.predict(np.array([[0.0, 0.0]]))
+    fusion_model.predict(np.array([[0.1, 0.1, 0.1, 0.5, 0.5]]), verbose=0)
+    label_encoder.inverse_transform([0])
+    if student_model is not None:
+        student_model.predict_arrays(np.array([[28.0, 0.0, 5.0, 75.0, 10.0, 3.0, 40.0, 100.0, 0.0, 0.0, 0.5, 0.5]]))
+
+
+MODELS.register(COMPONENT, load_models, warm_up)
+
+
+# Request fields -> model inputs: (column, alias, default), in model column order
+
+WEATHER_FIELDS = [
+    ("temperature", "temp", 28.0),
+    ("rainfall_mm", "rain", 0.0),
+    ("wind_speed", "wind", 5.0),
+    ("humidity", None, 75.0),
+    ("visibility_km", None, 10.0),
+]
+
+TRAFFIC_FIELDS = [
+    ("traffic_congestion_level", "congestion", 3.0),
+    ("average_speed", "speed", 40.0),
+    ("traffic_volume", "volume", 100.0),
+]
+
+INCIDENT_FIELDS = [
+    ("num_recent_accidents", "accidents", 0.0),
+    ("num_recent_incidents", "events", 0.0),
+]
+
+CONDITION_FIELDS = WEATHER_FIELDS + TRAFFIC_FIELDS + INCIDENT_FIELDS
+
+LABEL_MAP = {
+    "safe": "LOW",
+    "medium": "MEDIUM",
+    "low": "HIGH"
+}
+
+MAX_BATCH_LOCATIONS = int(os.environ.get("RISK_MAX_BATCH_LOCATIONS", "1000"))
+
+EVENT_RADIUS_KM = float(os.environ.get("RISK_EVENT_RADIUS_KM", "5.0"))
+EVENT_WINDOW_HOURS = float(os.environ.get("RISK_EVENT_WINDOW_HOURS", "24.0"))
+
+
+def _field_matrix(records, fields):
+    return np.array([
+        [data.get(col, data.get(alias, default)) if alias else data.get(col, default) for col, alias, default in fields]
+        for data in records
+    ], dtype=float).reshape(len(records), len(fields))
+
+
+NUMERIC_LOCATION_FIELDS = ("latitude", "longitude", "event_radius_km", "event_window_hours")
+
+
+def validate_location(data):
+    """Raise ValueError naming the first field of a location object that can't be parsed."""
+    keys = [key for col, alias, _ in CONDITION_FIELDS for key in (col, alias) if key] + list(NUMERIC_LOCATION_FIELDS)
+    for key in keys:
+        if data.get(key) is not None:
+            try:
+                float(data[key])
+            except (TypeError, ValueError):
+                raise ValueError(f"'{key}' must be numeric, got {data[key]!r}") from None
+    if data.get("timestamp") is not None:
+        try:
+            pd.Timestamp(data["timestamp"])
+        except (TypeError, ValueError):
+            raise ValueError(f"'timestamp' is not a valid timestamp: {data['timestamp']!r}") from None
+
+
+def _has_field(data, col, alias):
+    return col in data or (alias is not None and alias in data)
+
+
+def _uses_live_counts(data):
+    # "Right now" questions go to the live window once events are being
+    # ingested; explicit times or search parameters go to the historical index.
+    return (
+        incident_stream is not None
+        and incident_stream.events_seen > 0
+        and not any(key in data for key in ("timestamp", "event_radius_km", "event_window_hours"))
+    )
+
+
+def _prior_counts(data, now):
+    if risk_prior is None:
+        return data
+    timestamp = pd.Timestamp(data.get("timestamp", now))
+    prior = risk_prior.lookup(float(data["latitude"]), float(data["longitude"]), timestamp.dayofweek, timestamp.hour)[0]
+    if np.isnan(prior).any():
+        return data
+    fields = risk_prior.fields
+    return {
+        **data,
+        "num_recent_accidents": float(prior[fields.index("expected_accidents_24h")]),
+        "num_recent_incidents": float(prior[fields.index("expected_incidents_24h")]),
     }
 
-    risk_category = label_map.get(risk_category, risk_category)
 
-    category_probabilities = {
-        label_map.get(cls, cls): float(cat_probs[i])
-        for i, cls in enumerate(label_encoder.classes_)
+def fill_event_counts(records, now):
+    """Copies of records with accident/incident counts filled server-side.
+
+    Only records that omit both counts and carry a latitude/longitude are
+    filled: from the live incident window (events within EVENT_RADIUS_KM,
+    the same radius query as the historical index), or from the
+    historical event index (per-request event_radius_km / event_window_hours
+    override the defaults). When the index's history doesn't span the
+    requested window (e.g. a time after the last recorded event) or there
+    is no index, the hour-of-week prior's expected counts for the cell are
+    used instead, if a prior is loaded.
+    """
+    filled = []
+    for data in records:
+        if any(_has_field(data, col, alias) for col, alias, _ in INCIDENT_FIELDS) or \
+                data.get("latitude") is None or data.get("longitude") is None:
+            filled.append(data)
+            continue
+        if _uses_live_counts(data):
+            accidents, incidents = incident_stream.counts(float(data["latitude"]), float(data["longitude"]))
+            filled.append({**data, "num_recent_accidents": accidents, "num_recent_incidents": incidents})
+            continue
+        until = data.get("timestamp", now)
+        window_hours = float(data.get("event_window_hours", EVENT_WINDOW_HOURS))
+        if event_index is None or (risk_prior is not None and not event_index.covers(until, window_hours)):
+            filled.append(_prior_counts(data, now))
+            continue
+        accidents, incidents = event_index.recent_counts(
+            float(data["latitude"]),
+            float(data["longitude"]),
+            float(data.get("event_radius_km", EVENT_RADIUS_KM)),
+            until,
+            window_hours,
+        )
+        filled.append({**data, "num_recent_accidents": accidents, "num_recent_incidents": incidents})
+    return filled
+
+
+def _result_rows(risk_score, cat_probs, severity, base=None):
+    """Response objects; base (n, 3) adds the weather / traffic / incident risks (the student has none)."""
+    classes = [LABEL_MAP.get(cls, cls) for cls in label_encoder.classes_]
+    categories = np.argmax(cat_probs, axis=1)
+
+    rows = []
+    for k in range(len(categories)):
+        row = {
+            "risk_score": float(risk_score[k]),
+            "risk_category": classes[categories[k]],
+            "severity_level": float(severity[k]),
+        }
+        if base is not None:
+            row.update(weather_risk=float(base[k][0]), traffic_risk=float(base[k][1]), incident_risk=float(base[k][2]))
+        row["category_probabilities"] = {cls: float(p) for cls, p in zip(classes, cat_probs[k])}
+        rows.append(row)
+    return rows
+
+
+def _store_cells(records, hour):
+    """Conditions-store cell per record, or -1 where the record has to go through the models.
+
+    A record is served from the store when it carries only a location (and
+    optionally a timestamp) that falls in a cell a feed has written to.
+    """
+    cells = np.full(len(records), -1)
+    for k, data in enumerate(records):
+        if data.get("latitude") is None or data.get("longitude") is None or np.isnan(hour[k]) or \
+                any(key in data for key in ("event_radius_km", "event_window_hours")) or \
+                any(_has_field(data, col, alias) for col, alias, _ in CONDITION_FIELDS):
+            continue
+        cell = tile_cache.grid.cell_of([float(data["latitude"])], [float(data["longitude"])])[0]
+        if cell >= 0 and tile_cache.observed[cell]:
+            cells[k] = cell
+    return cells
+
+
+def _write_live_counts(cells):
+    """Write the live incident counts (within EVENT_RADIUS_KM of each cell centre) through to the store.
+
+    A cell is only recomputed when its counts actually changed since the last write.
+    """
+    cells = np.unique(cells)
+    if len(cells):
+        counts = incident_stream.counts_near(*tile_cache.grid.centers(cells))
+        tile_cache.set_columns(cells, {"num_recent_accidents": counts[:, 0], "num_recent_incidents": counts[:, 1]})
+
+
+def read_from_store(records, cells, hour, day):
+    """Precomputed results for store-served records, tagged with the conditions version they were computed from."""
+    with stage_timer(COMPONENT, "store_lookup"):
+        live = np.array([_uses_live_counts(data) for data in records], dtype=bool)
+        _write_live_counts(cells[live])
+        stored = tile_cache.lookup(cells, day, hour)
+
+    results = _result_rows(stored["risk_score"], stored["category_probs"], stored["severity_level"], stored["base"])
+    for result, version in zip(results, stored["version"]):
+        result["conditions_version"] = int(version)
+    return results
+
+
+def run_models(records, now, hour, day):
+    """Risk for N request objects with one call per base model and one fusion call."""
+    with stage_timer(COMPONENT, "event_lookup"):
+        records = fill_event_counts(records, now)
+
+    with stage_timer(COMPONENT, "features"):
+        weather = _field_matrix(records, WEATHER_FIELDS)
+        traffic = _field_matrix(records, TRAFFIC_FIELDS)
+        incident = _field_matrix(records, INCIDENT_FIELDS)
+
+    with stage_timer(COMPONENT, "weather_model"):
+        w = np.asarray(weather_model.predict(weather), dtype=float)
+    with stage_timer(COMPONENT, "traffic_model"):
+        t = np.asarray(traffic_model.predict(traffic), dtype=float)
+    with stage_timer(COMPONENT, "incident_model"):
+        i = np.asarray(incident_model.predict(incident), dtype=float)
+
+    with stage_timer(COMPONENT, "fusion_predict"):
+        fusion_input = np.column_stack([w, t, i, hour / 23.0, day / 6.0])
+        risk_score, cat_probs, severity = fusion_model.predict(fusion_input, verbose=0)
+
+    return _result_rows(risk_score[:, 0], cat_probs, severity[:, 0], np.column_stack([w, t, i]))
+
+
+def score_locations(records):
+    """Risk for N request objects: store lookups where possible, else one call per base model and one fusion call."""
+    now = datetime.utcnow().isoformat()
+    hour, day = hour_and_weekday([data.get("timestamp", now) for data in records])
+    cells = _store_cells(records, hour)
+
+    results = [None] * len(records)
+    hits = np.flatnonzero(cells >= 0)
+    if len(hits):
+        for k, result in zip(hits, read_from_store([records[k] for k in hits], cells[hits], hour[hits], day[hits])):
+            results[k] = result
+
+    fast = np.array([_uses_student(data) for data in records], dtype=bool)
+    for runner, rows in ((run_student, (cells < 0) & fast), (run_models, (cells < 0) & ~fast)):
+        misses = np.flatnonzero(rows)
+        if len(misses):
+            for k, result in zip(misses, runner([records[k] for k in misses], now, hour[misses], day[misses])):
+                results[k] = result
+    return results
+
+
+def _uses_student(data):
+    return student_model is not None and data.get("mode", SERVING_MODE) == "fast"
+
+
+def run_student(records, now, hour, day):
+    """Risk for N request objects from the distilled student: one model call."""
+    with stage_timer(COMPONENT, "event_lookup"):
+        records = fill_event_counts(records, now)
+
+    with stage_timer(COMPONENT, "features"):
+        # CONDITION_FIELDS is in the student's column order (DEFAULT_CONDITIONS)
+        X = np.column_stack([_field_matrix(records, CONDITION_FIELDS), hour / 23.0, day / 6.0])
+
+    with stage_timer(COMPONENT, "student_predict"):
+        risk_score, cat_probs, severity = student_model.predict_arrays(X)
+
+    results = _result_rows(risk_score, cat_probs, severity)
+    for result in results:
+        result["model"] = "student"
+    return results
+
+
+def risk_for_points(lat, lon, day_of_week, hour_of_day, live=False):
+    """(risk_score, risk_category) arrays for many points, each at its own hour-of-week bucket.
+
+    In-process entry point for other components (e.g. risk-aware itineraries):
+    points on the grid read the stored conditions' precomputed outputs, the
+    rest are scored with default conditions in one batch. live marks points
+    asked about "right now" (like a /predict without a timestamp): their
+    cells get the live incident counts first, the same store path as /predict.
+    """
+    lat, lon = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+    day = np.broadcast_to(np.asarray(day_of_week, dtype=int), lat.shape)
+    hour = np.broadcast_to(np.asarray(hour_of_day, dtype=int), lat.shape)
+    live = np.broadcast_to(np.asarray(live, dtype=bool), lat.shape)
+    classes = np.array([LABEL_MAP.get(cls, cls) for cls in label_encoder.classes_], dtype=object)
+
+    risk = np.empty(len(lat))
+    categories = np.empty(len(lat), dtype=object)
+    cells = tile_cache.grid.cell_of(lat, lon)
+    inside = cells >= 0
+    if inside.any():
+        if incident_stream is not None and incident_stream.events_seen > 0:
+            _write_live_counts(cells[inside & live])
+        stored = tile_cache.lookup(cells[inside], day[inside], hour[inside])
+        risk[inside] = stored["risk_score"]
+        categories[inside] = classes[np.argmax(stored["category_probs"], axis=1)]
+    if not inside.all():
+        base = risk_model.predict_base_risks(pd.DataFrame([DEFAULT_CONDITIONS]))
+        score, probs, _ = risk_model.predict_from_base(
+            np.repeat(base, (~inside).sum(), axis=0), hour[~inside] / 23.0, day[~inside] / 6.0
+        )
+        risk[~inside] = score
+        categories[~inside] = classes[np.argmax(probs, axis=1)]
+    return risk, categories
+
+
+@component3_bp.route("/predict", methods=["POST"])
+@MODELS.requires(COMPONENT)
+def predict_risk():
+    data = request.json or {}
+    try:
+        if not isinstance(data, dict):
+            raise ValueError("Expected a location object")
+        validate_location(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    result = score_locations([data])[0]
+
+    with stage_timer(COMPONENT, "serialize"):
+        return jsonify(result)
+
+
+# ROUTE: Batch risk (e.g. every pin on the map view in one round trip)
+
+@component3_bp.route("/predict_batch", methods=["POST"])
+@MODELS.requires(COMPONENT)
+def predict_risk_batch():
+    data = request.json or {}
+    locations = data.get("locations", []) if isinstance(data, dict) else data
+
+    if not isinstance(locations, list) or not all(isinstance(loc, dict) for loc in locations):
+        return jsonify({"error": "Expected a list of location objects under 'locations'"}), 400
+    if len(locations) > MAX_BATCH_LOCATIONS:
+        return jsonify({"error": f"At most {MAX_BATCH_LOCATIONS} locations per request"}), 400
+    if not locations:
+        return jsonify({"results": []})
+    if isinstance(data, dict) and "mode" in data:
+        locations = [{"mode": data["mode"], **loc} for loc in locations]
+    for k, loc in enumerate(locations):
+        try:
+            validate_location(loc)
+        except ValueError as e:
+            return jsonify({"error": f"locations[{k}]: {e}", "index": k}), 400
+
+    results = score_locations(locations)
+    for loc, result in zip(locations, results):
+        for key in ("name", "latitude", "longitude"):
+            if key in loc:
+                result[key] = loc[key]
+
+    with stage_timer(COMPONENT, "serialize"):
+        return jsonify({"results": results})
+
+
+# ROUTES: Risk heatmap tiles (precomputed per hour-of-week bucket)
+
+def _request_bucket():
+    """(day_of_week, hour_of_day) from ?day_of_week=&hour_of_day=, ?timestamp=, or now (UTC)."""
+    if "day_of_week" in request.args and "hour_of_day" in request.args:
+        day = request.args.get("day_of_week", type=int)
+        hour = request.args.get("hour_of_day", type=int)
+    else:
+        timestamp = pd.to_datetime(request.args.get("timestamp", datetime.utcnow().isoformat()))
+        day, hour = timestamp.dayofweek, timestamp.hour
+    if day is None or hour is None or not (0 <= day <= 6 and 0 <= hour <= 23):
+        raise ValueError("day_of_week must be 0-6 and hour_of_day 0-23")
+    return int(day), int(hour)
+
+
+def _window_response(values, bounds, day, hour):
+    return {
+        "day_of_week": day,
+        "hour_of_day": hour,
+        "bounds": bounds,
+        "cell_deg": tile_cache.grid.cell_deg,
+        "rows": int(values.shape[0]),
+        "cols": int(values.shape[1]),
+        # row 0 is the southern edge of the window
+        "risk": np.round(values.astype(float), 4).tolist(),
     }
+
+
+@component3_bp.route("/tiles/window", methods=["GET"])
+@MODELS.requires(COMPONENT)
+def risk_tile_window():
+    try:
+        day, hour = _request_bucket()
+        bbox = [float(request.args[k]) for k in ("min_lat", "min_lon", "max_lat", "max_lon")]
+    except (KeyError, ValueError) as e:
+        return jsonify({"error": f"Expected min_lat, min_lon, max_lat, max_lon and a valid time: {e}"}), 400
+
+    with stage_timer(COMPONENT, "tiles"):
+        values, bounds = tile_cache.window(*bbox, day, hour)
+
+    with stage_timer(COMPONENT, "serialize"):
+        return jsonify(_window_response(values, bounds, day, hour))
+
+
+@component3_bp.route("/tiles/<int:z>/<int:x>/<int:y>", methods=["GET"])
+@MODELS.requires(COMPONENT)
+def risk_tile(z, x, y):
+    try:
+        day, hour = _request_bucket()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    with stage_timer(COMPONENT, "tiles"):
+        values, bounds = tile_cache.tile(z, x, y, day, hour)
+
+    with stage_timer(COMPONENT, "serialize"):
+        return jsonify(_window_response(values, bounds, day, hour))
+
+
+@component3_bp.route("/tiles/grid", methods=["GET"])
+@MODELS.requires(COMPONENT)
+def risk_tile_grid():
+    return jsonify({**tile_cache.grid.to_dict(), "buckets": int(tile_cache.risk.shape[0]), "bytes": tile_cache.nbytes})
+
+
+# ROUTE: Risk along an itinerary path
+
+ROUTE_SPACING_KM = float(os.environ.get("RISK_ROUTE_SPACING_KM", "2.0"))
+MAX_ROUTE_SAMPLES = int(os.environ.get("RISK_MAX_ROUTE_SAMPLES", "2000"))
+# Every leg is sampled at both of its ends, so the waypoint count bounds the samples from below
+MAX_ROUTE_WAYPOINTS = int(os.environ.get("RISK_MAX_ROUTE_WAYPOINTS", "200"))
+
+
+def _waypoint_coords(waypoints):
+    lat = np.array([float(w.get("latitude", w.get("lat"))) for w in waypoints])
+    lon = np.array([float(w.get("longitude", w.get("lon", w.get("lng")))) for w in waypoints])
+    if np.isnan(lat).any() or np.isnan(lon).any():
+        raise ValueError("every waypoint needs a latitude and longitude")
+    return lat, lon
+
+
+def score_route(lat, lon, spacing_km, start, speed_kmh=None, overrides=None):
+    """Densify the path and score every sample point in one batched pass through the risk stack."""
+    with stage_timer(COMPONENT, "features"):
+        path_km = float(np.sum(haversine_distance(lat[:-1], lon[:-1], lat[1:], lon[1:])))
+        # Keep the batch bounded on very long routes by widening the spacing: a
+        # leg of x km takes at most x / spacing + 2 samples
+        n_legs = max(len(lat) - 1, 0)
+        spacing_km = max(spacing_km, path_km / max(MAX_ROUTE_SAMPLES - 2 * n_legs, 1))
+        s_lat, s_lon, segment, km = densify_path(lat, lon, spacing_km)
+
+        # Latest known conditions of each sample's grid cell; request overrides apply to every point
+        cells = tile_cache.grid.cell_of(s_lat, s_lon)
+        conditions = np.where(
+            (cells >= 0)[:, None],
+            tile_cache.conditions[np.maximum(cells, 0)],
+            np.array([DEFAULT_CONDITIONS[col] for col in tile_cache.columns], dtype=np.float32),
+        )
+        frame = pd.DataFrame(conditions.astype(float), columns=tile_cache.columns)
+        for col, value in (overrides or {}).items():
+            frame[col] = value
+
+        # With a travel speed, each sample is scored at its own ETA
+        offsets = pd.to_timedelta(km / speed_kmh, unit="h") if speed_kmh else pd.to_timedelta(np.zeros(len(km)), unit="h")
+        frame["timestamp"] = start + offsets
+
+    with stage_timer(COMPONENT, "route_predict"):
+        preds = risk_model.predict_frame(frame)
+
+    return s_lat, s_lon, segment, km, frame["timestamp"], preds
+
+
+@component3_bp.route("/route", methods=["POST"])
+@MODELS.requires(COMPONENT)
+def predict_route_risk():
+    data = request.json or {}
+    waypoints = data.get("waypoints", data.get("selected_attractions")) if isinstance(data, dict) else None
+
+    try:
+        if not isinstance(waypoints, list) or len(waypoints) < 1:
+            raise ValueError("Expected a list of waypoints under 'waypoints'")
+        if len(waypoints) > MAX_ROUTE_WAYPOINTS:
+            raise ValueError(f"At most {MAX_ROUTE_WAYPOINTS} waypoints per route")
+        lat, lon = _waypoint_coords(waypoints)
+        spacing_km = float(data.get("spacing_km", ROUTE_SPACING_KM))
+        speed_kmh = float(data["speed_kmh"]) if data.get("speed_kmh") else None
+        if spacing_km <= 0 or (speed_kmh is not None and speed_kmh <= 0):
+            raise ValueError("spacing_km and speed_kmh must be positive")
+        start = pd.to_datetime(data.get("timestamp", datetime.utcnow().isoformat()))
+        conditions = data.get("conditions") or {}
+        if not isinstance(conditions, dict):
+            raise ValueError("'conditions' must be an object of condition values")
+        overrides = {col: float(value) for col, value in conditions.items() if col in tile_cache.columns}
+    except (TypeError, ValueError, AttributeError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    s_lat, s_lon, segment, km, times, preds = score_route(lat, lon, spacing_km, start, speed_kmh, overrides=overrides)
+    risk = preds["risk_score"].to_numpy()
+
+    with stage_timer(COMPONENT, "route_aggregate"):
+        n_segments = max(len(waypoints) - 1, 1)
+        counts = np.bincount(segment, minlength=n_segments)
+        seg_mean = np.bincount(segment, weights=risk, minlength=n_segments) / np.maximum(counts, 1)
+        seg_max = np.full(n_segments, -np.inf)
+        np.maximum.at(seg_max, segment, risk)
+
+        def waypoint_name(k):
+            return waypoints[k].get("name", k)
+
+        segments = [
+            {
+                "from": waypoint_name(k),
+                "to": waypoint_name(min(k + 1, len(waypoints) - 1)),
+                "length_km": float(km[segment == k].max() - km[segment == k].min()),
+                "samples": int(counts[k]),
+                "max_risk": float(seg_max[k]),
+                "mean_risk": float(seg_mean[k]),
+            }
+            for k in range(n_segments)
+        ]
+
+        worst = int(np.argmax(risk))
+        category = preds["risk_category"].iloc[worst]
+        hotspot = {
+            "latitude": float(s_lat[worst]),
+            "longitude": float(s_lon[worst]),
+            "segment": int(segment[worst]),
+            "km_from_start": float(km[worst]),
+            "timestamp": pd.Timestamp(times.iloc[worst]).isoformat(),
+            "risk_score": float(risk[worst]),
+            "risk_category": LABEL_MAP.get(category, category),
+            "severity_level": float(preds["severity_level"].iloc[worst]),
+        }
+
+    with stage_timer(COMPONENT, "serialize"):
+        return jsonify({
+            "total_km": float(km.max()) if len(km) else 0.0,
+            "samples": int(len(risk)),
+            "max_risk": float(risk.max()),
+            "mean_risk": float(risk.mean()),
+            "segments": segments,
+            "hotspot": hotspot,
+        })
+
+
+# ROUTE: Hourly risk forecast for one location
+
+FORECAST_MAX_HOURS = int(os.environ.get("RISK_FORECAST_MAX_HOURS", "168"))
+
+
+def _condition_values(data):
+    """{column: value} for the condition fields (or aliases) a request object carries."""
+    values = {}
+    for col, alias, _ in CONDITION_FIELDS:
+        value = data.get(col, data.get(alias)) if alias else data.get(col)
+        if value is not None:
+            values[col] = float(value)
+    return values
+
+
+def forecast_frame(data, start, hours):
+    """One row of conditions per hour from start, plus the conditions version they came from (or None).
+
+    Starting point: the location's stored conditions if a feed has written
+    its cell, else the request's fields with the usual defaults and
+    server-side accident/incident counts. An optional hourly weather/traffic
+    series ("forecast": [{timestamp?, fields...}]) then overrides each hour
+    from the entry in effect at that time; entries without a timestamp are
+    taken as consecutive hours from start.
+    """
+    base = {col: default for col, _, default in CONDITION_FIELDS}
+    version = None
+    has_location = data.get("latitude") is not None and data.get("longitude") is not None
+    cell = tile_cache.grid.cell_of([float(data["latitude"])], [float(data["longitude"])])[0] if has_location else -1
+
+    if cell >= 0 and tile_cache.observed[cell]:
+        base.update(zip(tile_cache.columns, tile_cache.conditions[cell].astype(float)))
+        version = int(tile_cache.version[cell])
+        base.update(_condition_values(data))
+    else:
+        filled = fill_event_counts([{**data, "timestamp": start.isoformat()}], start.isoformat())[0]
+        base.update(_condition_values(filled))
+
+    times = start + pd.to_timedelta(np.arange(hours), unit="h")
+    frame = pd.DataFrame({col: np.full(hours, base[col]) for col, _, _ in CONDITION_FIELDS})
+
+    series = data.get("forecast") or []
+    if series:
+        entry_times = pd.DatetimeIndex([
+            pd.Timestamp(e["timestamp"]) if e.get("timestamp") is not None else start + pd.Timedelta(hours=k)
+            for k, e in enumerate(series)
+        ])
+        order = np.argsort(entry_times.asi8, kind="stable")
+        entries = pd.DataFrame([_condition_values(series[k]) for k in order], columns=frame.columns)
+        in_effect = np.searchsorted(entry_times.asi8[order], times.asi8, side="right") - 1
+        covered = in_effect >= 0
+        overrides = entries.iloc[in_effect[covered]].to_numpy(dtype=float)
+        values = frame.to_numpy(dtype=float)
+        values[covered] = np.where(np.isnan(overrides), values[covered], overrides)
+        frame = pd.DataFrame(values, columns=frame.columns)
+
+    frame["timestamp"] = times
+    return frame, version
+
+
+def _best_window(risk, width):
+    """Start index of the lowest-mean run of `width` consecutive hours."""
+    means = np.convolve(risk, np.ones(width) / width, mode="valid")
+    return int(np.argmin(means)), float(means.min())
+
+
+@component3_bp.route("/forecast", methods=["POST"])
+@MODELS.requires(COMPONENT)
+def forecast_risk():
+    data = request.json or {}
+
+    try:
+        if not isinstance(data, dict):
+            raise ValueError("Expected a JSON object")
+        hours = int(data.get("hours", 24))
+        visit_hours = int(data.get("visit_hours", 1))
+        if not 1 <= hours <= FORECAST_MAX_HOURS:
+            raise ValueError(f"hours must be between 1 and {FORECAST_MAX_HOURS}")
+        if not 1 <= visit_hours <= hours:
+            raise ValueError("visit_hours must be between 1 and hours")
+        series = data.get("forecast") or []
+        if not isinstance(series, list) or not all(isinstance(e, dict) for e in series):
+            raise ValueError("'forecast' must be a list of objects")
+        start = pd.Timestamp(data.get("timestamp", datetime.utcnow().isoformat())).floor("h")
+        with stage_timer(COMPONENT, "features"):
+            frame, version = forecast_frame(data, start, hours)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Base learners run once per distinct conditions row, the fusion net once over all hours
+    with stage_timer(COMPONENT, "forecast_predict"):
+        preds = risk_model.predict_frame(frame)
+
+    risk = preds["risk_score"].to_numpy()
+    severity = preds["severity_level"].to_numpy()
+    categories = [LABEL_MAP.get(cls, cls) for cls in preds["risk_category"]]
+    times = list(frame["timestamp"])
+    best_start, best_mean = _best_window(risk, visit_hours)
+
+    def hour_entry(k):
+        return {
+            "timestamp": times[k].isoformat(),
+            "risk_score": float(risk[k]),
+            "risk_category": categories[k],
+            "severity_level": float(severity[k]),
+        }
+
+    with stage_timer(COMPONENT, "serialize"):
+        return jsonify({
+            "start": start.isoformat(),
+            "hours": hours,
+            "conditions_version": version,
+            "distinct_conditions": int(len(np.unique(frame[list(tile_cache.columns)].to_numpy(), axis=0))),
+            "curve": [hour_entry(k) for k in range(hours)],
+            "lowest": hour_entry(int(np.argmin(risk))),
+            "highest": hour_entry(int(np.argmax(risk))),
+            "best_window": {
+                "start": times[best_start].isoformat(),
+                "end": (times[best_start] + pd.Timedelta(hours=visit_hours)).isoformat(),
+                "mean_risk": best_mean,
+            },
+        })
+
+
+# ROUTES: Live incident ingestion (sliding-window counts per grid cell)
+
+@component3_bp.route("/incidents", methods=["POST"])
+@MODELS.requires(COMPONENT)
+def ingest_incidents():
+    data = request.json or {}
+    events = data.get("events", []) if isinstance(data, dict) else data
+
+    if not isinstance(events, list) or not all(
+        isinstance(e, dict) and e.get("latitude") is not None and e.get("longitude") is not None for e in events
+    ):
+        return jsonify({"error": "Expected a list of events with latitude/longitude under 'events'"}), 400
+
+    now = datetime.utcnow().isoformat()
+    with stage_timer(COMPONENT, "incident_ingest"):
+        accepted = incident_stream.add(
+            [float(e["latitude"]) for e in events],
+            [float(e["longitude"]) for e in events],
+            [e.get("timestamp", now) for e in events],
+            [e.get("event_type", "incident") for e in events],
+        )
+
+    return jsonify({"accepted": accepted, "rejected": len(events) - accepted, **incident_stream.status()})
+
+
+@component3_bp.route("/incidents/counts", methods=["GET"])
+@MODELS.requires(COMPONENT)
+def incident_counts():
+    lat = request.args.get("latitude", type=float)
+    lon = request.args.get("longitude", type=float)
+    if lat is None or lon is None:
+        return jsonify({"error": "latitude and longitude are required"}), 400
+
+    accidents, incidents = incident_stream.counts(lat, lon)
+    return jsonify({
+        "num_recent_accidents": accidents,
+        "num_recent_incidents": incidents,
+        **incident_stream.status(),
+    })
+
+
+# ROUTES: Conditions store (feeds write, risk is precomputed once per write)
+
+@component3_bp.route("/conditions", methods=["POST"])
+@MODELS.requires(COMPONENT)
+def update_conditions():
+    data = request.json or {}
+    updates = data.get("updates", []) if isinstance(data, dict) else data
+
+    if not isinstance(updates, list) or not all(
+        isinstance(u, dict) and u.get("latitude") is not None and u.get("longitude") is not None for u in updates
+    ):
+        return jsonify({"error": "Expected a list of updates with latitude/longitude under 'updates'"}), 400
+
+    # Aliases map to model columns; fields an update doesn't carry keep the cell's stored value
+    now = datetime.utcnow().isoformat()
+    rows = []
+    try:
+        for u in updates:
+            row = _condition_values(u)
+            if row and tile_cache.grid.cell_of([float(u["latitude"])], [float(u["longitude"])])[0] >= 0:
+                rows.append({"latitude": float(u["latitude"]), "longitude": float(u["longitude"]),
+                             "timestamp": u.get("timestamp", now), **row})
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Condition values must be numeric: {e}"}), 400
+
+    with stage_timer(COMPONENT, "store_update"):
+        cells = tile_cache.update(pd.DataFrame(rows)) if rows else np.array([], dtype=int)
+
+    return jsonify({
+        "accepted": len(rows),
+        "rejected": len(updates) - len(rows),
+        "cells": [{"cell": int(c), "version": int(tile_cache.version[c])} for c in cells],
+    })
+
+
+@component3_bp.route("/conditions", methods=["GET"])
+@MODELS.requires(COMPONENT)
+def stored_conditions():
+    lat = request.args.get("latitude", type=float)
+    lon = request.args.get("longitude", type=float)
+    if lat is None or lon is None:
+        return jsonify({"error": "latitude and longitude are required"}), 400
+
+    cell = int(tile_cache.grid.cell_of([lat], [lon])[0])
+    if cell < 0:
+        return jsonify({"error": "Location is outside the risk grid"}), 404
+
+    observed_at = tile_cache.observed_at[cell]
+    return jsonify({
+        "cell": cell,
+        "observed": bool(tile_cache.observed[cell]),
+        "observed_at": None if np.isnat(observed_at) else pd.Timestamp(observed_at).isoformat(),
+        "version": int(tile_cache.version[cell]),
+        "conditions": {col: float(v) for col, v in zip(tile_cache.columns, tile_cache.conditions[cell])},
+    })
+
+
+# ROUTE: Hour-of-week historical priors
+
+@component3_bp.route("/prior", methods=["GET"])
+@MODELS.requires(COMPONENT)
+def historical_prior():
+    if risk_prior is None:
+        return jsonify({"error": "No historical prior loaded"}), 404
+
+    lat = request.args.get("latitude", type=float)
+    lon = request.args.get("longitude", type=float)
+    try:
+        if lat is None or lon is None:
+            raise ValueError("latitude and longitude are required")
+        day, hour = _request_bucket()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    values = risk_prior.lookup(lat, lon, day, hour)[0]
+    if np.isnan(values).any():
+        return jsonify({"error": "Location is outside the prior grid"}), 404
+
     return jsonify({
-        "risk_score": risk_score,
-        "risk_category": risk_category,
-        "severity_level": severity,
-        "weather_risk": w,
-        "traffic_risk": t,
-        "incident_risk": i,
-        "category_probabilities": category_probabilities
+        "day_of_week": day,
+        "hour_of_day": hour,
+        "weeks_of_history": risk_prior.meta["weeks_of_history"],
+        "prior": {name: float(v) for name, v in zip(risk_prior.fields, values)},
     })
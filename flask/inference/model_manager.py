@@ -0,0 +1,137 @@
+import threading
+import time
+import traceback
+from functools import wraps
+
+from flask import jsonify
+
+from ml_common.metrics import MODEL_LOAD_SECONDS, stage_timers_off
+
+
+# Background model loading for the blueprints.
+#
+# Each component registers a load function (reads artifacts into the
+# module's globals) and a warm-up function (one synthetic inference through
+# every stage). start() runs both on a daemon thread per component, so
+# create_app() returns immediately and routes answer 503 until their
+# component is warm. Warm-up requests stay out of the stage histograms.
+
+PENDING, LOADING, WARMING, READY, FAILED = "pending", "loading", "warming", "ready", "failed"
+
+RETRY_AFTER_SECONDS = 5
+
+
+class ComponentLoader:
+    def __init__(self, name, load_fn, warmup_fn=None):
+        self.name = name
+        self.load_fn = load_fn
+        self.warmup_fn = warmup_fn
+        self.state = PENDING
+        self.error = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self._ready = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.state == READY
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name=f"load-{self.name}", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        try:
+            self.state = LOADING
+            start = time.perf_counter()
+            self.load_fn()
+            self.load_seconds = time.perf_counter() - start
+            MODEL_LOAD_SECONDS.set(self.load_seconds, component=self.name)
+
+            if self.warmup_fn is not None:
+                self.state = WARMING
+                start = time.perf_counter()
+                with stage_timers_off():
+                    self.warmup_fn()
+                self.warmup_seconds = time.perf_counter() - start
+
+            self.state = READY
+        except Exception as e:
+            self.state = FAILED
+            self.error = f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+        finally:
+            self._ready.set()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Start loading if needed and block until it finishes; True if the component is ready."""
+        self.start()
+        self._ready.wait(timeout)
+        return self.ready
+
+    def status(self):
+        info = {"state": self.state}
+        if self.load_seconds is not None:
+            info["load_seconds"] = round(self.load_seconds, 3)
+        if self.warmup_seconds is not None:
+            info["warmup_seconds"] = round(self.warmup_seconds, 3)
+        if self.error:
+            info["error"] = self.error
+        return info
+
+
+class ModelManager:
+    def __init__(self):
+        self.components = {}
+
+    def register(self, name, load_fn, warmup_fn=None) -> ComponentLoader:
+        return self.components.setdefault(name, ComponentLoader(name, load_fn, warmup_fn))
+
+    def start(self):
+        for component in self.components.values():
+            component.start()
+
+    def wait(self, timeout: float = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for component in self.components.values():
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+            component.wait(remaining)
+        return self.ready
+
+    @property
+    def ready(self) -> bool:
+        return all(c.ready for c in self.components.values())
+
+    def status(self):
+        return {name: c.status() for name, c in self.components.items()}
+
+    def unavailable(self, name):
+        """503 response (with Retry-After unless loading failed) if component `name` isn't warm, else None."""
+        component = self.components[name]
+        if component.ready:
+            return None
+        response = jsonify({"error": f"{name} models are not ready", **component.status()})
+        response.status_code = 503
+        if component.state != FAILED:
+            response.headers["Retry-After"] = str(RETRY_AFTER_SECONDS)
+        return response
+
+    def requires(self, name):
+        """Route decorator: 503 with Retry-After until component `name` is warm."""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                response = self.unavailable(name)
+                if response is not None:
+                    return response
+                return view(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+MODELS = ModelManager()
@@ -0,0 +1,154 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+
+# Precompiled replacement for the itinerary pipelines' ColumnTransformer
+# (OneHotEncoder on the categorical columns + passthrough numerics).
+#
+# The category -> output column maps and numeric positions are fixed at
+# training time, so a request can be written straight into the dense matrix
+# the booster expects without sklearn re-validating columns and dtypes.
+
+ENCODERS_FILENAME = "encoders.json"
+
+
+class CompiledEncoder:
+    def __init__(self, categorical, numeric, n_outputs, zeros_missing=False):
+        # categorical: list of (column, {category: output index})
+        # numeric: list of (column, output index)
+        self.categorical = categorical
+        self.numeric = numeric
+        self.n_outputs = n_outputs
+        # The fitted ColumnTransformer emitted a sparse matrix, and XGBoost
+        # treats entries that aren't stored (i.e. zeros) as missing.
+        self.zeros_missing = zeros_missing
+
+    @classmethod
+    def from_column_transformer(cls, ct) -> "CompiledEncoder":
+        categorical, numeric = [], []
+
+        for name, trans, cols in ct.transformers_:
+            if trans == "drop" or name == "remainder":
+                continue
+            out = ct.output_indices_[name]
+
+            if type(trans).__name__ == "OneHotEncoder":
+                if getattr(trans, "drop_idx_", None) is not None or getattr(trans, "infrequent_categories_", None):
+                    raise ValueError("Only plain one-hot encoding (no drop / infrequent categories) can be compiled")
+                offset = out.start
+                for col, cats in zip(cols, trans.categories_):
+                    categorical.append((col, {_key(c): offset + i for i, c in enumerate(cats)}))
+                    offset += len(cats)
+            elif trans == "passthrough" or type(trans).__name__ == "FunctionTransformer" and trans.func is None:
+                numeric.extend((col, out.start + i) for i, col in enumerate(cols))
+            else:
+                raise ValueError(f"Unsupported transformer for compilation: {name}")
+
+        n_outputs = max(s.stop for s in ct.output_indices_.values())
+        return cls(categorical, numeric, n_outputs, zeros_missing=bool(ct.sparse_output_))
+
+    @property
+    def columns(self):
+        return [col for col, _ in self.categorical] + [col for col, _ in self.numeric]
+
+    def transform(self, X, n_rows: int = None) -> np.ndarray:
+        """Encode a DataFrame, a list of records, or a dict of columns (scalars broadcast)."""
+        if isinstance(X, list):
+            n_rows = len(X)
+            X = {col: [r.get(col) for r in X] for col in self.columns}
+        elif hasattr(X, "columns"):
+            n_rows = len(X)
+        elif n_rows is None:
+            n_rows = max((len(v) for v in X.values() if np.ndim(v) > 0), default=1)
+
+        out = np.zeros((n_rows, self.n_outputs), dtype=np.float32)
+        rows = np.arange(n_rows)
+
+        for col, mapping in self.categorical:
+            values = _column(X, col)
+            if np.ndim(values) == 0:
+                idx = mapping.get(_key(values), -1)
+                if idx >= 0:
+                    out[:, idx] = 1.0
+                continue
+            idx = np.fromiter((mapping.get(_key(v), -1) for v in values), dtype=np.int64, count=n_rows)
+            known = idx >= 0
+            out[rows[known], idx[known]] = 1.0
+
+        for col, pos in self.numeric:
+            out[:, pos] = np.asarray(_column(X, col), dtype=np.float32)
+
+        if self.zeros_missing:
+            out[out == 0.0] = np.nan
+        return out
+
+    def to_dict(self):
+        return {
+            "categorical": [[col, list(mapping.items())] for col, mapping in self.categorical],
+            "numeric": self.numeric,
+            "n_outputs": self.n_outputs,
+            "zeros_missing": self.zeros_missing,
+        }
+
+    @classmethod
+    def from_dict(cls, d) -> "CompiledEncoder":
+        categorical = [(col, {_key(k): v for k, v in items}) for col, items in d["categorical"]]
+        numeric = [(col, pos) for col, pos in d["numeric"]]
+        return cls(categorical, numeric, d["n_outputs"], d["zeros_missing"])
+
+
+def _key(value):
+    # Categories come out of pandas as numpy scalars; JSON round-trips them as
+    # plain Python values. Normalize so 2, np.int64(2) and 2.0 all match.
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return value
+
+
+def _column(X, col):
+    if hasattr(X, "columns"):
+        return X[col].to_numpy() if col in X.columns else np.nan
+    return X.get(col, np.nan)
+
+
+def compile_preprocessor(preprocess):
+    """CompiledEncoder for a Pipeline's preprocessing, or the steps unchanged if unsupported."""
+    steps = getattr(preprocess, "steps", [(None, preprocess)])
+    if len(steps) == 1 and type(steps[0][1]).__name__ == "ColumnTransformer":
+        try:
+            return CompiledEncoder.from_column_transformer(steps[0][1])
+        except ValueError:
+            pass
+    return preprocess
+
+
+def save_encoders(encoders, models_dir: str) -> str:
+    path = os.path.join(models_dir, ENCODERS_FILENAME)
+    with open(path, "w") as f:
+        json.dump({name: enc.to_dict() for name, enc in encoders.items()}, f)
+    return path
+
+
+def load_encoders(models_dir: str):
+    path = os.path.join(models_dir, ENCODERS_FILENAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return {name: CompiledEncoder.from_dict(d) for name, d in json.load(f).items()}
+
+
+if __name__ == "__main__":
+    # Write encoders.json for an existing bundle: python -m ml_common.compiled_encoder <models_dir>
+    import joblib
+
+    models_dir = sys.argv[1]
+    encoders = {}
+    for name in ("time_model", "budget_model", "attraction_model"):
+        pipeline = joblib.load(os.path.join(models_dir, f"{name}.pkl"))
+        encoders[name] = CompiledEncoder.from_column_transformer(pipeline.named_steps["preprocess"])
+    print("Written:", save_encoders(encoders, models_dir))
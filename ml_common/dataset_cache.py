@@ -0,0 +1,254 @@
+import argparse
+import ast
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+
+# Columnar cache for the CSV datasets.
+#
+# The first read of a CSV converts it into one directory of typed .npy
+# columns next to a JSON manifest; later reads memory-map the columns
+# instead of parsing text again:
+#
+#   numeric / bool   stored as parsed by read_csv
+#   datetime         columns of ISO-like timestamps, pre-parsed to datetime64
+#   category         other text columns, dictionary-encoded (int32 codes, -1 = missing)
+#   ragged           stringified lists of integer ids ("[1, 2]" or "['1', '2']"),
+#                    stored as int64 offsets + values and read back as lists
+#
+# The manifest records the source's size, mtime and SHA-256. A stat match
+# is trusted; otherwise the file is re-hashed and the cache rebuilt only if
+# the content actually changed.
+
+FORMAT_VERSION = 1
+CACHE_DIR_ENV = "DATASET_CACHE_DIR"
+
+_TIMESTAMP = re.compile(r"^\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?$")
+_INT = re.compile(r"^-?\d+$")
+
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_path_for(path: str, cache_dir: str = None) -> str:
+    """Cache directory for a CSV: <cache_dir or $DATASET_CACHE_DIR or <csv dir>/.cache>/<name>.<path hash>."""
+    source = os.path.abspath(path)
+    root = cache_dir or os.environ.get(CACHE_DIR_ENV) or os.path.join(os.path.dirname(source), ".cache")
+    key = hashlib.sha1(source.encode()).hexdigest()[:10]
+    return os.path.join(root, f"{os.path.basename(source)}.{key}")
+
+
+def _parse_ragged(values: pd.Series):
+    """(offsets, values, element) if every non-missing value is a list of integer ids, else None."""
+    present = values.dropna()
+    if len(present) == 0 or not all(v.startswith("[") and v.endswith("]") for v in present):
+        return None
+    lengths, flat, element = [], [], None
+    for v in values:
+        try:
+            items = [] if isinstance(v, float) else ast.literal_eval(v)
+        except (ValueError, SyntaxError):
+            # Bracketed free text such as "[see notes]" stays a category column
+            return None
+        if not isinstance(items, (list, tuple)):
+            return None
+        for item in items:
+            kind = "int" if isinstance(item, int) else "str" if isinstance(item, str) and _INT.match(item) else None
+            if kind is None or element not in (None, kind):
+                return None
+            element = kind
+            flat.append(int(item))
+        lengths.append(len(items))
+    offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+    return offsets, np.asarray(flat, dtype=np.int64), element or "int"
+
+
+def _encode_column(values: pd.Series):
+    """(kind, arrays, extra manifest fields) for one column as read_csv parsed it."""
+    if values.dtype != object:
+        return "numeric", {"": values.to_numpy()}, {}
+
+    present = values.dropna()
+    if len(present) and all(_TIMESTAMP.match(v) for v in present):
+        return "datetime", {"": pd.to_datetime(values).to_numpy()}, {}
+
+    ragged = _parse_ragged(values)
+    if ragged is not None:
+        offsets, flat, element = ragged
+        return "ragged", {".offsets": offsets, ".values": flat}, {"element": element}
+
+    codes, categories = pd.factorize(values, sort=True)
+    return "category", {"": codes.astype(np.int32)}, {"categories": categories.tolist()}
+
+
+def build_cache(path: str, cache_dir: str = None, sha256: str = None) -> str:
+    """Convert a CSV into its columnar cache (replacing any previous one); returns the cache directory."""
+    target = cache_path_for(path, cache_dir)
+    stat = os.stat(path)
+    sha256 = sha256 or file_sha256(path)
+    df = pd.read_csv(path)
+
+    tmp = f"{target}.tmp-{os.getpid()}-{time.monotonic_ns()}"
+    os.makedirs(tmp)
+    try:
+        columns = []
+        for i, name in enumerate(df.columns):
+            kind, arrays, extra = _encode_column(df[name])
+            for suffix, array in arrays.items():
+                np.save(os.path.join(tmp, f"{i}{suffix}.npy"), array, allow_pickle=False)
+            columns.append({"name": name, "kind": kind, **extra})
+
+        manifest = {
+            "format_version": FORMAT_VERSION,
+            "source": os.path.abspath(path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": sha256,
+            "rows": len(df),
+            "columns": columns,
+        }
+        with open(os.path.join(tmp, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        if os.path.exists(target):
+            shutil.rmtree(target, ignore_errors=True)
+        os.rename(tmp, target)
+    except OSError:
+        # Another process published the same cache first; theirs is as good as ours
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not os.path.exists(os.path.join(target, "manifest.json")):
+            raise
+    return target
+
+
+def _read_manifest(target: str):
+    try:
+        with open(os.path.join(target, "manifest.json")) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("format_version") == FORMAT_VERSION else None
+
+
+def ensure_cache(path: str, cache_dir: str = None):
+    """(cache directory, manifest), rebuilding the cache if the source's content changed."""
+    target = cache_path_for(path, cache_dir)
+    manifest = _read_manifest(target)
+    stat = os.stat(path)
+    if manifest is not None and (manifest["size"], manifest["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+        return target, manifest
+
+    sha256 = file_sha256(path)
+    if manifest is not None and manifest["sha256"] == sha256:
+        # Touched but unchanged: remember the new stat so the next read skips hashing
+        manifest.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        with open(os.path.join(target, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+        return target, manifest
+
+    target = build_cache(path, cache_dir, sha256=sha256)
+    return target, _read_manifest(target)
+
+
+def _load(target: str, i: int, suffix: str = "", mmap: bool = True) -> np.ndarray:
+    return np.load(os.path.join(target, f"{i}{suffix}.npy"), mmap_mode="r" if mmap else None)
+
+
+def _decode_column(target: str, i: int, column: dict):
+    kind = column["kind"]
+    if kind in ("numeric", "datetime"):
+        return _load(target, i)
+    if kind == "category":
+        # Code -1 (missing) picks the trailing NaN
+        categories = np.array(column["categories"] + [np.nan], dtype=object)
+        return categories[_load(target, i)]
+    offsets, values = _load(target, i, ".offsets", mmap=False), _load(target, i, ".values", mmap=False)
+    if column["element"] == "str":
+        # Convert each distinct id once
+        ids, inverse = np.unique(values, return_inverse=True)
+        items = np.array(ids.astype(str), dtype=object)[inverse].tolist()
+    else:
+        items = values.tolist()
+    return pd.Series([items[a:b] for a, b in zip(offsets[:-1], offsets[1:])], dtype=object)
+
+
+def read_dataset(path: str, columns=None, cache_dir: str = None) -> pd.DataFrame:
+    """pd.read_csv(path, usecols=columns) through the columnar cache.
+
+    Differences from read_csv: timestamp columns come back as datetime64 and
+    ragged id-list columns as Python lists (parse_selected_list and friends
+    accept both). Falls back to read_csv when the cache can't be written.
+    """
+    try:
+        target, manifest = ensure_cache(path, cache_dir)
+    except OSError:
+        return pd.read_csv(path, usecols=columns)
+
+    wanted = None if columns is None else set(columns)
+    if wanted is not None:
+        missing = wanted - {c["name"] for c in manifest["columns"]}
+        if missing:
+            raise ValueError(f"Columns not in {path}: {sorted(missing)}")
+    data = {
+        column["name"]: _decode_column(target, i, column)
+        for i, column in enumerate(manifest["columns"])
+        if wanted is None or column["name"] in wanted
+    }
+    return pd.DataFrame(data, index=pd.RangeIndex(manifest["rows"]))
+
+
+def read_ragged(path: str, column: str, cache_dir: str = None):
+    """(offsets, values) of a ragged id-list column: row i's ids are values[offsets[i]:offsets[i + 1]]."""
+    target, manifest = ensure_cache(path, cache_dir)
+    for i, entry in enumerate(manifest["columns"]):
+        if entry["name"] == column:
+            if entry["kind"] != "ragged":
+                raise ValueError(f"{path}:{column} is stored as {entry['kind']}, not as a ragged id list")
+            return _load(target, i, ".offsets"), _load(target, i, ".values")
+    raise ValueError(f"Column not in {path}: {column}")
+
+
+if __name__ == "__main__":
+    # Build (or validate) the caches and compare load times with read_csv:
+    #   python -m ml_common.dataset_cache datasets/*.csv
+    parser = argparse.ArgumentParser()
+    parser.add_argument("csv", nargs="+")
+    parser.add_argument("--cache-dir")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    def best_of(fn):
+        times = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        return min(times) * 1e3
+
+    for path in args.csv:
+        target, manifest = ensure_cache(path, args.cache_dir)
+        kinds = {}
+        for column in manifest["columns"]:
+            kinds.setdefault(column["kind"], []).append(column["name"])
+        csv_ms = best_of(lambda: pd.read_csv(path))
+        cache_ms = best_of(lambda: read_dataset(path, cache_dir=args.cache_dir))
+        print(json.dumps({
+            "source": path,
+            "cache": target,
+            "rows": manifest["rows"],
+            "columns": kinds,
+            "read_csv_ms": round(csv_ms, 2),
+            "cached_ms": round(cache_ms, 2),
+        }))
@@ -0,0 +1,111 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from ml_common.geo import EARTH_RADIUS_KM, haversine_distance
+from ml_common.risk_grid import RiskGrid
+
+
+# In-process spatio-temporal index over risk_events_historical.csv.
+#
+# Events are bucketed into grid cells and stored sorted by (cell, time) in
+# flat arrays with per-cell offsets (CSR layout). A "within R km in the last
+# T hours" query only touches the cells overlapping the circle's bounding box,
+# binary-searches each cell's time range, and runs haversine on what is left.
+
+ACCIDENT_TYPES = ("accident",)
+KM_PER_DEG_LAT = math.pi * EARTH_RADIUS_KM / 180.0
+
+
+def radius_window(grid: RiskGrid, lat: float, lon: float, radius_km: float):
+    """(row slice, col slice) of the grid cells a radius_km circle around (lat, lon) can reach."""
+    dlat = radius_km / KM_PER_DEG_LAT
+    dlon = radius_km / (KM_PER_DEG_LAT * max(math.cos(math.radians(lat)), 1e-6))
+    return grid.window(lat - dlat, lon - dlon, lat + dlat, lon + dlon)
+
+
+def _epoch_seconds(when) -> int:
+    return int(pd.Timestamp(when).to_datetime64().astype("datetime64[s]").astype(np.int64))
+
+
+class EventIndex:
+    def __init__(self, latitudes, longitudes, timestamps, event_types, severity=None, cell_deg: float = 0.1):
+        lat = np.asarray(latitudes, dtype=float)
+        lon = np.asarray(longitudes, dtype=float)
+        times = pd.to_datetime(pd.Series(timestamps), errors="coerce").to_numpy(dtype="datetime64[s]")
+        is_accident = np.isin(np.asarray(event_types, dtype=object), ACCIDENT_TYPES)
+        severity = np.zeros(len(lat)) if severity is None else np.asarray(severity, dtype=float)
+
+        keep = ~(np.isnan(lat) | np.isnan(lon) | np.isnat(times))
+        lat, lon, times, is_accident, severity = lat[keep], lon[keep], times[keep], is_accident[keep], severity[keep]
+
+        if len(lat):
+            bounds = (lat.min() - cell_deg, lon.min() - cell_deg, lat.max() + cell_deg, lon.max() + cell_deg)
+        else:
+            bounds = (0.0, 0.0, cell_deg, cell_deg)
+        self.grid = RiskGrid(bounds=bounds, cell_deg=cell_deg)
+
+        cells = self.grid.cell_of(lat, lon)
+        order = np.lexsort((times.astype(np.int64), cells))
+        self.cells = cells[order]
+        self.lat = lat[order]
+        self.lon = lon[order]
+        self.times = times[order].astype(np.int64)  # epoch seconds
+        self.is_accident = is_accident[order]
+        self.severity = severity[order]
+        self.cell_start = np.searchsorted(self.cells, np.arange(self.grid.n_cells + 1))
+        self.span = (int(self.times.min()), int(self.times.max())) if len(self.times) else None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, cell_deg: float = 0.1) -> "EventIndex":
+        return cls(
+            df["latitude"], df["longitude"], df["timestamp"], df["event_type"],
+            severity=df["severity"] if "severity" in df.columns else None, cell_deg=cell_deg,
+        )
+
+    @classmethod
+    def from_csv(cls, path: str, cell_deg: float = 0.1) -> "EventIndex":
+        return cls.from_frame(pd.read_csv(path), cell_deg=cell_deg)
+
+    def __len__(self):
+        return len(self.times)
+
+    def covers(self, until, window_hours: float) -> bool:
+        """Whether the recorded history spans the whole (until - window, until] window."""
+        if self.span is None:
+            return False
+        end = _epoch_seconds(until)
+        return self.span[0] <= end - int(window_hours * 3600) and end <= self.span[1]
+
+    def query(self, lat: float, lon: float, radius_km: float, until, window_hours: float):
+        """Positions (into the sorted arrays) of events within radius_km of (lat, lon) in (until - window, until]."""
+        end = _epoch_seconds(until)
+        start = end - int(window_hours * 3600)
+
+        rows, cols = radius_window(self.grid, lat, lon, radius_km)
+
+        hits = []
+        for row in range(rows.start, rows.stop):
+            first = row * self.grid.n_cols
+            for cell in range(first + cols.start, first + cols.stop):
+                a, b = self.cell_start[cell], self.cell_start[cell + 1]
+                if a == b:
+                    continue
+                ts = self.times[a:b]
+                i0 = a + np.searchsorted(ts, start, side="right")
+                i1 = a + np.searchsorted(ts, end, side="right")
+                if i0 < i1:
+                    hits.append(np.arange(i0, i1))
+
+        if not hits:
+            return np.array([], dtype=int)
+        idx = np.concatenate(hits)
+        dist = haversine_distance(lat, lon, self.lat[idx], self.lon[idx])
+        return idx[dist <= radius_km]
+
+    def recent_counts(self, lat: float, lon: float, radius_km: float, until, window_hours: float):
+        """(num_recent_accidents, num_recent_incidents); incidents are every non-accident event."""
+        idx = self.query(lat, lon, radius_km, until, window_hours)
+        accidents = int(np.count_nonzero(self.is_accident[idx]))
+        return accidents, len(idx) - accidents
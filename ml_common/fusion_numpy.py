@@ -0,0 +1,141 @@
+import os
+import sys
+
+import numpy as np
+
+
+# Pure-NumPy inference for the small Keras fusion networks.
+#
+# Both fusion models are a chain of Dense layers (the "trunk") followed by
+# one or more Dense output heads that all read the last trunk layer. Dropout
+# is a no-op at inference, so the exported file only needs each Dense
+# layer's kernel, bias and activation.
+#
+# The model modules import TensorFlow only inside the code that builds or
+# trains a fusion network, so serving needs it only when a .npz is missing.
+
+
+def _relu(x):
+    # Like TensorFlow's relu, NaN inputs come out as 0 rather than NaN
+    return np.where(x > 0.0, x, 0.0).astype(x.dtype)
+
+
+def _sigmoid(x):
+    return 0.5 * (1.0 + np.tanh(0.5 * x))
+
+
+def _softmax(x):
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": _relu,
+    "sigmoid": _sigmoid,
+    "softmax": _softmax,
+}
+
+
+def weights_path_for(model_path: str) -> str:
+    return os.path.splitext(model_path)[0] + ".npz"
+
+
+class NumpyFusionModel:
+    def __init__(self, trunk, heads):
+        # trunk / heads: lists of (kernel, bias, activation)
+        self.trunk = trunk
+        self.heads = heads
+
+    def predict(self, X, verbose=0):
+        """Same call signature and output layout as keras.Model.predict."""
+        h = np.asarray(X, dtype=np.float32)
+        if h.ndim == 1:
+            h = h.reshape(1, -1)
+
+        for kernel, bias, activation in self.trunk:
+            h = ACTIVATIONS[activation](h @ kernel + bias)
+
+        outputs = [ACTIVATIONS[activation](h @ kernel + bias) for kernel, bias, activation in self.heads]
+        return outputs[0] if len(outputs) == 1 else outputs
+
+    @classmethod
+    def load(cls, path: str) -> "NumpyFusionModel":
+        data = np.load(path)
+
+        def layers(prefix):
+            count = int(data[f"{prefix}_count"])
+            return [
+                (
+                    data[f"{prefix}_{i}_kernel"].astype(np.float32),
+                    data[f"{prefix}_{i}_bias"].astype(np.float32),
+                    str(data[f"{prefix}_{i}_activation"]),
+                )
+                for i in range(count)
+            ]
+
+        return cls(trunk=layers("trunk"), heads=layers("head"))
+
+
+def export_fusion_weights(keras_model, path: str) -> str:
+    """Write a Keras fusion model's Dense weights to a plain .npz array file."""
+    output_names = list(keras_model.output_names)
+
+    trunk, heads = [], {}
+    for layer in keras_model.layers:
+        if type(layer).__name__ != "Dense":
+            continue
+        kernel, bias = layer.get_weights()
+        entry = (kernel, bias, layer.get_config()["activation"])
+        if layer.name in output_names:
+            heads[layer.name] = entry
+        else:
+            trunk.append(entry)
+
+    arrays = {"trunk_count": np.array(len(trunk)), "head_count": np.array(len(output_names))}
+    ordered = [("trunk", i, entry) for i, entry in enumerate(trunk)]
+    ordered += [("head", i, heads[name]) for i, name in enumerate(output_names)]
+    for prefix, i, (kernel, bias, activation) in ordered:
+        if activation not in ACTIVATIONS:
+            raise ValueError(f"Unsupported activation for NumPy export: {activation}")
+        arrays[f"{prefix}_{i}_kernel"] = kernel
+        arrays[f"{prefix}_{i}_bias"] = bias
+        arrays[f"{prefix}_{i}_activation"] = np.array(activation)
+
+    np.savez(path, **arrays)
+    check_parity(keras_model, NumpyFusionModel.load(path))
+    return path
+
+
+def check_parity(keras_model, numpy_model: NumpyFusionModel, n_samples: int = 256, atol: float = 1e-5):
+    input_dim = int(keras_model.inputs[0].shape[-1])
+    X = np.random.RandomState(0).uniform(0.0, 1.0, size=(n_samples, input_dim)).astype(np.float32)
+
+    expected = keras_model.predict(X, verbose=0)
+    actual = numpy_model.predict(X)
+    if not isinstance(expected, list):
+        expected, actual = [expected], [actual]
+
+    for exp, act in zip(expected, actual):
+        max_err = float(np.max(np.abs(np.asarray(exp) - act)))
+        if max_err > atol:
+            raise ValueError(f"NumPy fusion output differs from Keras by {max_err:.2e} (atol={atol:.0e})")
+
+
+def load_fusion_model(model_path: str):
+    """Prefer the exported NumPy weights; fall back to Keras only if they're missing."""
+    weights_path = weights_path_for(model_path)
+    if os.path.exists(weights_path):
+        return NumpyFusionModel.load(weights_path)
+
+    from tensorflow import keras
+    return keras.models.load_model(model_path)
+
+
+if __name__ == "__main__":
+    # Export existing .h5 fusion models: python -m ml_common.fusion_numpy <model.h5> [...]
+    from tensorflow import keras
+
+    for model_path in sys.argv[1:]:
+        out = export_fusion_weights(keras.models.load_model(model_path), weights_path_for(model_path))
+        print("Exported:", out)
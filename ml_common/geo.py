@@ -0,0 +1,126 @@
+import numpy as np
+from sklearn.neighbors import BallTree
+
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_distance(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; broadcasts over NumPy arrays."""
+    lat1, lon1, lat2, lon2 = map(np.radians, [lat1, lon1, lat2, lon2])
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = np.sin(dlat / 2.0) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2.0) ** 2
+    return EARTH_RADIUS_KM * (2 * np.arcsin(np.sqrt(a)))
+
+
+class GeoIndex:
+    """Spatial index over a catalog's coordinates, built once at load time.
+
+    Radius and k-nearest queries go through a haversine BallTree on radians;
+    all-distances queries are a single vectorized haversine against the
+    precomputed radians/cosines. Rows without coordinates are never returned
+    by radius/nearest queries and get NaN distances.
+    """
+
+    def __init__(self, latitudes, longitudes):
+        self.lat = np.asarray(latitudes, dtype=float)
+        self.lon = np.asarray(longitudes, dtype=float)
+        self.lat_rad = np.radians(self.lat)
+        self.lon_rad = np.radians(self.lon)
+        self.cos_lat = np.cos(self.lat_rad)
+
+        self.valid = ~(np.isnan(self.lat) | np.isnan(self.lon))
+        self.valid_idx = np.flatnonzero(self.valid)
+        self.tree = None
+        if len(self.valid_idx):
+            points = np.column_stack([self.lat_rad[self.valid_idx], self.lon_rad[self.valid_idx]])
+            self.tree = BallTree(points, metric="haversine")
+
+    @classmethod
+    def from_frame(cls, df, lat_col: str = "latitude", lon_col: str = "longitude") -> "GeoIndex":
+        n = len(df)
+        lat = df[lat_col].to_numpy(dtype=float) if lat_col in df.columns else np.full(n, np.nan)
+        lon = df[lon_col].to_numpy(dtype=float) if lon_col in df.columns else np.full(n, np.nan)
+        return cls(lat, lon)
+
+    def __len__(self):
+        return len(self.lat)
+
+    def distances(self, lat, lon, idx=None) -> np.ndarray:
+        """Distances (km) from one point -> shape (n,), or from m points -> shape (m, n).
+
+        idx restricts the result to those catalog rows.
+        """
+        q_lat = np.radians(np.asarray(lat, dtype=float))[..., None]
+        q_lon = np.radians(np.asarray(lon, dtype=float))[..., None]
+
+        lat_rad, lon_rad, cos_lat = self.lat_rad, self.lon_rad, self.cos_lat
+        if idx is not None:
+            lat_rad, lon_rad, cos_lat = lat_rad[idx], lon_rad[idx], cos_lat[idx]
+
+        a = (
+            np.sin((lat_rad - q_lat) / 2.0) ** 2
+            + np.cos(q_lat) * cos_lat * np.sin((lon_rad - q_lon) / 2.0) ** 2
+        )
+        return EARTH_RADIUS_KM * (2 * np.arcsin(np.sqrt(a)))
+
+    def _query_points(self, lat, lon):
+        return np.radians(np.column_stack([np.atleast_1d(lat), np.atleast_1d(lon)]).astype(float))
+
+    def within(self, lat, lon, radius_km: float):
+        """Catalog rows within radius_km of (lat, lon), nearest first -> (indices, distances_km).
+
+        With arrays of query points, returns a list with one (indices, distances_km) per point.
+        """
+        scalar = np.ndim(lat) == 0
+        n_queries = 1 if scalar else len(lat)
+        if self.tree is None:
+            empty = [(np.array([], dtype=int), np.array([]))] * n_queries
+            return empty[0] if scalar else empty
+
+        ind, dist = self.tree.query_radius(
+            self._query_points(lat, lon), r=radius_km / EARTH_RADIUS_KM, return_distance=True, sort_results=True
+        )
+        results = [(self.valid_idx[i], d * EARTH_RADIUS_KM) for i, d in zip(ind, dist)]
+        return results[0] if scalar else results
+
+    def nearest(self, lat, lon, k: int):
+        """k nearest catalog rows to (lat, lon) -> (indices, distances_km), nearest first.
+
+        With arrays of query points, both outputs have shape (m, k).
+        """
+        scalar = np.ndim(lat) == 0
+        k = min(k, len(self.valid_idx))
+        if self.tree is None or k == 0:
+            shape = (0,) if scalar else (np.size(lat), 0)
+            return np.empty(shape, dtype=int), np.empty(shape)
+
+        dist, ind = self.tree.query(self._query_points(lat, lon), k=k)
+        ind, dist = self.valid_idx[ind], dist * EARTH_RADIUS_KM
+        return (ind[0], dist[0]) if scalar else (ind, dist)
+
+
+def densify_path(latitudes, longitudes, spacing_km: float):
+    """Sample points every ~spacing_km along a polyline -> (lat, lon, segment, km_from_start).
+
+    Each segment is sampled including both of its waypoints, so per-segment
+    statistics see the full leg. Interpolation is linear in lat/lon, which is
+    well within the accuracy of the risk grid at itinerary distances.
+    """
+    lat = np.asarray(latitudes, dtype=float)
+    lon = np.asarray(longitudes, dtype=float)
+    if len(lat) < 2:
+        return lat.copy(), lon.copy(), np.zeros(len(lat), dtype=int), np.zeros(len(lat))
+
+    seg_km = haversine_distance(lat[:-1], lon[:-1], lat[1:], lon[1:])
+    n_steps = np.maximum(np.ceil(seg_km / max(spacing_km, 1e-6)), 1).astype(int)
+
+    segment = np.repeat(np.arange(len(seg_km)), n_steps + 1)
+    starts = np.concatenate([[0], np.cumsum(n_steps + 1)[:-1]])
+    t = (np.arange(len(segment)) - np.repeat(starts, n_steps + 1)) / np.repeat(n_steps, n_steps + 1)
+
+    out_lat = lat[segment] + t * (lat[segment + 1] - lat[segment])
+    out_lon = lon[segment] + t * (lon[segment + 1] - lon[segment])
+    km = np.concatenate([[0], np.cumsum(seg_km)[:-1]])[segment] + t * seg_km[segment]
+    return out_lat, out_lon, segment, km
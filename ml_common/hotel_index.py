@@ -0,0 +1,176 @@
+import json
+
+import numpy as np
+
+from ml_common.geo import GeoIndex
+
+
+DEFAULT_RATING = 4.0
+DEFAULT_NIGHTLY_RATE = 10000.0
+
+
+def _parse_list(value):
+    if isinstance(value, (list, tuple, set)):
+        parsed = value
+    elif not isinstance(value, str) or not value.strip():
+        return []
+    else:
+        try:
+            parsed = json.loads(value)
+        except ValueError:
+            parsed = value.split(",")
+        # A JSON scalar ('"wifi"', '5') is a single tag
+        if parsed is None:
+            return []
+        if not isinstance(parsed, list):
+            parsed = [parsed]
+    return [str(v).strip().lower() for v in parsed if str(v).strip()]
+
+
+class TagBitsets:
+    """Per-row tag lists (e.g. amenities) parsed once into uint64 bitmasks.
+
+    Tag i is bit i % 64 of word i // 64, so bits has shape (rows, words) and
+    any number of distinct tags fits.
+    """
+
+    def __init__(self, rows):
+        parsed = [_parse_list(r) for r in rows]
+        self.vocab = {tag: i for i, tag in enumerate(sorted({t for tags in parsed for t in tags}))}
+        self.n_words = max(1, -(-len(self.vocab) // 64))
+
+        self.bits = np.zeros((len(parsed), self.n_words), dtype=np.uint64)
+        for i, tags in enumerate(parsed):
+            for tag in tags:
+                word, bit = divmod(self.vocab[tag], 64)
+                self.bits[i, word] |= np.uint64(1) << np.uint64(bit)
+
+    def mask_for(self, tags):
+        """(words,) bitmask for the requested tags, or None if one of them is unknown (nothing can match)."""
+        mask = np.zeros(self.n_words, dtype=np.uint64)
+        for tag in _parse_list(tags):
+            if tag not in self.vocab:
+                return None
+            word, bit = divmod(self.vocab[tag], 64)
+            mask[word] |= np.uint64(1) << np.uint64(bit)
+        return mask
+
+    def has_all(self, tags) -> np.ndarray:
+        mask = self.mask_for(tags)
+        if mask is None:
+            return np.zeros(len(self.bits), dtype=bool)
+        return ((self.bits & mask) == mask).all(axis=1)
+
+    def has_any(self, tags) -> np.ndarray:
+        mask = self.mask_for([t for t in _parse_list(tags) if t in self.vocab])
+        if not mask.any():
+            return np.zeros(len(self.bits), dtype=bool)
+        return ((self.bits & mask) != 0).any(axis=1)
+
+
+class HotelIndex:
+    """Hotel catalog columns laid out once for vectorized scoring.
+
+    Coordinates go in a GeoIndex; the nightly rate, price_range_min and
+    price_range_max are kept sorted for "at most X" and [lo, hi] overlap
+    lookups; amenities / room_types are parsed into bitsets so filters are a
+    single AND over the catalog.
+    """
+
+    def __init__(self, df):
+        n = len(df)
+
+        def column(col, default):
+            if col in df.columns:
+                return df[col].to_numpy(dtype=float)
+            return np.full(n, default, dtype=float)
+
+        self.geo = GeoIndex.from_frame(df)
+        self.rating = column("rating", DEFAULT_RATING)
+
+        # A hotel without a listed maximum has a single price
+        self.price_min = column("price_range_min", np.nan)
+        self.price_max = column("price_range_max", np.nan)
+        self.price_max = np.where(np.isnan(self.price_max), self.price_min, self.price_max)
+
+        # Nightly rate, used both for scoring and for the max_price filter: an
+        # explicit nightly_rate / price_per_night column, else the cheapest room.
+        for col in ("nightly_rate", "price_per_night", "price_range_min"):
+            if col in df.columns:
+                rate = column(col, np.nan)
+                self.nightly_rate = np.where(np.isnan(rate), DEFAULT_NIGHTLY_RATE, rate)
+                break
+        else:
+            self.nightly_rate = np.full(n, DEFAULT_NIGHTLY_RATE)
+
+        # Sorted views for range lookups; NaN prices sort last
+        self.rate_order = np.argsort(self.nightly_rate, kind="stable")
+        self.sorted_rate = self.nightly_rate[self.rate_order]
+        self.price_min_order = np.argsort(self.price_min, kind="stable")
+        self.sorted_price_min = self.price_min[self.price_min_order]
+        self.price_max_order = np.argsort(self.price_max, kind="stable")
+        self.sorted_price_max = self.price_max[self.price_max_order]
+
+        empty = [None] * n
+        self.amenities = TagBitsets(df["amenities"] if "amenities" in df.columns else empty)
+        self.room_types = TagBitsets(df["room_types"] if "room_types" in df.columns else empty)
+
+    @classmethod
+    def from_frame(cls, df) -> "HotelIndex":
+        return cls(df)
+
+    def __len__(self):
+        return len(self.rating)
+
+    def priced_at_most(self, max_price: float) -> np.ndarray:
+        """Rows whose nightly rate is <= max_price (binary search on the sorted rates)."""
+        stop = np.searchsorted(self.sorted_rate, max_price, side="right")
+        return np.sort(self.rate_order[:stop])
+
+    def price_overlaps(self, low: float, high: float) -> np.ndarray:
+        """Rows whose [price_range_min, price_range_max] overlaps [low, high]."""
+        n_priced = np.count_nonzero(~np.isnan(self.sorted_price_max))
+        starts_below = self.price_min_order[: np.searchsorted(self.sorted_price_min, high, side="right")]
+        ends_above = self.price_max_order[np.searchsorted(self.sorted_price_max[:n_priced], low, side="left"):n_priced]
+        return np.intersect1d(starts_below, ends_above)
+
+    def candidates(self, amenities=None, room_types=None, max_price=None, price_range=None) -> np.ndarray:
+        """Rows passing the filters: all requested amenities, any requested room type, price cap, price range."""
+        keep = np.ones(len(self), dtype=bool)
+        if amenities:
+            keep &= self.amenities.has_all(amenities)
+        if room_types:
+            keep &= self.room_types.has_any(room_types)
+        for rows in (
+            None if max_price is None else self.priced_at_most(float(max_price)),
+            None if price_range is None else self.price_overlaps(*map(float, price_range)),
+        ):
+            if rows is not None:
+                in_price = np.zeros(len(self), dtype=bool)
+                in_price[rows] = True
+                keep &= in_price
+        return np.flatnonzero(keep)
+
+    def distances(self, lat, lon, default_km: float = 10.0) -> np.ndarray:
+        dists = self.geo.distances(lat, lon)
+        return np.where(np.isnan(dists), default_km, dists)
+
+
+def top_k(scores, k: int, candidates=None) -> np.ndarray:
+    """Indices of the k best scores among candidates, best first.
+
+    Uses argpartition, then sorts only the k winners. Ties keep catalog order.
+    """
+    idx = np.arange(len(scores)) if candidates is None else np.asarray(candidates)
+    s = np.nan_to_num(np.asarray(scores, dtype=float)[idx], nan=-np.inf)
+
+    if 0 < k < len(s):
+        kth = s[np.argpartition(-s, k - 1)[k - 1]]
+        above = np.flatnonzero(s > kth)
+        ties = np.flatnonzero(s == kth)[: k - len(above)]
+        chosen = np.concatenate([above, ties])
+    else:
+        chosen = np.arange(len(s) if k > 0 else 0)
+
+    chosen = chosen[np.lexsort((chosen, -s[chosen]))]
+    return idx[chosen]
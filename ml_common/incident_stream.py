@@ -0,0 +1,250 @@
+import argparse
+import json
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from ml_common.event_index import ACCIDENT_TYPES, radius_window
+from ml_common.geo import haversine_distance
+from ml_common.risk_grid import RiskGrid
+
+
+# Streaming sliding-window accident / incident counts per grid cell.
+#
+# The window is split into fixed time buckets held in a ring buffer of
+# per-cell counts, next to a running per-cell total. Adding an event bumps
+# one ring slot and the total; moving the clock forward subtracts the slots
+# that fall out of the window from the totals and zeroes them. Nothing is
+# ever rescanned, and reading a cell's counts is a single array lookup.
+#
+# The model's num_recent_* features are "events within radius_km" counts
+# (see EventIndex.recent_counts), so counts() answers the same radius query
+# over the points of the events still in the window: the per-cell totals
+# skip empty neighbourhoods outright, and only points in the cells the
+# circle can reach are checked with haversine. Unlike the event index, the
+# window edges move in whole buckets and events off the grid are dropped.
+
+ACCIDENTS, INCIDENTS = 0, 1
+
+
+class IncidentWindow:
+    def __init__(self, grid: RiskGrid = None, window_hours: float = 24.0, bucket_minutes: float = 15.0,
+                 radius_km: float = 5.0, clock=None):
+        self.grid = grid or RiskGrid()
+        self.radius_km = radius_km
+        self.bucket_seconds = int(bucket_minutes * 60)
+        self.n_buckets = max(int(round(window_hours * 60 / bucket_minutes)), 1)
+        self.window_hours = self.n_buckets * self.bucket_seconds / 3600.0
+        # clock() -> epoch seconds. None = event time: the window only moves
+        # forward as newer events arrive (used when replaying history).
+        self.clock = clock
+
+        self.ring = np.zeros((self.n_buckets, self.grid.n_cells, 2), dtype=np.int32)
+        self.totals = np.zeros((self.grid.n_cells, 2), dtype=np.int64)
+        self.head = None  # absolute index of the newest bucket in the ring
+        # Events still in the window, for radius queries
+        self.point_lat = np.zeros(0)
+        self.point_lon = np.zeros(0)
+        self.point_cell = np.zeros(0, dtype=int)
+        self.point_bucket = np.zeros(0, dtype=np.int64)
+        self.point_kind = np.zeros(0, dtype=int)
+        self.events_seen = 0
+        self.events_dropped = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def wall_clock():
+        return time.time()
+
+    def _bucket_of(self, epoch_seconds):
+        return np.floor_divide(np.asarray(epoch_seconds, dtype=np.int64), self.bucket_seconds)
+
+    def _advance(self, bucket: int):
+        """Move the newest bucket to `bucket`, expiring every slot that leaves the window."""
+        if self.head is None:
+            self.head = bucket
+            return
+        steps = bucket - self.head
+        if steps <= 0:
+            return
+        if steps >= self.n_buckets:
+            self.ring[:] = 0
+            self.totals[:] = 0
+        else:
+            for b in range(self.head + 1, bucket + 1):
+                slot = self.ring[b % self.n_buckets]
+                self.totals -= slot
+                slot[:] = 0
+        self.head = bucket
+
+        live = self.point_bucket > self.head - self.n_buckets
+        if not live.all():
+            self.point_lat, self.point_lon = self.point_lat[live], self.point_lon[live]
+            self.point_cell, self.point_bucket, self.point_kind = (
+                self.point_cell[live], self.point_bucket[live], self.point_kind[live]
+            )
+
+    def _sync_clock(self):
+        if self.clock is not None:
+            self._advance(int(self._bucket_of(self.clock())))
+
+    def add(self, latitudes, longitudes, timestamps, event_types):
+        """Ingest a batch of events; returns how many were counted (late or off-grid ones are dropped)."""
+        latitudes, longitudes = np.asarray(latitudes, dtype=float), np.asarray(longitudes, dtype=float)
+        cells = self.grid.cell_of(latitudes, longitudes)
+        epochs = pd.to_datetime(pd.Series(timestamps), errors="coerce").to_numpy(dtype="datetime64[s]")
+        valid = (cells >= 0) & ~np.isnat(epochs)
+        kind = np.where(np.isin(np.asarray(event_types, dtype=object), ACCIDENT_TYPES), ACCIDENTS, INCIDENTS)
+        buckets = self._bucket_of(epochs.astype(np.int64))
+
+        with self._lock:
+            self._sync_clock()
+            if valid.any():
+                newest = int(buckets[valid].max())
+                if self.clock is None or self.head is None:
+                    self._advance(newest)
+            # Events newer than the clock (clock skew) are counted in the newest bucket
+            buckets = np.minimum(buckets, self.head) if self.head is not None else buckets
+            in_window = valid & (buckets > self.head - self.n_buckets) if self.head is not None else valid
+
+            cells, kind, buckets = cells[in_window], kind[in_window], buckets[in_window]
+            np.add.at(self.ring, (buckets % self.n_buckets, cells, kind), 1)
+            np.add.at(self.totals, (cells, kind), 1)
+            self.point_lat = np.concatenate([self.point_lat, latitudes[in_window]])
+            self.point_lon = np.concatenate([self.point_lon, longitudes[in_window]])
+            self.point_cell = np.concatenate([self.point_cell, cells])
+            self.point_bucket = np.concatenate([self.point_bucket, buckets])
+            self.point_kind = np.concatenate([self.point_kind, kind])
+
+            self.events_seen += int(in_window.sum())
+            self.events_dropped += int(len(in_window) - in_window.sum())
+        return int(in_window.sum())
+
+    def add_frame(self, df: pd.DataFrame) -> int:
+        return self.add(df["latitude"], df["longitude"], df["timestamp"], df["event_type"])
+
+    def counts_for_cells(self, cells) -> np.ndarray:
+        """(n, 2) [accidents, incidents] in the current window; zeros outside the grid."""
+        cells = np.asarray(cells, dtype=int)
+        with self._lock:
+            self._sync_clock()
+            out = self.totals[np.maximum(cells, 0)].copy()
+        out[cells < 0] = 0
+        return out
+
+    def counts_near(self, latitudes, longitudes, radius_km: float = None) -> np.ndarray:
+        """(n, 2) [accidents, incidents] within radius_km (default: self.radius_km) of each point."""
+        radius_km = self.radius_km if radius_km is None else radius_km
+        latitudes = np.atleast_1d(np.asarray(latitudes, dtype=float))
+        longitudes = np.atleast_1d(np.asarray(longitudes, dtype=float))
+        out = np.zeros((len(latitudes), 2), dtype=np.int64)
+        with self._lock:
+            self._sync_clock()
+            totals = self.totals.reshape(self.grid.n_rows, self.grid.n_cols, 2)
+            point_row, point_col = np.divmod(self.point_cell, self.grid.n_cols)
+            for k, (lat, lon) in enumerate(zip(latitudes, longitudes)):
+                if np.isnan(lat) or np.isnan(lon):
+                    continue
+                rows, cols = radius_window(self.grid, lat, lon, radius_km)
+                if not totals[rows, cols].any():
+                    continue
+                idx = np.flatnonzero(
+                    (point_row >= rows.start) & (point_row < rows.stop)
+                    & (point_col >= cols.start) & (point_col < cols.stop)
+                )
+                idx = idx[haversine_distance(lat, lon, self.point_lat[idx], self.point_lon[idx]) <= radius_km]
+                out[k] = np.bincount(self.point_kind[idx], minlength=2)
+        return out
+
+    def counts(self, lat: float, lon: float, radius_km: float = None):
+        """(num_recent_accidents, num_recent_incidents) within radius_km of (lat, lon)."""
+        accidents, incidents = self.counts_near([lat], [lon], radius_km)[0]
+        return int(accidents), int(incidents)
+
+    def status(self):
+        head = None if self.head is None else pd.Timestamp((self.head + 1) * self.bucket_seconds, unit="s").isoformat()
+        return {
+            "window_hours": self.window_hours,
+            "radius_km": self.radius_km,
+            "bucket_minutes": self.bucket_seconds / 60.0,
+            "window_end": head,
+            "events_seen": self.events_seen,
+            "events_dropped": self.events_dropped,
+            "events_in_window": int(self.totals.sum()),
+        }
+
+
+def replay(df: pd.DataFrame, window: IncidentWindow, speedup: float = 0.0, on_batch=None):
+    """Feed events to `window` in time order, optionally paced at `speedup` x real time.
+
+    Events are sent one window bucket at a time, so a batch never spans more
+    than the ring's resolution. on_batch(batch) is called after every batch
+    (e.g. to POST it to the service or to check counts); returns events per second.
+    """
+    df = df.assign(_ts=pd.to_datetime(df["timestamp"])).sort_values("_ts", kind="stable")
+    start_wall, start_event = time.perf_counter(), df["_ts"].iloc[0]
+
+    buckets = window._bucket_of(df["_ts"].to_numpy(dtype="datetime64[s]").astype(np.int64))
+    bounds = np.flatnonzero(np.diff(buckets)) + 1
+    for i, j in zip(np.concatenate([[0], bounds]), np.concatenate([bounds, [len(df)]])):
+        batch = df.iloc[i:j]
+        if speedup > 0:
+            due = (batch["_ts"].iloc[0] - start_event).total_seconds() / speedup
+            delay = due - (time.perf_counter() - start_wall)
+            if delay > 0:
+                time.sleep(delay)
+        window.add_frame(batch)
+        if on_batch is not None:
+            on_batch(batch)
+
+    return len(df) / max(time.perf_counter() - start_wall, 1e-9)
+
+
+if __name__ == "__main__":
+    # Replay the historical events and check the live counts against a rescan:
+    #   python -m ml_common.incident_stream datasets/risk_events_historical.csv [--speedup 86400] [--url ...]
+    parser = argparse.ArgumentParser()
+    parser.add_argument("events_csv")
+    parser.add_argument("--window-hours", type=float, default=24.0)
+    parser.add_argument("--bucket-minutes", type=float, default=15.0)
+    parser.add_argument("--speedup", type=float, default=0.0, help="x real time; 0 = as fast as possible")
+    parser.add_argument("--url", help="also POST each batch to this ingestion endpoint")
+    args = parser.parse_args()
+
+    events = pd.read_csv(args.events_csv)
+    events = events.iloc[np.argsort(pd.to_datetime(events["timestamp"]).to_numpy(), kind="stable")].reset_index(drop=True)
+    window = IncidentWindow(window_hours=args.window_hours, bucket_minutes=args.bucket_minutes)
+
+    all_cells = window.grid.cell_of(events["latitude"].to_numpy(), events["longitude"].to_numpy())
+    all_buckets = window._bucket_of(pd.to_datetime(events["timestamp"]).to_numpy(dtype="datetime64[s]").astype(np.int64))
+    all_accident = np.isin(events["event_type"].to_numpy(dtype=object), ACCIDENT_TYPES)
+    ingested = [0]
+    mismatches = []
+
+    def on_batch(batch):
+        ingested[0] += len(batch)
+
+        # Rescan of everything ingested so far that falls in the window's buckets
+        seen = np.arange(len(events)) < ingested[0]
+        in_window = seen & (all_buckets > window.head - window.n_buckets) & (all_buckets <= window.head)
+        cells = np.unique(window.grid.cell_of(batch["latitude"].to_numpy(), batch["longitude"].to_numpy()))
+        cells = cells[cells >= 0]
+        for cell, (acc, inc) in zip(cells, window.counts_for_cells(cells)):
+            m = in_window & (all_cells == cell)
+            if (acc, inc) != (int((m & all_accident).sum()), int((m & ~all_accident).sum())):
+                mismatches.append(int(cell))
+
+        if args.url:
+            import urllib.request
+
+            payload = json.dumps({"events": batch.drop(columns="_ts").to_dict(orient="records")}, default=str)
+            req = urllib.request.Request(args.url, payload.encode(), {"Content-Type": "application/json"})
+            urllib.request.urlopen(req).read()
+
+    rate = replay(events, window, speedup=args.speedup, on_batch=on_batch)
+    print(json.dumps(window.status()))
+    print(f"{len(events)} events replayed at {rate:,.0f} events/s (incl. checks), {len(mismatches)} count mismatches")
+    sys.exit(1 if mismatches else 0)
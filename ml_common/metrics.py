@@ -0,0 +1,177 @@
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+
+# Minimal in-process metrics with Prometheus text exposition (format 0.0.4).
+#
+# The service only needs histograms for per-stage latency plus a couple of
+# gauges, so this avoids pulling in prometheus_client. Everything lives in
+# one process-wide REGISTRY that app.py renders at /metrics.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; stages range from ~50us (flattened trees) to ~100ms (big batches)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Histogram:
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            counts, total = self._series.get(key, ([0] * len(self.buckets), 0.0))
+            for i, upper in enumerate(self.buckets):
+                if value <= upper:
+                    counts[i] += 1
+            self._series[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+        for key, counts, total in series:
+            for upper, count in zip(self.buckets, counts):
+                labels = _format_labels(self.label_names, key, ("le", _format_value(upper)))
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {counts[-1]}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name, documentation, labels=(), callback=None):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        # callback() -> value, read at scrape time (only for unlabelled gauges)
+        self.callback = callback
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def set(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        if self.callback is not None:
+            values = {(): self.callback()}
+        else:
+            with self._lock:
+                values = dict(self._values)
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            # Re-importing a blueprint module must not duplicate series
+            return self._metrics.setdefault(metric.name, metric)
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def gauge(self, name, documentation, labels=(), callback=None) -> Gauge:
+        return self._register(Gauge(name, documentation, labels, callback))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def process_rss_bytes() -> float:
+    """Current resident set size; falls back to peak RSS where /proc isn't available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return float(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE"))
+    except (OSError, ValueError, IndexError):
+        import resource
+        import sys
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return float(peak if sys.platform == "darwin" else peak * 1024)
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "ml_stage_duration_seconds",
+    "Time spent in each inference stage.",
+    labels=("component", "stage"),
+)
+MODEL_LOAD_SECONDS = REGISTRY.gauge(
+    "ml_model_load_seconds",
+    "Wall time taken to load a component's model artifacts.",
+    labels=("component",),
+)
+PROCESS_RSS_BYTES = REGISTRY.gauge(
+    "process_resident_memory_bytes",
+    "Resident memory size in bytes.",
+    callback=process_rss_bytes,
+)
+
+
+_untimed = threading.local()
+
+
+@contextmanager
+def stage_timers_off():
+    """Don't record stage durations on this thread inside the block (e.g. synthetic warm-up requests)."""
+    previous = getattr(_untimed, "active", False)
+    _untimed.active = True
+    try:
+        yield
+    finally:
+        _untimed.active = previous
+
+
+def stage_timer(component: str, stage: str):
+    """Context manager recording one stage's duration in ml_stage_duration_seconds."""
+    if getattr(_untimed, "active", False):
+        return nullcontext()
+    return STAGE_SECONDS.time(component=component, stage=stage)
@@ -0,0 +1,78 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from threadpoolctl import threadpool_limits
+
+
+# Fits independent estimators (e.g. the base learners of a stack) side by
+# side in a process pool.
+#
+# Every job runs under an explicit thread budget: the estimator's n_jobs
+# (XGBoost / sklearn, also inside Pipelines) is set to it for the fit, and
+# OpenMP / BLAS pools are capped with threadpoolctl, so workers x threads
+# never exceeds the cores. The default budget depends only on the number of
+# jobs and cores, never on the number of workers, so a job sees the same
+# configuration in the pool and in-process (workers=1) and the fitted models
+# are bit-identical between the two modes. A sequential run that wants every
+# core passes threads=cpu_count() (and gives up that identity). The original
+# n_jobs is put back after the fit, so the budget doesn't travel with the
+# pickled model.
+#
+# Workers are spawned rather than forked: forking a process whose OpenMP or
+# TensorFlow thread pools are already running can deadlock.
+
+
+def cpu_count() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def thread_budget(n_jobs: int, cores: int = None) -> int:
+    """Threads per job when n_jobs fits run at once on `cores` cores."""
+    cores = cores or cpu_count()
+    return max(1, cores // max(1, min(n_jobs, cores)))
+
+
+def _set_threads(estimator, threads: int) -> dict:
+    """Set every n_jobs param (also inside Pipelines) to threads; returns the previous values."""
+    params = estimator.get_params()
+    previous = {key: params[key] for key in params if key == "n_jobs" or key.endswith("__n_jobs")}
+    if previous:
+        estimator.set_params(**{key: threads for key in previous})
+    return previous
+
+
+def _fit(estimator, X, y, threads: int):
+    previous = _set_threads(estimator, threads)
+    try:
+        with threadpool_limits(limits=threads):
+            estimator.fit(X, y)
+    finally:
+        if previous:
+            estimator.set_params(**previous)
+    return estimator
+
+
+def fit_estimators(jobs: dict, workers: int = None, threads: int = None) -> dict:
+    """Fit {name: (estimator, X, y)} and return {name: fitted estimator}.
+
+    workers: processes to fit in (default: one per job, up to the cores);
+             1 fits in-process, one job after another.
+    threads: per-job thread budget, the same in both modes (default:
+             thread_budget(len(jobs))).
+    """
+    if not jobs:
+        return {}
+    threads = threads or thread_budget(len(jobs))
+    workers = workers or min(len(jobs), max(1, cpu_count() // threads))
+
+    if workers <= 1:
+        return {name: _fit(estimator, X, y, threads) for name, (estimator, X, y) in jobs.items()}
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=context) as pool:
+        futures = {name: pool.submit(_fit, estimator, X, y, threads) for name, (estimator, X, y) in jobs.items()}
+        return {name: future.result() for name, future in futures.items()}
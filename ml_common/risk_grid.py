@@ -0,0 +1,86 @@
+import math
+
+import numpy as np
+
+
+# Fixed lat/lon grid over Sri Lanka shared by the risk tile cache, the
+# incident aggregator and the historical prior cube, so a cell id means the
+# same place everywhere.
+
+SRI_LANKA_BOUNDS = (5.85, 79.45, 9.95, 81.95)  # min_lat, min_lon, max_lat, max_lon
+DEFAULT_CELL_DEG = 0.05  # ~5.5 km
+
+
+class RiskGrid:
+    """Row-major grid: cell = row * n_cols + col, row 0 at min_lat."""
+
+    def __init__(self, bounds=SRI_LANKA_BOUNDS, cell_deg: float = DEFAULT_CELL_DEG):
+        self.min_lat, self.min_lon, self.max_lat, self.max_lon = map(float, bounds)
+        self.cell_deg = float(cell_deg)
+        self.n_rows = int(math.ceil(round((self.max_lat - self.min_lat) / self.cell_deg, 9)))
+        self.n_cols = int(math.ceil(round((self.max_lon - self.min_lon) / self.cell_deg, 9)))
+
+    @property
+    def n_cells(self) -> int:
+        return self.n_rows * self.n_cols
+
+    @property
+    def shape(self):
+        return self.n_rows, self.n_cols
+
+    def to_dict(self):
+        return {
+            "bounds": [self.min_lat, self.min_lon, self.max_lat, self.max_lon],
+            "cell_deg": self.cell_deg,
+            "rows": self.n_rows,
+            "cols": self.n_cols,
+        }
+
+    def row_col(self, lat, lon):
+        """(row, col) int arrays; -1 where the point is outside the grid or missing."""
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        with np.errstate(invalid="ignore"):
+            row = np.floor((lat - self.min_lat) / self.cell_deg)
+            col = np.floor((lon - self.min_lon) / self.cell_deg)
+            inside = (row >= 0) & (row < self.n_rows) & (col >= 0) & (col < self.n_cols)
+        return np.where(inside, row, -1).astype(int), np.where(inside, col, -1).astype(int)
+
+    def cell_of(self, lat, lon):
+        """Cell id per point; -1 outside the grid."""
+        row, col = self.row_col(lat, lon)
+        return np.where(row >= 0, row * self.n_cols + col, -1)
+
+    def centers(self, cells=None):
+        """(lat, lon) of the centres of `cells` (default: every cell, in cell order)."""
+        rows, cols = np.divmod(np.arange(self.n_cells) if cells is None else np.asarray(cells, dtype=int), self.n_cols)
+        return (
+            self.min_lat + (rows + 0.5) * self.cell_deg,
+            self.min_lon + (cols + 0.5) * self.cell_deg,
+        )
+
+    def window(self, min_lat, min_lon, max_lat, max_lon):
+        """(row slice, col slice) of the cells overlapping a bounding box, clipped to the grid."""
+        r0 = int(np.clip(math.floor((min_lat - self.min_lat) / self.cell_deg), 0, self.n_rows))
+        r1 = int(np.clip(math.ceil((max_lat - self.min_lat) / self.cell_deg), 0, self.n_rows))
+        c0 = int(np.clip(math.floor((min_lon - self.min_lon) / self.cell_deg), 0, self.n_cols))
+        c1 = int(np.clip(math.ceil((max_lon - self.min_lon) / self.cell_deg), 0, self.n_cols))
+        return slice(r0, max(r0, r1)), slice(c0, max(c0, c1))
+
+    def window_bounds(self, rows: slice, cols: slice):
+        return [
+            self.min_lat + rows.start * self.cell_deg,
+            self.min_lon + cols.start * self.cell_deg,
+            self.min_lat + rows.stop * self.cell_deg,
+            self.min_lon + cols.stop * self.cell_deg,
+        ]
+
+
+def tile_bounds(z: int, x: int, y: int):
+    """(min_lat, min_lon, max_lat, max_lon) of a slippy-map (Web Mercator) tile."""
+    n = 2.0 ** z
+
+    def lat(y_):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y_ / n))))
+
+    return lat(y + 1), x / n * 360.0 - 180.0, lat(y), (x + 1) / n * 360.0 - 180.0
@@ -0,0 +1,190 @@
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from ml_common.dataset_cache import read_dataset
+from ml_common.event_index import ACCIDENT_TYPES
+from ml_common.risk_grid import RiskGrid
+from ml_common.time_features import DAYS_PER_WEEK, HOURS_PER_DAY, HOURS_PER_WEEK, hour_and_weekday, hour_of_week
+
+
+# Hour-of-week historical priors per grid cell, built offline.
+#
+# Events and condition observations are binned into (cell, hour-of-week)
+# slots with np.bincount and stored as one dense float32 array indexed
+# [cell, day_of_week, hour_of_day, field]. The array is written as .npy next
+# to a small JSON header and opened with mmap_mode="r", so every process
+# shares the same pages and a lookup is plain indexing.
+#
+# Most slots see no events at all, so every statistic is shrunk towards its
+# cell's own average and that towards the country-wide one (SMOOTHING
+# pseudo-observations each); empty slots inherit the level above them.
+
+FIELDS = (
+    "event_rate",              # events per hour in this hour-of-week slot
+    "accident_rate",           # accidents per hour
+    "casualty_rate",           # casualties per hour
+    "mean_severity",           # mean event severity (1-10)
+    "expected_accidents_24h",  # accidents expected in the 24 hours up to this slot
+    "expected_incidents_24h",  # non-accident events expected in the 24 hours up to this slot
+    "mean_risk_score",         # mean observed risk_score (conditions data)
+    "mean_severity_level",     # mean observed severity_level (conditions data)
+    "event_count",             # raw events seen in this slot (confidence)
+)
+SMOOTHING = 4.0
+
+
+def _slots(grid, df):
+    """(cell * 168 + hour_of_week) per row; -1 for rows off the grid or without a valid timestamp."""
+    cells = grid.cell_of(df["latitude"].to_numpy(dtype=float), df["longitude"].to_numpy(dtype=float))
+    hour, day = hour_and_weekday(df["timestamp"])
+    valid = (cells >= 0) & ~np.isnan(hour)
+    buckets = hour_of_week(np.nan_to_num(day), np.nan_to_num(hour))
+    return np.where(valid, cells * HOURS_PER_WEEK + buckets, -1)
+
+
+def _binned(slots, n_slots, weights=None):
+    keep = slots >= 0
+    w = None if weights is None else np.asarray(weights, dtype=float)[keep]
+    return np.bincount(slots[keep], weights=w, minlength=n_slots).reshape(-1, HOURS_PER_WEEK)
+
+
+def _shrunk_mean(sums, counts, alpha):
+    """Per-slot means shrunk towards the cell mean, itself shrunk towards the global mean."""
+    total = counts.sum()
+    global_mean = sums.sum() / total if total else 0.0
+    cell_mean = (sums.sum(axis=1) + alpha * global_mean) / (counts.sum(axis=1) + alpha)
+    return (sums + alpha * cell_mean[:, None]) / (counts + alpha)
+
+
+def _trailing_sum(rates, hours):
+    """Sum of each slot and the hours - 1 before it, wrapping around the week."""
+    padded = np.concatenate([rates[:, -(hours - 1):], rates], axis=1) if hours > 1 else rates
+    cumulative = np.concatenate([np.zeros((len(rates), 1)), np.cumsum(padded, axis=1)], axis=1)
+    return cumulative[:, hours:] - cumulative[:, :-hours]
+
+
+def build_prior_cube(events: pd.DataFrame, conditions: pd.DataFrame = None, grid: RiskGrid = None,
+                     alpha: float = SMOOTHING):
+    """(cube, meta): cube is float32 [n_cells, 7, 24, len(FIELDS)]."""
+    grid = grid or RiskGrid()
+    n_slots = grid.n_cells * HOURS_PER_WEEK
+
+    # Every hour-of-week slot occurs once per week of history
+    times = pd.to_datetime(events["timestamp"], errors="coerce")
+    weeks = max((times.max() - times.min()).total_seconds() / (7 * 24 * 3600), 1.0) if times.notna().any() else 1.0
+
+    slots = _slots(grid, events)
+    is_accident = np.isin(events["event_type"].to_numpy(dtype=object), ACCIDENT_TYPES)
+    counts = _binned(slots, n_slots)
+    accidents = _binned(slots, n_slots, is_accident)
+    none = np.zeros(len(events))
+    casualties = _binned(slots, n_slots, events["casualties"] if "casualties" in events.columns else none)
+    severity = _binned(slots, n_slots, events["severity"] if "severity" in events.columns else none)
+
+    # Slot rates shrunk towards the cell's weekly rate spread over the country-wide hour-of-week profile
+    share = (counts.sum(axis=0) + 1.0) / (counts.sum() + HOURS_PER_WEEK)
+
+    def rate(hits):
+        expected = hits.sum(axis=1, keepdims=True) / weeks * share[None, :]
+        return (hits + alpha * expected) / (weeks + alpha)
+
+    event_rate, accident_rate, casualty_rate = rate(counts), rate(accidents), rate(casualties)
+    fields = {
+        "event_rate": event_rate,
+        "accident_rate": accident_rate,
+        "casualty_rate": casualty_rate,
+        "mean_severity": _shrunk_mean(severity, counts, alpha),
+        "expected_accidents_24h": _trailing_sum(accident_rate, HOURS_PER_DAY),
+        "expected_incidents_24h": _trailing_sum(event_rate - accident_rate, HOURS_PER_DAY),
+        "event_count": counts,
+    }
+
+    observations = 0
+    if conditions is not None and len(conditions):
+        cond_slots = _slots(grid, conditions)
+        cond_counts = _binned(cond_slots, n_slots)
+        observations = int(cond_counts.sum())
+        for field, col in (("mean_risk_score", "risk_score"), ("mean_severity_level", "severity_level")):
+            fields[field] = _shrunk_mean(_binned(cond_slots, n_slots, conditions[col]), cond_counts, alpha)
+    else:
+        fields["mean_risk_score"] = fields["mean_severity_level"] = np.zeros((grid.n_cells, HOURS_PER_WEEK))
+
+    cube = np.stack([fields[name] for name in FIELDS], axis=-1).astype(np.float32)
+    cube = cube.reshape(grid.n_cells, DAYS_PER_WEEK, HOURS_PER_DAY, len(FIELDS))
+
+    meta = {
+        "fields": list(FIELDS),
+        "shape": list(cube.shape),
+        "dtype": str(cube.dtype),
+        "grid": grid.to_dict(),
+        "weeks_of_history": weeks,
+        "events": int((slots >= 0).sum()),
+        "condition_observations": observations,
+        "smoothing": alpha,
+    }
+    return cube, meta
+
+
+class RiskPrior:
+    def __init__(self, cube: np.ndarray, meta: dict):
+        self.cube = cube
+        self.meta = meta
+        self.fields = list(meta["fields"])
+        grid = meta["grid"]
+        self.grid = RiskGrid(bounds=grid["bounds"], cell_deg=grid["cell_deg"])
+
+    @classmethod
+    def build(cls, events: pd.DataFrame, conditions: pd.DataFrame = None, grid: RiskGrid = None) -> "RiskPrior":
+        return cls(*build_prior_cube(events, conditions, grid))
+
+    def save(self, prefix: str):
+        os.makedirs(os.path.dirname(prefix) or ".", exist_ok=True)
+        np.save(prefix + ".npy", np.ascontiguousarray(self.cube))
+        with open(prefix + ".json", "w") as f:
+            json.dump(self.meta, f, indent=2)
+
+    @classmethod
+    def load(cls, prefix: str, mmap: bool = True) -> "RiskPrior":
+        with open(prefix + ".json") as f:
+            meta = json.load(f)
+        cube = np.load(prefix + ".npy", mmap_mode="r" if mmap else None)
+        if list(cube.shape) != meta["shape"]:
+            raise ValueError(f"{prefix}.npy has shape {cube.shape}, header says {meta['shape']}")
+        return cls(cube, meta)
+
+    @staticmethod
+    def exists(prefix: str) -> bool:
+        return os.path.exists(prefix + ".npy") and os.path.exists(prefix + ".json")
+
+    def lookup(self, lat, lon, day_of_week, hour_of_day) -> np.ndarray:
+        """(n, len(fields)) priors for points; NaN rows outside the grid."""
+        cells = self.grid.cell_of(np.atleast_1d(lat), np.atleast_1d(lon))
+        day = np.broadcast_to(np.asarray(day_of_week, dtype=int), cells.shape)
+        hour = np.broadcast_to(np.asarray(hour_of_day, dtype=int), cells.shape)
+        values = np.asarray(self.cube[np.maximum(cells, 0), day, hour], dtype=float)
+        values[cells < 0] = np.nan
+        return values
+
+    def field(self, name: str):
+        """[n_cells, 7, 24] view of one field."""
+        return self.cube[..., self.fields.index(name)]
+
+
+if __name__ == "__main__":
+    # python -m ml_common.risk_prior datasets/risk_events_historical.csv \
+    #     --conditions datasets/realtime_conditions_training.csv --out flask/models/component3/risk_prior
+    parser = argparse.ArgumentParser()
+    parser.add_argument("events_csv")
+    parser.add_argument("--conditions")
+    parser.add_argument("--out", required=True, help="output prefix; writes <out>.npy and <out>.json")
+    args = parser.parse_args()
+
+    prior = RiskPrior.build(
+        read_dataset(args.events_csv), read_dataset(args.conditions) if args.conditions else None
+    )
+    prior.save(args.out)
+    print(json.dumps({**prior.meta, "bytes": int(prior.cube.nbytes)}))
@@ -0,0 +1,176 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from ml_common.risk_grid import RiskGrid, tile_bounds
+from ml_common.time_features import HOURS_PER_WEEK, hour_of_week, week_bucket_features
+
+
+# Precomputed risk over the country grid for every hour-of-week bucket.
+#
+# The fusion net only sees time through (hour / 23, day / 6), so risk at a
+# cell is fully determined by that cell's latest conditions plus one of 168
+# time buckets. The base learners run once per cell, the fusion net once per
+# (bucket, cell), and the result is a (168, n_cells) float32 array that map
+# windows and tiles slice straight out of memory. When a cell's conditions
+# change only that cell's column is recomputed.
+#
+# The same arrays double as the conditions store: every write that changes a
+# cell's inputs bumps its version and precomputes all fusion outputs, so a
+# read for a location + time is a lookup (see lookup()).
+#
+# Writers may race: recompute() snapshots a cell's inputs under the lock and
+# only stores its outputs if no write touched the cell meanwhile (the newer
+# write's own recompute supersedes it). lookup() reports the version the
+# outputs were computed from, not the latest one.
+
+
+class RiskTileCache:
+    def __init__(self, model, grid: RiskGrid = None, defaults=None):
+        # model: a RiskStackingModel (feature_cols_*, predict_base_risks, predict_from_base)
+        self.model = model
+        self.grid = grid or RiskGrid()
+        self.columns = model.feature_cols_weather + model.feature_cols_traffic + model.feature_cols_incident
+        defaults = defaults or {}
+
+        n = self.grid.n_cells
+        self.conditions = np.tile(
+            np.array([defaults.get(col, 0.0) for col in self.columns], dtype=np.float32), (n, 1)
+        )
+        self.observed_at = np.full(n, np.datetime64("NaT"), dtype="datetime64[s]")
+        self.observed = np.zeros(n, dtype=bool)
+        self.version = np.zeros(n, dtype=np.int64)
+        self.output_version = np.zeros(n, dtype=np.int64)  # version the precomputed outputs came from
+        self._generation = np.zeros(n, dtype=np.int64)  # bumped by every conditions write, seeding included
+        self.base = np.zeros((n, 3), dtype=np.float32)
+        self.risk = np.zeros((HOURS_PER_WEEK, n), dtype=np.float32)
+        self.severity = np.zeros((HOURS_PER_WEEK, n), dtype=np.float32)
+        self.category_probs = None  # (168, n, n_classes), allocated on first recompute
+
+        self._hour_norm, self._day_norm = week_bucket_features()
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.conditions, self.base, self.risk, self.severity, self.category_probs)
+        return sum(a.nbytes for a in arrays if a is not None)
+
+    def recompute(self, cells=None):
+        """Re-run the base learners for `cells` (default: all) and refill their 168 buckets."""
+        cells = np.arange(self.grid.n_cells) if cells is None else np.unique(np.asarray(cells, dtype=int))
+        if len(cells) == 0:
+            return cells
+
+        with self._lock:
+            frame = pd.DataFrame(self.conditions[cells].astype(float), columns=self.columns)
+            generation = self._generation[cells].copy()
+            version = self.version[cells].copy()
+        base = self.model.predict_base_risks(frame)
+
+        # One fusion batch over every (bucket, cell) pair
+        n = len(cells)
+        risk, probs, severity = self.model.predict_from_base(
+            np.tile(base, (HOURS_PER_WEEK, 1)),
+            np.repeat(self._hour_norm, n),
+            np.repeat(self._day_norm, n),
+        )
+
+        with self._lock:
+            if self.category_probs is None:
+                self.category_probs = np.zeros((HOURS_PER_WEEK, self.grid.n_cells, probs.shape[1]), dtype=np.float32)
+            # Cells written since the snapshot are left to the newer write's recompute
+            fresh = self._generation[cells] == generation
+            kept = cells[fresh]
+            self.base[kept] = base[fresh]
+            self.risk[:, kept] = risk.reshape(HOURS_PER_WEEK, n)[:, fresh]
+            self.severity[:, kept] = severity.reshape(HOURS_PER_WEEK, n)[:, fresh]
+            self.category_probs[:, kept] = probs.reshape(HOURS_PER_WEEK, n, -1)[:, fresh]
+            self.output_version[kept] = version[fresh]
+        return cells
+
+    def update(self, df: pd.DataFrame, observed: bool = True):
+        """Apply condition observations (latitude, longitude, any condition columns, optional timestamp).
+
+        The newest observation per cell wins; columns a row doesn't carry keep
+        the cell's previous value. Only the touched cells are recomputed.
+        observed=False only seeds the conditions (e.g. from historical data):
+        the cells' observed flag, timestamp and version are left alone, so the
+        store doesn't serve them as live conditions.
+        """
+        cells = self.grid.cell_of(df["latitude"].to_numpy(), df["longitude"].to_numpy())
+        inside = cells >= 0
+        df, cells = df[inside], cells[inside]
+        if len(df) == 0:
+            return np.array([], dtype=int)
+
+        if "timestamp" in df.columns:
+            stamps = pd.to_datetime(df["timestamp"], errors="coerce").to_numpy(dtype="datetime64[s]")
+        else:
+            stamps = np.full(len(df), np.datetime64("NaT"), dtype="datetime64[s]")
+
+        # Stable sort by time so the last write per cell is the latest observation.
+        # NaT is the smallest int64, so rows without a (valid) timestamp go first
+        # and never overwrite a timestamped observation of the same cell.
+        order = np.argsort(stamps.view(np.int64), kind="stable")
+        df, cells, stamps = df.iloc[order], cells[order], stamps[order]
+
+        with self._lock:
+            for j, col in enumerate(self.columns):
+                if col not in df.columns:
+                    continue
+                values = df[col].to_numpy(dtype=float)
+                known = ~np.isnan(values)
+                self.conditions[cells[known], j] = values[known]
+            self._generation[np.unique(cells)] += 1
+            if observed:
+                self.observed_at[cells] = stamps
+                self.observed[cells] = True
+                self.version[np.unique(cells)] += 1
+
+        return self.recompute(cells)
+
+    def set_columns(self, cells, values: dict):
+        """Overwrite condition columns for cells (e.g. live incident counts); recompute only cells that changed."""
+        cells = np.asarray(cells, dtype=int)
+        changed = np.zeros(len(cells), dtype=bool)
+        with self._lock:
+            for col, vals in values.items():
+                j = self.columns.index(col)
+                vals = np.broadcast_to(np.asarray(vals, dtype=np.float32), cells.shape)
+                changed |= self.conditions[cells, j] != vals
+                self.conditions[cells, j] = vals
+            self.version[np.unique(cells[changed])] += 1
+            self._generation[np.unique(cells[changed])] += 1
+        return self.recompute(cells[changed])
+
+    def lookup(self, cells, day_of_week, hour_of_day):
+        """Precomputed outputs for (cell, bucket) pairs -> dict of arrays, plus the version they were computed from."""
+        cells = np.asarray(cells, dtype=int)
+        buckets = hour_of_week(day_of_week, hour_of_day)
+        with self._lock:
+            return {
+                "risk_score": self.risk[buckets, cells],
+                "severity_level": self.severity[buckets, cells],
+                "category_probs": self.category_probs[buckets, cells],
+                "base": self.base[cells],
+                "version": self.output_version[cells],
+            }
+
+    def bucket(self, day_of_week: int, hour_of_day: int) -> int:
+        return int(hour_of_week(day_of_week, hour_of_day))
+
+    def risk_at(self, lat, lon, day_of_week: int, hour_of_day: int):
+        """Cached risk for points (NaN outside the grid)."""
+        cells = self.grid.cell_of(lat, lon)
+        values = self.risk[self.bucket(day_of_week, hour_of_day)][np.maximum(cells, 0)]
+        return np.where(cells >= 0, values, np.nan)
+
+    def window(self, min_lat, min_lon, max_lat, max_lon, day_of_week: int, hour_of_day: int):
+        """(rows x cols) float32 risk for the cells overlapping a bounding box, plus the window's bounds."""
+        rows, cols = self.grid.window(min_lat, min_lon, max_lat, max_lon)
+        layer = self.risk[self.bucket(day_of_week, hour_of_day)].reshape(self.grid.shape)
+        return layer[rows, cols], self.grid.window_bounds(rows, cols)
+
+    def tile(self, z: int, x: int, y: int, day_of_week: int, hour_of_day: int):
+        return self.window(*tile_bounds(z, x, y), day_of_week, hour_of_day)
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+
+HOURS_PER_DAY = 24
+DAYS_PER_WEEK = 7
+HOURS_PER_WEEK = HOURS_PER_DAY * DAYS_PER_WEEK
+SMALL_BATCH = 8
+
+
+def hour_of_week(day_of_week, hour_of_day):
+    """Bucket index 0..167 (Monday 00:00 = 0), matching pandas' dayofweek."""
+    return np.asarray(day_of_week, dtype=int) * HOURS_PER_DAY + np.asarray(hour_of_day, dtype=int)
+
+
+def week_bucket_features():
+    """(hour / 23, day_of_week / 6) for all 168 hour-of-week buckets, in bucket order."""
+    buckets = np.arange(HOURS_PER_WEEK)
+    return (buckets % HOURS_PER_DAY) / 23.0, (buckets // HOURS_PER_DAY) / 6.0
+
+
+def hour_and_weekday(values):
+    """(hour_of_day, day_of_week) float arrays for a column of timestamps; NaN where missing.
+
+    Parses the whole column with one pd.to_datetime call. A batch can mix
+    formats or UTC offsets, which a single inferred format rejects; only then
+    fall back to parsing value by value (each keeps its own local time, like
+    the per-row path did). A handful of values is parsed one by one straight
+    away, which skips pandas' format inference on the single-request path.
+    """
+    values = values if isinstance(values, pd.Series) else pd.Series(list(values), dtype=object)
+    if len(values) >= SMALL_BATCH:
+        try:
+            ts = pd.DatetimeIndex(pd.to_datetime(values))
+            return np.asarray(ts.hour, dtype=float), np.asarray(ts.dayofweek, dtype=float)
+        except (ValueError, TypeError):
+            pass
+
+    parsed = [pd.Timestamp(v) for v in values]
+    hour = np.array([np.nan if pd.isna(t) else t.hour for t in parsed], dtype=float)
+    day = np.array([np.nan if pd.isna(t) else t.dayofweek for t in parsed], dtype=float)
+    return hour, day
+
+
+def stack_time_features(values):
+    """(hour / 23, day_of_week / 6), the time inputs of the risk fusion model."""
+    hour, day = hour_and_weekday(values)
+    return hour / 23.0, day / 6.0
@@ -0,0 +1,292 @@
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+
+from ml_common.compiled_encoder import compile_preprocessor
+
+
+# Flat-array evaluator for the trained tree ensembles.
+#
+# Every tree of a forest is flattened into the same contiguous node arrays
+# (feature, threshold, left, right, value, default_left), with each tree's
+# root at its own offset. Leaves point back at themselves, so a batch walks
+# all trees at once for max_depth steps with NumPy fancy indexing, instead
+# of going through sklearn/XGBoost's per-call machinery.
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+class FlatTreeEnsemble:
+    def __init__(
+        self,
+        feature,
+        threshold,
+        left,
+        right,
+        value,
+        default_left,
+        roots,
+        max_depth,
+        n_features,
+        strict,
+        aggregate="sum",
+        base_margin=0.0,
+        objective="reg:squarederror",
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.default_left = default_left
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_features = n_features
+        # XGBoost goes left on x < split, sklearn on x <= threshold
+        self.strict = strict
+        self.aggregate = aggregate
+        self.base_margin = base_margin
+        self.objective = objective
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def leaf_indices(self, X) -> np.ndarray:
+        X = _as_dense_float32(X)
+        rows = np.arange(X.shape[0])[:, None]
+        idx = np.broadcast_to(self.roots, (X.shape[0], self.n_trees))
+
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[idx]]
+            thr = self.threshold[idx]
+            go_left = x < thr if self.strict else x <= thr
+            go_left = np.where(np.isnan(x), self.default_left[idx], go_left)
+            idx = np.where(go_left, self.left[idx], self.right[idx])
+
+        return idx
+
+    def predict_margin(self, X) -> np.ndarray:
+        leaf_values = self.value[self.leaf_indices(X)]
+        if self.aggregate == "mean":
+            return leaf_values.mean(axis=1)
+        return leaf_values.sum(axis=1) + self.base_margin
+
+    def predict(self, X) -> np.ndarray:
+        margin = self.predict_margin(X)
+        if self.objective == "binary:logistic":
+            return (_sigmoid(margin) >= 0.5).astype(int)
+        return margin
+
+    def predict_proba(self, X) -> np.ndarray:
+        if self.objective != "binary:logistic":
+            raise ValueError(f"predict_proba is not available for objective {self.objective}")
+        p = _sigmoid(self.predict_margin(X))
+        return np.column_stack([1.0 - p, p])
+
+
+class CompiledPipeline:
+    """A Pipeline's preprocessing (compiled where possible) feeding a FlatTreeEnsemble directly."""
+
+    def __init__(self, preprocess, ensemble: FlatTreeEnsemble):
+        self.preprocess = preprocess
+        self.ensemble = ensemble
+
+    def predict(self, X):
+        return self.ensemble.predict(self.preprocess.transform(X))
+
+    def predict_proba(self, X):
+        return self.ensemble.predict_proba(self.preprocess.transform(X))
+
+
+def _as_dense_float32(X) -> np.ndarray:
+    # Sparse input follows XGBoost's DMatrix semantics: entries that are not
+    # stored are missing, not zero.
+    if hasattr(X, "tocoo"):
+        coo = X.tocoo()
+        dense = np.full(coo.shape, np.nan, dtype=np.float32)
+        dense[coo.row, coo.col] = coo.data
+        return dense
+    return np.asarray(X, dtype=np.float32)
+
+
+def _finalize(trees, n_features, strict, **kwargs) -> FlatTreeEnsemble:
+    """Concatenate per-tree node arrays, rebasing child indices onto the flat layout."""
+    feature, threshold, left, right, value, default_left, roots = [], [], [], [], [], [], []
+    max_depth, offset = 0, 0
+
+    for t in trees:
+        n = len(t["left"])
+        is_leaf = t["left"] < 0
+        own = np.arange(n)
+
+        feature.append(np.where(is_leaf, 0, t["feature"]))
+        threshold.append(np.where(is_leaf, 0.0, t["threshold"]))
+        left.append(np.where(is_leaf, own, t["left"]) + offset)
+        right.append(np.where(is_leaf, own, t["right"]) + offset)
+        value.append(t["value"])
+        default_left.append(t["default_left"])
+        roots.append(offset)
+
+        depth = np.zeros(n, dtype=int)
+        for node in range(n):
+            if not is_leaf[node]:
+                depth[t["left"][node]] = depth[t["right"][node]] = depth[node] + 1
+        max_depth = max(max_depth, int(depth.max()))
+        offset += n
+
+    return FlatTreeEnsemble(
+        feature=np.concatenate(feature).astype(np.int32),
+        threshold=np.concatenate(threshold).astype(np.float64),
+        left=np.concatenate(left).astype(np.int32),
+        right=np.concatenate(right).astype(np.int32),
+        value=np.concatenate(value).astype(np.float64),
+        default_left=np.concatenate(default_left).astype(bool),
+        roots=np.array(roots, dtype=np.int32),
+        max_depth=max_depth,
+        n_features=n_features,
+        strict=strict,
+        **kwargs,
+    )
+
+
+def from_sklearn_forest(forest) -> FlatTreeEnsemble:
+    trees = []
+    for est in forest.estimators_:
+        tree = est.tree_
+        missing_left = getattr(tree, "missing_go_to_left", np.zeros(tree.node_count, dtype=bool))
+        trees.append({
+            "feature": tree.feature,
+            "threshold": tree.threshold,
+            "left": tree.children_left,
+            "right": tree.children_right,
+            "value": tree.value[:, 0, 0],
+            "default_left": missing_left,
+        })
+    return _finalize(trees, forest.n_features_in_, strict=False, aggregate="mean")
+
+
+def from_xgboost(model) -> FlatTreeEnsemble:
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    learner = json.loads(booster.save_raw("json"))["learner"]
+
+    objective = learner["objective"]["name"]
+    if objective not in ("reg:squarederror", "binary:logistic"):
+        raise ValueError(f"Unsupported XGBoost objective: {objective}")
+    if learner["gradient_booster"]["name"] != "gbtree":
+        raise ValueError("Only gbtree boosters can be flattened")
+
+    base_score = float(learner["learner_model_param"]["base_score"])
+    base_margin = np.log(base_score / (1.0 - base_score)) if objective == "binary:logistic" else base_score
+
+    model_trees = learner["gradient_booster"]["model"]["trees"]
+    best_iteration = booster.attr("best_iteration")
+    if best_iteration is not None:
+        per_round = int(learner["gradient_booster"]["model"]["gbtree_model_param"].get("num_parallel_tree", 1))
+        model_trees = model_trees[: (int(best_iteration) + 1) * per_round]
+
+    trees = []
+    for t in model_trees:
+        trees.append({
+            "feature": np.array(t["split_indices"]),
+            "threshold": np.array(t["split_conditions"], dtype=np.float32),
+            "left": np.array(t["left_children"]),
+            "right": np.array(t["right_children"]),
+            # leaf values live in split_conditions for leaf nodes
+            "value": np.array(t["split_conditions"], dtype=np.float32),
+            "default_left": np.array(t["default_left"], dtype=bool),
+        })
+
+    n_features = int(learner["learner_model_param"]["num_feature"])
+    return _finalize(trees, n_features, strict=True, base_margin=base_margin, objective=objective)
+
+
+def flatten_tree_model(model) -> FlatTreeEnsemble:
+    if hasattr(model, "estimators_") and hasattr(model.estimators_[0], "tree_"):
+        return from_sklearn_forest(model)
+    if hasattr(model, "get_booster") or type(model).__name__ == "Booster":
+        return from_xgboost(model)
+    raise ValueError(f"Don't know how to flatten {type(model).__name__}")
+
+
+def check_parity(model, compiled, X, atol: float = 1e-5, rtol: float = 1e-5):
+    """Raise if the compiled evaluator disagrees with the original model on X.
+
+    XGBoost accumulates leaf values in float32, so large regression targets
+    (budgets in LKR) need the relative tolerance.
+    """
+    ensemble = getattr(compiled, "ensemble", compiled)
+    # Models fitted on a DataFrame warn about (or reject) bare arrays
+    names = getattr(model, "feature_names_in_", None)
+    X_model = pd.DataFrame(X, columns=names) if names is not None and not isinstance(X, pd.DataFrame) else X
+    if ensemble.objective == "binary:logistic":
+        expected, actual = model.predict_proba(X_model)[:, 1], compiled.predict_proba(X)[:, 1]
+    else:
+        expected, actual = model.predict(X_model), compiled.predict(X)
+
+    expected = np.asarray(expected, dtype=float)
+    err = np.abs(expected - actual)
+    if np.any(err > atol + rtol * np.abs(expected)):
+        raise ValueError(f"Flattened {type(model).__name__} differs from predict() by up to {err.max():.2e}")
+    return float(err.max()) if len(err) else 0.0
+
+
+def _random_rows(ensemble: FlatTreeEnsemble, n_samples: int) -> np.ndarray:
+    # Spread samples across every split so all branches get exercised
+    rng = np.random.RandomState(0)
+    X = np.zeros((n_samples, ensemble.n_features), dtype=np.float32)
+    internal = ensemble.left != np.arange(len(ensemble.left))
+    for f in range(ensemble.n_features):
+        thr = ensemble.threshold[internal & (ensemble.feature == f)]
+        # sklearn marks "missing vs. the rest" splits with an infinite threshold
+        thr = thr[np.isfinite(thr)]
+        lo, hi = (thr.min(), thr.max()) if len(thr) else (0.0, 1.0)
+        span = max(hi - lo, 1.0)
+        X[:, f] = rng.uniform(lo - 0.1 * span, hi + 0.1 * span, size=n_samples)
+    return X
+
+
+def compile_tree_model(model, check: bool = True, n_samples: int = 256, preprocess=None):
+    """Flatten a forest (or a Pipeline ending in one) and verify it against the original."""
+    if hasattr(model, "steps"):
+        if preprocess is None:
+            preprocess = compile_preprocessor(model[:-1])
+        compiled = CompiledPipeline(preprocess, flatten_tree_model(model.steps[-1][1]))
+        if check:
+            check_parity(model.steps[-1][1], compiled.ensemble, _random_rows(compiled.ensemble, n_samples))
+        return compiled
+
+    compiled = flatten_tree_model(model)
+    if check:
+        check_parity(model, compiled, _random_rows(compiled, n_samples))
+    return compiled
+
+
+if __name__ == "__main__":
+    # Parity + latency report: python -m ml_common.tree_ensemble <model.pkl> [...]
+    import time
+    import joblib
+
+    for path in sys.argv[1:]:
+        model = joblib.load(path)
+        compiled = compile_tree_model(model)
+        base = model.steps[-1][1] if hasattr(model, "steps") else model
+        flat = compiled.ensemble if hasattr(compiled, "ensemble") else compiled
+        X = _random_rows(flat, 1000)
+        err = check_parity(base, flat, X)
+
+        timings = {}
+        for name, fn in (("original", base.predict), ("flattened", flat.predict)):
+            start = time.perf_counter()
+            for i in range(200):
+                fn(X[i : i + 1])
+            timings[name] = (time.perf_counter() - start) / 200 * 1e3
+
+        print(
+            f"{path}: {flat.n_trees} trees, {len(flat.feature)} nodes, max|diff|={err:.2e}, "
+            f"single-row {timings['original']:.3f} ms -> {timings['flattened']:.3f} ms"
+        )
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Tests import ml_common from the repo root and the model modules the way
+# their own scripts do, by bare name from the component directories.
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT_DIR, os.path.join(ROOT_DIR, "component_1"), os.path.join(ROOT_DIR, "component_3")):
+    if path not in sys.path:
+        sys.path.append(path)
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import OneHotEncoder
+
+from ml_common.compiled_encoder import CompiledEncoder
+
+
+CATEGORICAL = ["region", "season", "group_size"]
+NUMERIC = ["days", "rating"]
+
+
+def make_frame(n=200, seed=0):
+    rng = np.random.RandomState(seed)
+    return pd.DataFrame({
+        "region": rng.choice(["hill", "coast", "north"], size=n),
+        "season": rng.choice(["dry", "wet"], size=n),
+        "group_size": rng.randint(1, 5, size=n),
+        "days": rng.randint(0, 4, size=n).astype(float),
+        "rating": np.round(rng.uniform(0, 5, size=n), 1),
+    })
+
+
+def make_requests():
+    # Unknown categories, missing categories, numeric NaN and real zeros
+    return pd.DataFrame({
+        "region": ["hill", "desert", None, "coast", np.nan],
+        "season": ["wet", "dry", "dry", "monsoon", "wet"],
+        "group_size": [2, 9, 1, 4.0, 3],
+        "days": [0.0, 2.0, np.nan, 3.0, 0.0],
+        "rating": [4.5, 0.0, 3.2, np.nan, 1.0],
+    })
+
+
+def fit_transformer(sparse_threshold):
+    ct = ColumnTransformer(
+        transformers=[
+            ("cat", OneHotEncoder(handle_unknown="ignore"), CATEGORICAL),
+            ("num", "passthrough", NUMERIC),
+        ],
+        sparse_threshold=sparse_threshold,
+    )
+    return ct.fit(make_frame())
+
+
+def as_booster_input(matrix):
+    # What XGBoost sees: entries a sparse matrix doesn't store are missing
+    if not sparse.issparse(matrix):
+        return np.asarray(matrix, dtype=np.float32)
+    coo = matrix.tocoo()
+    dense = np.full(coo.shape, np.nan, dtype=np.float32)
+    dense[coo.row, coo.col] = coo.data
+    return dense
+
+
+@pytest.mark.parametrize("sparse_threshold", [0.0, 1.0])
+def test_matches_column_transformer(sparse_threshold):
+    ct = fit_transformer(sparse_threshold)
+    encoder = CompiledEncoder.from_column_transformer(ct)
+    assert encoder.zeros_missing == (sparse_threshold > 0)
+
+    for X in (make_frame(seed=1), make_requests()):
+        expected = as_booster_input(ct.transform(X))
+        np.testing.assert_array_equal(encoder.transform(X), expected)
+        np.testing.assert_array_equal(encoder.transform(X.to_dict("records")), expected)
+
+
+def test_sparse_output_turns_real_zeros_missing():
+    ct = fit_transformer(1.0)
+    encoder = CompiledEncoder.from_dict(CompiledEncoder.from_column_transformer(ct).to_dict())
+    X = make_requests()
+    out = encoder.transform(X)
+
+    days = ct.output_indices_["num"].start
+    assert np.isnan(out[0, days]) and np.isnan(out[4, days])
+    # Unknown and missing categories leave every one-hot column of that feature empty
+    region = slice(0, 3)
+    assert np.isnan(out[1, region]).all() and np.isnan(out[2, region]).all()
+    np.testing.assert_array_equal(out, as_booster_input(ct.transform(X)))
+
+
+def test_scalar_record_broadcasts():
+    ct = fit_transformer(0.0)
+    encoder = CompiledEncoder.from_column_transformer(ct)
+    record = make_requests().iloc[0].to_dict()
+    out = encoder.transform({col: record[col] for col in encoder.columns}, n_rows=3)
+    expected = as_booster_input(ct.transform(pd.DataFrame([record] * 3)))
+    np.testing.assert_array_equal(out, expected)
@@ -0,0 +1,19 @@
+import pandas as pd
+
+from ml_common.dataset_cache import ensure_cache, read_dataset
+
+
+def test_bracketed_text_is_stored_as_category(tmp_path):
+    path = tmp_path / "itineraries.csv"
+    pd.DataFrame({
+        "selected_attractions": ["[1, 2]", "[3]", None],
+        "notes": ["[see notes]", "[1, 2]", "[]"],
+    }).to_csv(path, index=False)
+
+    _, manifest = ensure_cache(str(path), str(tmp_path / "cache"))
+    kinds = {c["name"]: c["kind"] for c in manifest["columns"]}
+    assert kinds == {"selected_attractions": "ragged", "notes": "category"}
+
+    df = read_dataset(str(path), cache_dir=str(tmp_path / "cache"))
+    assert df["selected_attractions"].tolist() == [[1, 2], [3], []]
+    assert df["notes"].tolist() == ["[see notes]", "[1, 2]", "[]"]
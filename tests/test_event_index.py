@@ -0,0 +1,24 @@
+from ml_common.event_index import EventIndex
+
+
+def make_index():
+    return EventIndex(
+        latitudes=[7.0, 7.01, 7.5],
+        longitudes=[80.0, 80.01, 80.5],
+        timestamps=["2024-01-01 00:00", "2024-01-05 12:00", "2024-01-10 00:00"],
+        event_types=["accident", "roadblock", "accident"],
+    )
+
+
+def test_covers_only_windows_inside_recorded_history():
+    index = make_index()
+    assert index.covers("2024-01-05 12:00", 24)
+    assert not index.covers("2024-01-01 12:00", 24)  # starts before the first event
+    assert not index.covers("2024-01-11 00:00", 24)  # ends after the last event
+    assert not EventIndex([], [], [], []).covers("2024-01-05 12:00", 24)
+
+
+def test_recent_counts_within_radius_and_window():
+    index = make_index()
+    assert index.recent_counts(7.0, 80.0, 5.0, "2024-01-05 12:00", 24 * 5) == (1, 1)
+    assert index.recent_counts(7.0, 80.0, 5.0, "2024-01-05 12:00", 24) == (0, 1)
@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from ml_common.hotel_index import HotelIndex, TagBitsets, _parse_list
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOTELS_PATH = os.path.join(ROOT_DIR, "datasets", "hotels.csv")
+
+
+def test_parse_list_formats():
+    assert _parse_list('["Wifi", "pool"]') == ["wifi", "pool"]
+    assert _parse_list("wifi, pool") == ["wifi", "pool"]
+    assert _parse_list('"wifi"') == ["wifi"]
+    assert _parse_list("5") == ["5"]
+    assert _parse_list("null") == []
+    assert _parse_list(None) == []
+
+
+def test_bitsets_beyond_64_tags_match_set_logic():
+    rng = np.random.RandomState(0)
+    tags = [f"t{i}" for i in range(150)]
+    rows = [list(rng.choice(tags, size=rng.randint(0, 20), replace=False)) for _ in range(300)]
+    bitsets = TagBitsets(rows)
+    assert bitsets.bits.shape == (300, 3)
+
+    for _ in range(100):
+        query = list(rng.choice(tags, size=rng.randint(1, 4), replace=False))
+        np.testing.assert_array_equal(bitsets.has_all(query), [set(query) <= set(r) for r in rows])
+        np.testing.assert_array_equal(bitsets.has_any(query), [bool(set(query) & set(r)) for r in rows])
+    assert not bitsets.has_all(["unknown"]).any()
+
+
+def test_price_lookups_match_brute_force():
+    df = pd.read_csv(HOTELS_PATH)
+    index = HotelIndex.from_frame(df)
+    low_prices, high_prices = df["price_range_min"].to_numpy(), df["price_range_max"].to_numpy()
+
+    # No explicit nightly rate column: scoring and the max_price filter both use the cheapest room
+    np.testing.assert_array_equal(index.nightly_rate, low_prices)
+    for cap in (0, 8000, 15000, 1e9):
+        np.testing.assert_array_equal(index.priced_at_most(cap), np.flatnonzero(low_prices <= cap))
+    for low, high in ((0, 5000), (9000, 12000), (20000, 1e9), (15000, 15000)):
+        expected = np.flatnonzero((low_prices <= high) & (high_prices >= low))
+        np.testing.assert_array_equal(index.price_overlaps(low, high), expected)
+
+
+def test_missing_price_max_falls_back_to_min():
+    df = pd.DataFrame({
+        "latitude": [7.0, 7.1, 7.2],
+        "longitude": [80.0, 80.1, 80.2],
+        "price_range_min": [5000.0, 9000.0, np.nan],
+        "price_range_max": [6000.0, np.nan, np.nan],
+    })
+    index = HotelIndex.from_frame(df)
+    assert index.price_overlaps(8500, 9500).tolist() == [1]
+    assert index.candidates(price_range=(0, 1e9)).tolist() == [0, 1]
+    assert index.nightly_rate[2] == 10000.0
@@ -0,0 +1,45 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from ml_common.event_index import EventIndex
+from ml_common.incident_stream import IncidentWindow, replay
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EVENTS_PATH = os.path.join(ROOT_DIR, "datasets", "risk_events_historical.csv")
+
+
+def test_live_counts_match_historical_radius_counts():
+    events = pd.read_csv(EVENTS_PATH)
+    index = EventIndex.from_frame(events)
+    window = IncidentWindow(window_hours=24 * 14, bucket_minutes=60, radius_km=25.0)
+    rng = np.random.RandomState(0)
+    checked = [0]
+
+    def on_batch(batch):
+        # The stream holds [window start, window end); the index counts (until - window, until]
+        until = pd.Timestamp((window.head + 1) * window.bucket_seconds - 1, unit="s")
+        points = events.iloc[rng.randint(len(events), size=3)]
+        lat = points["latitude"].to_numpy() + rng.normal(scale=0.05, size=3)
+        lon = points["longitude"].to_numpy() + rng.normal(scale=0.05, size=3)
+        live = window.counts_near(lat, lon)
+        for k in range(3):
+            expected = index.recent_counts(lat[k], lon[k], 25.0, until, window.window_hours)
+            assert tuple(live[k]) == expected
+            checked[0] += sum(expected) > 0
+
+    replay(events, window, on_batch=on_batch)
+    assert checked[0] > 0
+
+
+def test_expired_events_leave_the_radius_counts():
+    window = IncidentWindow(window_hours=1, bucket_minutes=15, radius_km=5.0)
+    window.add([7.0, 7.01], [80.0, 80.01], ["2024-01-01 00:00", "2024-01-01 00:20"], ["accident", "roadblock"])
+    assert window.counts(7.0, 80.0) == (1, 1)
+    assert window.counts(7.5, 80.5) == (0, 0)
+
+    window.add([8.0], [81.0], ["2024-01-01 01:10"], ["accident"])
+    assert window.counts(7.0, 80.0) == (0, 1)
+    assert len(window.point_lat) == 2
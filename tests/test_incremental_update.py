@@ -0,0 +1,64 @@
+import hashlib
+import os
+
+import pandas as pd
+import pytest
+
+from itinerary_model import ItineraryModel
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE_DIR = os.path.join(ROOT_DIR, "flask", "models", "component1")
+ITINERARIES_PATH = os.path.join(ROOT_DIR, "datasets", "itinerary_training_data_v2.csv")
+ATTRACTIONS_PATH = os.path.join(ROOT_DIR, "datasets", "tourist_attractions.csv")
+BOOSTED = ("time_model", "budget_model", "attraction_model")
+
+
+def load_base():
+    model = ItineraryModel()
+    model.load(BASE_DIR)
+    model.load_fusion_for_training(BASE_DIR)
+    return model
+
+
+def rounds(model):
+    return {name: getattr(model, name).named_steps["model"].get_booster().num_boosted_rounds() for name in BOOSTED}
+
+
+def bundle_digests():
+    return {
+        name: hashlib.sha256(open(os.path.join(BASE_DIR, name), "rb").read()).hexdigest()
+        for name in sorted(os.listdir(BASE_DIR))
+        if os.path.isfile(os.path.join(BASE_DIR, name))
+    }
+
+
+def test_update_appends_rounds_and_leaves_base_untouched(tmp_path):
+    digests = bundle_digests()
+    model = load_base()
+    base_pipelines = {name: getattr(model, name) for name in BOOSTED}
+    base_raw = {name: bytes(p.named_steps["model"].get_booster().save_raw("json")) for name, p in base_pipelines.items()}
+    base_rounds = rounds(model)
+
+    new_df = pd.read_csv(ITINERARIES_PATH).head(80)
+    metrics = model.update_from_new_rows(
+        new_df, pd.read_csv(ATTRACTIONS_PATH), boost_rounds=3, fine_tune_epochs=1
+    )
+    assert set(metrics["attraction_auc_base"]) == {"before", "after"}
+    assert rounds(model) == {name: n + 3 for name, n in base_rounds.items()}
+
+    # The loaded pipelines are copied, not boosted in place
+    for name, pipeline in base_pipelines.items():
+        assert bytes(pipeline.named_steps["model"].get_booster().save_raw("json")) == base_raw[name]
+
+    model.save(str(tmp_path))
+    updated = ItineraryModel()
+    updated.load(str(tmp_path))
+    assert rounds(updated) == rounds(model)
+    assert bundle_digests() == digests
+
+
+def test_update_rejects_a_too_small_hold_out():
+    new_df = pd.read_csv(ITINERARIES_PATH).head(5)
+    with pytest.raises(ValueError, match="Hold-out has 1 itinerary"):
+        load_base().update_from_new_rows(new_df, pd.read_csv(ATTRACTIONS_PATH), boost_rounds=1, fine_tune_epochs=1)
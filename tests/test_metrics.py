@@ -0,0 +1,26 @@
+from ml_common.metrics import REGISTRY, stage_timer, stage_timers_off
+
+
+def stage_count(stage):
+    prefix = f'ml_stage_duration_seconds_count{{component="test",stage="{stage}"}} '
+    for line in REGISTRY.render().splitlines():
+        if line.startswith(prefix):
+            return int(line[len(prefix):])
+    return 0
+
+
+def test_stage_timer_records_one_sample():
+    with stage_timer("test", "recorded"):
+        pass
+    assert stage_count("recorded") == 1
+
+
+def test_stage_timers_off_skips_samples_and_restores():
+    with stage_timers_off():
+        with stage_timer("test", "warm_up"):
+            pass
+    assert stage_count("warm_up") == 0
+
+    with stage_timer("test", "warm_up"):
+        pass
+    assert stage_count("warm_up") == 1
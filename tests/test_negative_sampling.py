@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from itinerary_model import ItineraryModel
+
+
+N_CATALOG, K = 20, 5
+
+# Itinerary 0 selects 2 rows (sparse draws), itinerary 1 selects 12 (dense
+# path, 8 rows left) and itinerary 2 selects 16 (pool of 4 <= k, taken whole)
+POS_IT = np.array([0] * 2 + [1] * 12 + [2] * 16)
+POS_ATT = np.r_[[3, 17], np.arange(12), np.arange(2, 18)]
+
+
+def sample(seed):
+    return ItineraryModel()._sample_negatives(np.random.RandomState(seed), POS_IT, POS_ATT, N_CATALOG, K)
+
+
+def allowed_rows(it):
+    return np.setdiff1d(np.arange(N_CATALOG), POS_ATT[POS_IT == it])
+
+
+def test_same_seed_same_negatives():
+    owners, negatives = sample(7)
+    again_owners, again_negatives = sample(7)
+    np.testing.assert_array_equal(owners, again_owners)
+    np.testing.assert_array_equal(negatives, again_negatives)
+
+
+def test_k_distinct_negatives_outside_the_selection():
+    owners, negatives = sample(0)
+    assert (np.diff(owners) >= 0).all()
+
+    for p, it in enumerate(POS_IT):
+        neg = negatives[owners == p]
+        assert (np.diff(neg) > 0).all()
+        assert np.isin(neg, allowed_rows(it)).all()
+        if it == 2:
+            # Small pools are used whole
+            np.testing.assert_array_equal(neg, allowed_rows(it))
+        else:
+            assert len(neg) == K
+
+
+@pytest.mark.parametrize("it", [0, 1])
+def test_negatives_are_near_uniform(it):
+    rng = np.random.RandomState(0)
+    model = ItineraryModel()
+    counts = np.zeros(N_CATALOG)
+    draws = 2000
+    for _ in range(draws):
+        owners, negatives = model._sample_negatives(rng, POS_IT, POS_ATT, N_CATALOG, K)
+        np.add.at(counts, negatives[np.isin(owners, np.flatnonzero(POS_IT == it))], 1)
+
+    allowed = allowed_rows(it)
+    share = counts[allowed] / (draws * np.sum(POS_IT == it))
+    # Each allowed row should land in k / |allowed| of the draws
+    np.testing.assert_allclose(share, K / len(allowed), atol=0.03)
+    assert counts[np.setdiff1d(np.arange(N_CATALOG), allowed)].sum() == 0
@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_common.parallel_fit import fit_estimators
+from risk_model import RiskStackingModel
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(ROOT_DIR, "datasets", "realtime_conditions_training.csv")
+
+
+def risk_jobs(model, df):
+    learners = model.base_learners(random_state=42)
+    y = df["risk_score"].to_numpy()
+    return {
+        "weather": (learners["weather"], df[model.feature_cols_weather], y),
+        "traffic": (learners["traffic"], df[model.feature_cols_traffic], y),
+        "incident": (learners["incident"], df[model.feature_cols_incident], y),
+    }
+
+
+@pytest.fixture(scope="module")
+def fitted_both_ways():
+    df = pd.read_csv(DATA_PATH)
+    model = RiskStackingModel()
+    sequential = fit_estimators(risk_jobs(model, df), workers=1)
+    # Default thread budget in both modes; the pool is forced even on a single core
+    pooled = fit_estimators(risk_jobs(model, df), workers=3)
+    return model, df, sequential, pooled
+
+
+def test_pool_matches_sequential_boosters(fitted_both_ways):
+    _, _, sequential, pooled = fitted_both_ways
+    for name in ("weather", "incident"):
+        a = sequential[name].get_booster().save_raw("json")
+        b = pooled[name].get_booster().save_raw("json")
+        assert bytes(a) == bytes(b), name
+
+
+def test_pool_matches_sequential_forest(fitted_both_ways):
+    model, df, sequential, pooled = fitted_both_ways
+    X = df[model.feature_cols_traffic]
+    np.testing.assert_array_equal(sequential["traffic"].predict(X), pooled["traffic"].predict(X))
+
+
+def test_fit_restores_n_jobs(fitted_both_ways):
+    _, _, sequential, pooled = fitted_both_ways
+    for fitted in (sequential, pooled):
+        assert fitted["traffic"].n_jobs == -1
+        assert fitted["weather"].n_jobs is None
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from ml_common.risk_grid import RiskGrid
+from ml_common.risk_tiles import RiskTileCache
+
+
+class EchoModel:
+    """Stand-in for RiskStackingModel whose risk is the cell's temperature."""
+
+    feature_cols_weather = ["temperature"]
+    feature_cols_traffic = ["traffic_density"]
+    feature_cols_incident = ["num_recent_incidents"]
+
+    def __init__(self):
+        self.before_predict = None
+
+    def predict_base_risks(self, frame):
+        if self.before_predict is not None:
+            hook, self.before_predict = self.before_predict, None
+            hook()
+        return frame.to_numpy(dtype=np.float32)
+
+    def predict_from_base(self, base, hour_norm, day_norm):
+        probs = np.stack([base[:, 0], 1.0 - base[:, 0]], axis=1)
+        return base[:, 0], probs, base[:, 1]
+
+
+def make_cache():
+    cache = RiskTileCache(EchoModel(), grid=RiskGrid(bounds=(0.0, 0.0, 0.2, 0.2), cell_deg=0.1))
+    cache.recompute()
+    return cache
+
+
+def observe(cache, temperature, timestamp=None):
+    row = {"latitude": 0.05, "longitude": 0.05, "temperature": temperature}
+    if timestamp is not None:
+        row["timestamp"] = timestamp
+    return cache.update(pd.DataFrame([row]))
+
+
+def test_untimestamped_row_does_not_overwrite_newer_observation():
+    cache = make_cache()
+    cache.update(pd.DataFrame([
+        {"latitude": 0.05, "longitude": 0.05, "temperature": 30.0, "timestamp": "2024-05-01T10:00:00"},
+        {"latitude": 0.05, "longitude": 0.05, "temperature": 10.0, "timestamp": None},
+        {"latitude": 0.05, "longitude": 0.05, "temperature": 20.0, "timestamp": "not a time"},
+    ]))
+
+    assert cache.conditions[0, 0] == 30.0
+    assert cache.observed_at[0] == np.datetime64("2024-05-01T10:00:00")
+
+
+def test_stale_recompute_does_not_overwrite_newer_write():
+    cache = make_cache()
+    # While the first write's recompute is running, a second write lands and recomputes first
+    cache.model.before_predict = lambda: observe(cache, 2.0)
+    observe(cache, 1.0)
+
+    stored = cache.lookup([0], 0, 0)
+    assert cache.version[0] == 2
+    assert stored["version"][0] == 2
+    assert stored["risk_score"][0] == 2.0
+
+
+def test_lookup_reports_version_of_outputs():
+    cache = make_cache()
+    observe(cache, 1.0)
+    stored = cache.lookup([0, 1], 3, 12)
+    assert stored["version"].tolist() == [1, 0]
+    assert stored["risk_score"].tolist() == [1.0, 0.0]
@@ -0,0 +1,98 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+from ml_common.tree_ensemble import compile_tree_model, flatten_tree_model
+
+
+ATOL, RTOL = 1e-5, 1e-5
+
+
+def make_data(n=600, n_features=5, nan_share=0.1, seed=0):
+    rng = np.random.RandomState(seed)
+    X = rng.normal(size=(n, n_features)).astype(np.float32)
+    y = X[:, 0] * 2.0 - X[:, 1] + np.sin(X[:, 2]) + rng.normal(scale=0.1, size=n)
+    X[rng.rand(n, n_features) < nan_share] = np.nan
+    columns = [f"f{i}" for i in range(n_features)]
+    return pd.DataFrame(X, columns=columns), y
+
+
+def assert_close(expected, actual):
+    np.testing.assert_allclose(actual, np.asarray(expected, dtype=float), atol=ATOL, rtol=RTOL)
+
+
+@pytest.fixture(autouse=True)
+def no_feature_name_warnings():
+    with warnings.catch_warnings():
+        warnings.filterwarnings("error", message=".*does not have valid feature names.*")
+        yield
+
+
+def test_xgb_regressor_matches_predict_with_missing_values():
+    X, y = make_data()
+    model = xgb.XGBRegressor(n_estimators=50, max_depth=4, learning_rate=0.1, random_state=0).fit(X, y)
+
+    compiled = compile_tree_model(model)
+    X_test, _ = make_data(n=300, nan_share=0.3, seed=1)
+    assert_close(model.predict(X_test), compiled.predict(X_test))
+
+
+def test_xgb_classifier_matches_predict_proba_and_predict():
+    X, y = make_data()
+    labels = (y > 0).astype(int)
+    model = xgb.XGBClassifier(n_estimators=40, max_depth=3, learning_rate=0.1, random_state=0).fit(X, labels)
+
+    compiled = compile_tree_model(model)
+    X_test, _ = make_data(n=300, nan_share=0.3, seed=2)
+    assert_close(model.predict_proba(X_test), compiled.predict_proba(X_test))
+    np.testing.assert_array_equal(model.predict(X_test), compiled.predict(X_test))
+
+
+def test_random_forest_regressor_matches_predict_with_missing_values():
+    X, y = make_data()
+    model = RandomForestRegressor(n_estimators=30, max_depth=6, random_state=0).fit(X, y)
+
+    compiled = compile_tree_model(model)
+    X_test, _ = make_data(n=300, nan_share=0.3, seed=3)
+    assert_close(model.predict(X_test), compiled.predict(X_test))
+
+
+def test_pipeline_wrapped_model_matches_pipeline_predict():
+    X, y = make_data()
+    X["kind"] = np.where(np.arange(len(X)) % 3 == 0, "a", np.where(np.arange(len(X)) % 3 == 1, "b", "c"))
+    y = y + (X["kind"] == "b") * 3.0
+    numeric = [c for c in X.columns if c != "kind"]
+    pipeline = Pipeline(steps=[
+        ("preprocess", ColumnTransformer(transformers=[
+            ("cat", OneHotEncoder(handle_unknown="ignore"), ["kind"]),
+            ("num", "passthrough", numeric),
+        ])),
+        ("model", xgb.XGBRegressor(n_estimators=50, max_depth=4, learning_rate=0.1, random_state=0)),
+    ]).fit(X, y)
+
+    compiled = compile_tree_model(pipeline)
+    X_test, _ = make_data(n=300, nan_share=0.3, seed=4)
+    # "d" was never seen: the encoder ignores it
+    X_test["kind"] = np.array(["a", "b", "c", "d"])[np.arange(len(X_test)) % 4]
+    assert_close(pipeline.predict(X_test), compiled.predict(X_test))
+
+
+def test_best_iteration_truncates_trees():
+    X, y = make_data()
+    X_train, X_val, y_train, y_val = X.iloc[:400], X.iloc[400:], y[:400], y[400:]
+    model = xgb.XGBRegressor(
+        n_estimators=500, max_depth=6, learning_rate=0.3, early_stopping_rounds=5, random_state=0
+    ).fit(X_train, y_train, eval_set=[(X_val, y_val)], verbose=False)
+    assert model.best_iteration < 499
+
+    flat = flatten_tree_model(model)
+    assert flat.n_trees == model.best_iteration + 1
+    X_test, _ = make_data(n=300, nan_share=0.3, seed=5)
+    assert_close(model.predict(X_test), flat.predict(X_test))